@@ -10,28 +10,53 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
+def env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+# Профиль окружения: "development" (по умолчанию) или "production".
+# В production выключены DEBUG и журнал SQL-запросов, шаблоны читаются через
+# кэширующий загрузчик, а браузерный рендерер DRF не подключается.
+DJANGO_ENV = os.environ.get("DJANGO_ENV", "development")
+PRODUCTION = DJANGO_ENV == "production"
+
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = "django-insecure-3x+n%y-st#rmnk5*hr6+m8inf%62f&e+7zdb2j_@u-29q5l_c9"
+if PRODUCTION:
+    SECRET_KEY = os.environ["DJANGO_SECRET_KEY"]
+else:
+    SECRET_KEY = os.environ.get(
+        "DJANGO_SECRET_KEY",
+        "django-insecure-3x+n%y-st#rmnk5*hr6+m8inf%62f&e+7zdb2j_@u-29q5l_c9",
+    )
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = env_bool("DJANGO_DEBUG", not PRODUCTION)
+
+ALLOWED_HOSTS = [
+    host for host in os.environ.get("DJANGO_ALLOWED_HOSTS", "").split(",") if host
+]
 
-ALLOWED_HOSTS = []
+# Админка импортирует ModelAdmin всех приложений при старте воркера
+ENABLE_ADMIN = env_bool("DJANGO_ENABLE_ADMIN", True)
 
 
 # Application definition
 
 INSTALLED_APPS = [
-    "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
     "django.contrib.sessions",
@@ -41,7 +66,12 @@ INSTALLED_APPS = [
     "rest_framework",
 ]
 
+if ENABLE_ADMIN:
+    INSTALLED_APPS.insert(0, "django.contrib.admin")
+
 MIDDLEWARE = [
+    "orders.metrics.MetricsMiddleware",
+    "orders.branches.BranchMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -57,7 +87,7 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
-        "APP_DIRS": True,
+        "APP_DIRS": not PRODUCTION,
         "OPTIONS": {
             "context_processors": [
                 "django.template.context_processors.debug",
@@ -69,6 +99,17 @@ TEMPLATES = [
     },
 ]
 
+if PRODUCTION:
+    TEMPLATES[0]["OPTIONS"]["loaders"] = [
+        (
+            "django.template.loaders.cached.Loader",
+            [
+                "django.template.loaders.filesystem.Loader",
+                "django.template.loaders.app_directories.Loader",
+            ],
+        ),
+    ]
+
 WSGI_APPLICATION = "cafe_manager.wsgi.application"
 
 
@@ -85,14 +126,20 @@ WSGI_APPLICATION = "cafe_manager.wsgi.application"
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
-        "NAME": "postgres",
-        "USER": "postgres",
-        "PASSWORD": "postgres",
-        "HOST": "db",
-        "PORT": "5432",
+        "NAME": os.environ.get("POSTGRES_DB", "postgres"),
+        "USER": os.environ.get("POSTGRES_USER", "postgres"),
+        "PASSWORD": os.environ.get("POSTGRES_PASSWORD", "postgres"),
+        "HOST": os.environ.get("POSTGRES_HOST", "db"),
+        "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 60 if PRODUCTION else 0)),
+        "CONN_HEALTH_CHECKS": PRODUCTION,
     }
 }
 
+# Заказы крупных филиалов можно вынести в отдельные базы: алиас добавляется
+# в DATABASES, а ID филиала и алиас — в ORDERS_BRANCH_DATABASES
+DATABASE_ROUTERS = ["orders.routers.BranchRouter"]
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -139,6 +186,114 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "orders.pagination.ApproximateCountPagination",
     "PAGE_SIZE": 10,
+    "DEFAULT_RENDERER_CLASSES": [
+        "rest_framework.renderers.JSONRenderer",
+    ],
+}
+
+# Браузерный API тянет формы и шаблоны DRF, поэтому подключается только по запросу
+if env_bool("DJANGO_BROWSABLE_API", DEBUG):
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"].append(
+        "rest_framework.renderers.BrowsableAPIRenderer"
+    )
+
+# Фоновые задачи (outbox): размер пула, число попыток и базовая задержка повтора
+ORDERS_TASKS_WORKERS = 4
+ORDERS_TASKS_MAX_ATTEMPTS = 5
+ORDERS_TASKS_RETRY_DELAY = 2
+ORDERS_TASKS_EAGER = False
+
+# Время жизни ключей идемпотентности API в секундах
+ORDERS_IDEMPOTENCY_TTL = 24 * 60 * 60
+
+# Выборочное профилирование представлений (заголовок X-Profile или доля запросов).
+# Заголовок учитывается от сотрудников или со значением ORDERS_PROFILING_SECRET
+ORDERS_PROFILING_ENABLED = False
+ORDERS_PROFILING_SECRET = os.environ.get("ORDERS_PROFILING_SECRET", "")
+ORDERS_PROFILING_SAMPLE_RATE = 0.0
+ORDERS_PROFILING_INTERVAL = 0.001
+ORDERS_PROFILING_DIR = BASE_DIR / "profiles"
+
+# Время жизни кэшированных строк списка заказов в секундах
+ORDERS_ROW_CACHE_TIMEOUT = 600
+
+# Метрики Prometheus на /metrics/ (счетчики в памяти каждого процесса)
+ORDERS_METRICS_ENABLED = env_bool("ORDERS_METRICS_ENABLED", True)
+
+# Время жизни закрытых корзин статистики заказов в секундах
+ORDERS_STATS_CACHE_TTL = 60 * 60
+
+# Максимальный размер страницы API заказов (?page_size=)
+ORDERS_MAX_PAGE_SIZE = 100
+
+# Запас в секундах, на который /api/orders/changes/ расширяет окно назад,
+# чтобы не терять изменения транзакций, закоммиченных после выдачи токена
+ORDERS_CHANGES_OVERLAP = 5
+
+# Срок хранения отметок удаления заказов в днях (prune_order_tombstones);
+# токен /api/orders/changes/ старше этого срока требует полной синхронизации
+ORDERS_TOMBSTONE_TTL_DAYS = 90
+
+# Кэш Django: locmem (по умолчанию), redis или memcached; адрес сервера в
+# DJANGO_CACHE_LOCATION (redis://redis:6379/0, memcached:11211). LocMemCache
+# свой в каждом процессе gunicorn, поэтому общий уровень кэша деталей
+# заказа, счета и сессии в кэше между воркерами не делятся. redis требует
+# пакета redis, memcached — пакета pymemcache.
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+    "memcached": "django.core.cache.backends.memcached.PyMemcacheCache",
+}
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[os.environ.get("DJANGO_CACHE_BACKEND", "locmem")],
+        "LOCATION": os.environ.get("DJANGO_CACHE_LOCATION", ""),
+    }
+}
+
+# Хранилище сессий: db (по умолчанию), cached_db, cache или signed_cookies.
+# cache и cached_db требуют общего для всех воркеров кэша (redis или
+# memcached в DJANGO_CACHE_BACKEND). signed_cookies
+# хранит сессию в подписанной cookie и не обращается к серверу вовсе.
+SESSION_ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "cache": "django.contrib.sessions.backends.cache",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get("DJANGO_SESSION_ENGINE", "db")]
+
+# Хранилище flash-сообщений: cookie (по умолчанию) не трогает сессию даже
+# при переполнении; fallback и session пишут сообщения в сессию
+MESSAGE_STORAGES = {
+    "cookie": "django.contrib.messages.storage.cookie.CookieStorage",
+    "fallback": "django.contrib.messages.storage.fallback.FallbackStorage",
+    "session": "django.contrib.messages.storage.session.SessionStorage",
 }
+MESSAGE_STORAGE = MESSAGE_STORAGES[os.environ.get("DJANGO_MESSAGE_STORAGE", "cookie")]
+
+# С какого числа строк список API и админка показывают оценку планировщика
+# PostgreSQL вместо точного COUNT(*)
+ORDERS_COUNT_ESTIMATE_THRESHOLD = 10_000
+
+# Кэш деталей заказа API: размер LRU в памяти процесса и время жизни в CACHES
+ORDERS_DETAIL_CACHE_SIZE = 512
+ORDERS_DETAIL_CACHE_TIMEOUT = 5 * 60
+
+# Счета: процессы пула рендеринга (на каждый воркер gunicorn, всего
+# ORDERS_RECEIPTS_WORKERS × GUNICORN_WORKERS), ожидание места в очереди и
+# рендера (сек), время жизни готовых счетов в CACHES и моноширинный TTF с
+# кириллицей для PDF
+ORDERS_RECEIPTS_WORKERS = int(os.environ.get("ORDERS_RECEIPTS_WORKERS", 2))
+ORDERS_RECEIPTS_QUEUE_TIMEOUT = 5
+ORDERS_RECEIPTS_RENDER_TIMEOUT = 30
+ORDERS_RECEIPTS_CACHE_TIMEOUT = 24 * 60 * 60
+ORDERS_RECEIPTS_FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf"
+ORDERS_RECEIPTS_EAGER = False
+
+# Филиалы: филиал по умолчанию для запросов без ?branch=/X-Branch и базы
+# отдельных филиалов ({ID филиала: алиас из DATABASES}), см. orders.branches
+ORDERS_DEFAULT_BRANCH = 1
+ORDERS_BRANCH_DATABASES = {}
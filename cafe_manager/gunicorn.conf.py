@@ -0,0 +1,67 @@
+"""
+Конфигурация gunicorn для продакшен-запуска.
+
+Запуск (миграции выполняются отдельным одноразовым шагом):
+
+    python manage.py migrate --noinput
+    gunicorn -c gunicorn.conf.py
+
+По умолчанию обслуживается WSGI-приложение воркерами ``gthread``. При
+``GUNICORN_INTERFACE=asgi`` используется ``cafe_manager.asgi`` с воркерами
+uvicorn из пакета ``uvicorn-worker`` (``uvicorn.workers`` устарел). Количество процессов и потоков вычисляется по числу CPU и может
+быть переопределено переменными окружения.
+
+Сигналы мастеру:
+    HUP  - плавно перезапустить воркеры с новой конфигурацией
+    USR2 - запустить новый мастер с новым кодом (при preload_app код
+           загружается в мастере, поэтому HUP не подхватит изменения кода)
+    TERM - плавная остановка с ожиданием graceful_timeout
+"""
+
+import multiprocessing
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+cpu_count = multiprocessing.cpu_count()
+interface = os.environ.get("GUNICORN_INTERFACE", "wsgi")
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+if interface == "asgi":
+    wsgi_app = "cafe_manager.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "cafe_manager.wsgi:application"
+    worker_class = "gthread"
+
+workers = min(
+    _env_int("GUNICORN_WORKERS", cpu_count * 2 + 1),
+    _env_int("GUNICORN_MAX_WORKERS", 16),
+)
+threads = _env_int("GUNICORN_THREADS", 2)
+
+# Приложение импортируется в мастере один раз, воркеры получают его через fork
+preload_app = True
+
+timeout = _env_int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = _env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = _env_int("GUNICORN_KEEPALIVE", 5)
+
+# Периодический перезапуск воркеров ограничивает рост памяти
+max_requests = _env_int("GUNICORN_MAX_REQUESTS", 2000)
+max_requests_jitter = _env_int("GUNICORN_MAX_REQUESTS_JITTER", 200)
+
+accesslog = os.environ.get("GUNICORN_ACCESSLOG", "-") or None
+errorlog = "-"
+
+
+def post_fork(server, worker) -> None:
+    # Соединения, открытые мастером при preload, не должны делиться с воркерами
+    from django.db import connections
+
+    connections.close_all()
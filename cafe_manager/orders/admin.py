@@ -1,6 +1,13 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db import transaction
+from django.db.models import QuerySet
+from django.http import HttpRequest
+from django.utils import timezone
 
-from orders.models import Dish, Order, OrderItem
+from orders import metrics, tasks
+from orders.forms import OrderItemAdminForm
+from orders.models import Branch, Dish, Order, OrderItem
+from orders.pagination import EstimatedCountPaginator
 
 
 @admin.register(Dish)
@@ -14,6 +21,65 @@ class DishAdmin(admin.ModelAdmin):
         "id",
         "name",
     )
+    # Нужен для autocomplete_fields в позициях заказа
+    search_fields = ("name",)
+
+
+@admin.register(Branch)
+class BranchAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "name",
+        "code",
+    )
+    list_display_links = (
+        "id",
+        "name",
+    )
+
+
+def set_status(request: HttpRequest, queryset: QuerySet, status: str) -> None:
+    """
+    Меняет статус выбранных заказов одним UPDATE.
+
+    Меняются только заказы, из статуса которых переход допустим
+    (``Order.STATUS_TRANSITIONS``), остальные пропускаются. Из базы читаются
+    только статус, филиал и время заказов, чтобы учесть переходы в метриках
+    и сбросить закрытые корзины статистики после коммита.
+    """
+    sources = [
+        source
+        for source, targets in Order.STATUS_TRANSITIONS.items()
+        if status in targets
+    ]
+    with transaction.atomic():
+        rows = list(
+            queryset.select_for_update().values_list(
+                "pk", "status", "created_at", "updated_at", "branch_id"
+            )
+        )
+        changed = [row for row in rows if row[1] in sources]
+        if changed:
+            Order.all_objects.filter(pk__in=[row[0] for row in changed]).update(
+                status=status, updated_at=timezone.now()
+            )
+
+            def record() -> None:
+                for _, old_status, created_at, updated_at, _ in changed:
+                    metrics.record_status_change(
+                        old_status, status, created_at, updated_at
+                    )
+
+            transaction.on_commit(record)
+            for _, _, created_at, _, branch_id in changed:
+                tasks.invalidate_statistics_later(branch_id, created_at, queryset.db)
+
+    messages.success(request, f"Обновлено заказов: {len(changed)}")
+    skipped = len(rows) - len(changed)
+    if skipped:
+        messages.warning(
+            request, f"Пропущено заказов с недопустимым переходом статуса: {skipped}"
+        )
 
 
 @admin.register(Order)
@@ -25,15 +91,30 @@ class OrderAdmin(admin.ModelAdmin):
         "total_price",
         "created_at",
         "updated_at",
+        "branch",
     )
     list_display_links = (
         "id",
         "table_number",
     )
+    list_filter = ("branch",)
+    date_hierarchy = "created_at"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ("mark_ready", "mark_paid")
+
+    @admin.action(description="Отметить готовыми")
+    def mark_ready(self, request: HttpRequest, queryset: QuerySet) -> None:
+        set_status(request, queryset, "ready")
+
+    @admin.action(description="Отметить оплаченными")
+    def mark_paid(self, request: HttpRequest, queryset: QuerySet) -> None:
+        set_status(request, queryset, "paid")
 
 
 @admin.register(OrderItem)
-class OrdrItemAdmin(admin.ModelAdmin):
+class OrderItemAdmin(admin.ModelAdmin):
+    form = OrderItemAdminForm
     list_display = (
         "id",
         "order",
@@ -45,3 +126,11 @@ class OrdrItemAdmin(admin.ModelAdmin):
         "id",
         "order",
     )
+    list_select_related = (
+        "order",
+        "dish",
+    )
+    raw_id_fields = ("order",)
+    autocomplete_fields = ("dish",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
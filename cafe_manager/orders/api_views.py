@@ -1,44 +1,118 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Count, Sum, QuerySet
+from rest_framework.settings import api_settings
+from django.db.models import Count, Q, QuerySet
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import transaction
-from .models import Order, Dish
-from .serializers import OrderSerializer, DishSerializer, OrderItemCreateSerializer
+from django.http import Http404, HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from .branches import atomic_in_request_branch, get_request_branch
+from .changes import ChangesTokenExpiredError, get_order_changes, parse_limit
+from .detail_cache import get_order_detail
+from .menu import get_changes, get_snapshot, make_etag
+from .models import DailyReport, Order, Dish, MenuState
+from .serializers import (
+    DailyReportSerializer,
+    OrderSerializer,
+    DishSerializer,
+    OrderItemCreateSerializer,
+)
+from .fieldsets import SparseFieldsViewMixin
 from .exceptions import OrderNotFoundError, DishNotFoundError
+from .idempotency import idempotent
+from .items import add_order_items
+from .pagination import OrderPagination
+from .profiling import ProfiledViewMixin
+from .renderers import ColumnarJSONParser, ColumnarJSONRenderer
+from .reports import load_report
+from .search import search_orders
+from .statistics import get_totals, get_window_statistics, parse_window
+from .tasks import EVENT_CREATED, EVENT_DELETED, EVENT_UPDATED, notify_order_changed
+from datetime import date
 from typing import Any, Optional
 from rest_framework.request import Request
 from rest_framework.serializers import ModelSerializer
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(ProfiledViewMixin, SparseFieldsViewMixin, viewsets.ModelViewSet):
     """
     ViewSet для работы с заказами через API.
 
     Endpoints:
-    - GET /api/orders/ - список заказов
+    - GET /api/orders/ - список заказов (?q=стол 7 тирамису сегодня - поиск,
+      слова короче трех символов в нем игнорируются, см. orders.search;
+      ?pagination=cursor&ordering=id - курсорный режим, см. orders.pagination)
     - POST /api/orders/ - создание заказа
     - GET /api/orders/{id}/ - детали заказа
     - PUT/PATCH /api/orders/{id}/ - обновление заказа
     - DELETE /api/orders/{id}/ - удаление заказа
     - POST /api/orders/{id}/add_items/ - добавление позиций
     - POST /api/orders/{id}/update_status/ - обновление статуса
+    - GET /api/orders/changes/?since=<token>&limit= - изменения заказов после
+      токена, постранично
     - GET /api/orders/statistics/ - статистика по заказам
+      (?from=&to=&bucket=hour|day - разбивка по часам или дням)
+
+    POST-запросы создания заказа и добавления позиций принимают заголовок
+    Idempotency-Key: повтор с тем же ключом возвращает сохраненный ответ.
+
+    С заголовком Accept: application/vnd.cafe.columnar+json ответы отдаются
+    в компактном колоночном JSON (см. orders.renderers).
+
+    GET-запросы принимают ?fields=id,status,total_price и ?expand=items
+    (см. orders.fieldsets): позиции загружаются, только если попадают в ответ.
+
+    Заказы и статистика ограничены филиалом запроса (?branch= или заголовок
+    X-Branch, см. orders.branches); новый заказ создается в нем же.
     """
 
     serializer_class = OrderSerializer
+    pagination_class = OrderPagination
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer]
+    parser_classes = [*api_settings.DEFAULT_PARSER_CLASSES, ColumnarJSONParser]
 
     def get_queryset(self) -> QuerySet[Order]:
-        return Order.objects.all()
+        queryset = self.restrict_columns(
+            Order.objects.for_branch(get_request_branch(self.request))
+        )
+        if self.wants_field("items"):
+            queryset = queryset.prefetch_related("items")
+        query = self.request.query_params.get("q")
+        if query:
+            queryset = search_orders(queryset, query)
+        return queryset
+
+    def perform_destroy(self, instance: Order) -> None:
+        instance.soft_delete()
+        notify_order_changed(instance, EVENT_DELETED)
 
     def perform_create(self, serializer: ModelSerializer) -> None:
-        serializer.save()
+        order = serializer.save(branch_id=get_request_branch(self.request))
+        notify_order_changed(order, EVENT_CREATED)
 
     def retrieve(self, request: Request, *args, **kwargs) -> Response:
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        if self.get_sparse_fields() is not None:
+            return Response(self.get_serializer(self.get_object()).data)
+
+        # Версия заказа читается одним столбцом; заказ с позициями
+        # загружается и сериализуется только при промахе кэша
+        pk = str(kwargs["pk"])
+        version = (
+            Order.objects.for_branch(get_request_branch(request))
+            .filter(pk=pk)
+            .values_list("updated_at", flat=True)
+            .first()
+            if pk.isdigit()
+            else None
+        )
+        if version is None:
+            raise OrderNotFoundError()
+
+        def build() -> dict[str, Any]:
+            return dict(self.get_serializer(self.get_object()).data)
+
+        return Response(get_order_detail(int(pk), version, build))
 
     def get_object(self):
         try:
@@ -46,7 +120,8 @@ class OrderViewSet(viewsets.ModelViewSet):
         except ObjectDoesNotExist:
             raise OrderNotFoundError()
 
-    @transaction.atomic
+    @atomic_in_request_branch
+    @idempotent
     def create(self, request, *args, **kwargs):
         try:
             return super().create(request, *args, **kwargs)
@@ -56,7 +131,7 @@ class OrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-    @transaction.atomic
+    @atomic_in_request_branch
     def destroy(self, request, *args, **kwargs):
         try:
             return super().destroy(request, *args, **kwargs)
@@ -69,7 +144,8 @@ class OrderViewSet(viewsets.ModelViewSet):
             )
 
     @action(detail=True, methods=["post"])
-    @transaction.atomic
+    @atomic_in_request_branch
+    @idempotent
     def add_items(self, request: Request, pk: Optional[int] = None) -> Response:
         """
         Добавляет позиции к существующему заказу.
@@ -95,13 +171,22 @@ class OrderViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            dish_ids = [item["dish"] for item in serializer.validated_data]
+            dish_ids = {item["dish"].id for item in serializer.validated_data}
             existing_dishes = Dish.objects.filter(id__in=dish_ids)
             if len(existing_dishes) != len(dish_ids):
                 raise DishNotFoundError()
 
-            items = serializer.save(order=order)
-            return Response({"status": "items added", "count": len(items)})
+            add_order_items(
+                order,
+                (
+                    (item["dish"], item["quantity"])
+                    for item in serializer.validated_data
+                ),
+            )
+            notify_order_changed(order, EVENT_UPDATED)
+            return Response(
+                {"status": "items added", "count": len(serializer.validated_data)}
+            )
 
         except DishNotFoundError:
             raise
@@ -121,14 +206,8 @@ class OrderViewSet(viewsets.ModelViewSet):
                 {"error": "Статус не указан"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        valid_transitions = {
-            "pending": ["ready", "paid"],
-            "ready": ["paid"],
-            "paid": [],
-        }
-
         current_status = order.status
-        if new_status not in valid_transitions.get(current_status, []):
+        if new_status not in Order.STATUS_TRANSITIONS.get(current_status, []):
             return Response(
                 {
                     "error": f"Недопустимый переход из '{current_status}' в '{new_status}'"
@@ -137,31 +216,60 @@ class OrderViewSet(viewsets.ModelViewSet):
             )
 
         order.status = new_status
-        order.save()
+        order.save(update_fields=["status", "updated_at"])
+        notify_order_changed(order, EVENT_UPDATED)
 
         return Response({"status": "success", "new_status": new_status})
 
     @action(detail=False, methods=["get"])
-    def statistics(self, request):
-        try:
-            total_orders = Order.objects.count()
-            total_revenue = (
-                Order.objects.filter(status="paid").aggregate(Sum("total_price"))[
-                    "total_price__sum"
-                ]
-                or 0
-            )
-            orders_by_status = Order.objects.values("status").annotate(
-                count=Count("id")
-            )
+    def changes(self, request: Request) -> Response:
+        """
+        Возвращает заказы филиала, измененные и удаленные после токена ``since``.
 
+        Ответ содержит новый токен для следующего запроса; ``since=0``
+        возвращает все активные заказы. Не больше ``?limit=`` заказов за раз:
+        при ``has_more`` запрос повторяется с выданным токеном. Устаревший
+        токен дает 410, и терминал начинает с ``since=0`` (см. orders.changes).
+        """
+        params = request.query_params
+        try:
             return Response(
-                {
-                    "total_orders": total_orders,
-                    "total_revenue": total_revenue,
-                    "orders_by_status": orders_by_status,
-                }
+                get_order_changes(
+                    params.get("since", ""),
+                    get_request_branch(request),
+                    parse_limit(params.get("limit")),
+                )
             )
+        except ChangesTokenExpiredError as e:
+            return Response({"error": str(e)}, status=status.HTTP_410_GONE)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=["get"])
+    def statistics(self, request: Request) -> Response:
+        """
+        Статистика заказов филиала запроса.
+
+        Без параметров возвращает итоги за все время. С параметрами
+        ``?from=&to=&bucket=hour|day`` добавляет разбивку окна по корзинам
+        (см. orders.statistics).
+        """
+        params = request.query_params
+        if not any(name in params for name in ("from", "to", "bucket")):
+            window = None
+        else:
+            try:
+                window = parse_window(
+                    params.get("from"), params.get("to"), params.get("bucket")
+                )
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        branch_id = get_request_branch(request)
+        try:
+            if window is None:
+                return Response(get_totals(branch_id))
+            return Response(get_window_statistics(window, branch_id))
         except Exception as e:
             return Response(
                 {"error": "Ошибка при получении статистики", "detail": str(e)},
@@ -169,9 +277,27 @@ class OrderViewSet(viewsets.ModelViewSet):
             )
 
 
-class DishViewSet(viewsets.ModelViewSet):
-    queryset = Dish.objects.all()
+class DishViewSet(ProfiledViewMixin, SparseFieldsViewMixin, viewsets.ModelViewSet):
+    """
+    ViewSet для работы с меню через API.
+
+    Endpoints:
+    - GET /api/dishes/ - список блюд (постранично)
+    - GET /api/dishes/popular/ - популярные блюда
+    - GET /api/dishes/snapshot/ - все меню одним сжатым документом с ETag
+    - GET /api/dishes/changes/?since=<version> - изменения меню после версии
+
+    Как и заказы, поддерживает колоночный JSON (orders.renderers) и
+    выборочные поля ?fields= (orders.fieldsets).
+    """
+
+    queryset = Dish.objects.order_by("id")
     serializer_class = DishSerializer
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer]
+    parser_classes = [*api_settings.DEFAULT_PARSER_CLASSES, ColumnarJSONParser]
+
+    def get_queryset(self) -> QuerySet[Dish]:
+        return self.restrict_columns(super().get_queryset())
 
     def get_object(self):
         try:
@@ -183,7 +309,10 @@ class DishViewSet(viewsets.ModelViewSet):
     def popular(self, request):
         try:
             popular_dishes = Dish.objects.annotate(
-                order_count=Count("orderitem")
+                order_count=Count(
+                    "orderitem",
+                    filter=Q(orderitem__order__deleted_at__isnull=True),
+                )
             ).order_by("-order_count")[:5]
 
             serializer = self.get_serializer(popular_dishes, many=True)
@@ -193,3 +322,81 @@ class DishViewSet(viewsets.ModelViewSet):
                 {"error": "Ошибка при получении популярных блюд", "detail": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+
+    @action(detail=False, methods=["get"])
+    def snapshot(self, request: Request) -> HttpResponse:
+        """
+        Отдает все меню одним gzip JSON-документом.
+
+        Документ строится один раз на версию меню и берется из кэша. Если
+        ETag терминала совпадает с текущей версией, возвращается 304 без
+        обращения к кэшу.
+        """
+        compressed = "gzip" in request.headers.get("Accept-Encoding", "")
+        etag = make_etag(MenuState.current(), compressed)
+
+        # Для If-None-Match сравнение слабое: W/ у тегов терминала не важен
+        client_etags = {
+            tag.removeprefix("W/")
+            for tag in parse_etags(request.headers.get("If-None-Match", ""))
+        }
+        if etag in client_etags or "*" in client_etags:
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            menu = get_snapshot()
+            etag = menu.etag(compressed)
+            response = HttpResponse(
+                menu.content if compressed else menu.decompressed(),
+                content_type="application/json",
+            )
+            if compressed:
+                response["Content-Encoding"] = "gzip"
+
+        response["ETag"] = etag
+        response["Cache-Control"] = "no-cache"
+        patch_vary_headers(response, ["Accept-Encoding"])
+        return response
+
+    @action(detail=False, methods=["get"])
+    def changes(self, request: Request) -> Response:
+        """Возвращает блюда, измененные и удаленные после версии ``since``."""
+        since = request.query_params.get("since", "")
+        if not since.isdigit():
+            return Response(
+                {"error": "Параметр since должен быть неотрицательным числом"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(get_changes(int(since)))
+
+
+class DailyReportViewSet(ProfiledViewMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Z-отчеты закрытых дней (см. orders.reports).
+
+    Endpoints:
+    - GET /api/reports/ - список закрытых дней
+    - GET /api/reports/{ГГГГ-ММ-ДД}/ - отчет за день
+
+    Отчет отдается из сохраненного снимка без пересчета; в колоночном JSON
+    (orders.renderers) он передается в том же виде, в каком хранится.
+    Отчеты ограничены филиалом запроса (см. orders.branches).
+    """
+
+    queryset = DailyReport.objects.defer("data")
+    serializer_class = DailyReportSerializer
+    lookup_field = "day"
+    lookup_value_regex = r"\d{4}-\d{2}-\d{2}"
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer]
+
+    def get_queryset(self) -> QuerySet[DailyReport]:
+        return super().get_queryset().filter(branch_id=get_request_branch(self.request))
+
+    def retrieve(self, request: Request, *args, **kwargs) -> Response:
+        try:
+            day = date.fromisoformat(kwargs["day"])
+        except ValueError:
+            raise Http404
+        report = self.get_queryset().defer(None).filter(day=day).first()
+        if report is None:
+            raise Http404
+        return Response(load_report(report))
@@ -0,0 +1,152 @@
+"""
+Филиалы: выбор филиала запроса и базы данных филиала.
+
+Заказы и позиции принадлежат филиалу (``branch_id``). Филиал запроса
+определяется ``BranchMiddleware``: параметр ``?branch=``, затем заголовок
+``X-Branch``, затем cookie, иначе ``ORDERS_DEFAULT_BRANCH``. Переданный
+параметром филиал запоминается в cookie, чтобы HTML-страницы оставались в
+выбранном филиале. Некорректный или несуществующий филиал дает 400; список
+ID филиалов кэшируется и сбрасывается при изменении филиалов.
+
+Запросы по филиалу строятся через ``for_branch()`` менеджеров заказов и
+позиций: он фильтрует по ``branch_id`` (индексы начинаются с этого
+столбца) и направляет запрос в базу филиала. Крупные филиалы можно вынести
+в отдельные базы, перечислив их в ``ORDERS_BRANCH_DATABASES`` (ID филиала
+→ алиас из ``DATABASES``); остальные живут в ``default``. Запись новых
+объектов направляет ``orders.routers.BranchRouter``.
+"""
+
+from functools import wraps
+from typing import Any, Callable, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.http import HttpRequest, HttpResponse, HttpResponseBadRequest
+
+DEFAULT_BRANCH_ID: int = 1
+
+BRANCH_QUERY_PARAM: str = "branch"
+BRANCH_HEADER: str = "X-Branch"
+BRANCH_COOKIE: str = "branch"
+BRANCH_COOKIE_MAX_AGE: int = 365 * 24 * 60 * 60
+
+BRANCH_IDS_CACHE_KEY: str = "orders:branch:ids"
+BRANCH_IDS_CACHE_TIMEOUT: int = 5 * 60
+
+
+def get_default_branch() -> int:
+    return getattr(settings, "ORDERS_DEFAULT_BRANCH", DEFAULT_BRANCH_ID)
+
+
+def get_branch_database(branch_id: Optional[int]) -> str:
+    """Алиас базы, в которой хранятся заказы филиала."""
+    databases = getattr(settings, "ORDERS_BRANCH_DATABASES", {})
+    return databases.get(branch_id, DEFAULT_DB_ALIAS)
+
+
+def branch_databases() -> set[str]:
+    """Алиасы отдельных баз филиалов (без ``default``)."""
+    return set(getattr(settings, "ORDERS_BRANCH_DATABASES", {}).values()) - {
+        DEFAULT_DB_ALIAS
+    }
+
+
+def order_databases() -> list[str]:
+    """Все базы, в которых могут лежать заказы: ``default`` и базы филиалов."""
+    return [DEFAULT_DB_ALIAS, *sorted(branch_databases())]
+
+
+def get_branch_ids() -> frozenset[int]:
+    """ID существующих филиалов из кэша или одним запросом к базе."""
+    branch_ids = cache.get(BRANCH_IDS_CACHE_KEY)
+    if branch_ids is None:
+        branch = apps.get_model("orders", "Branch")
+        branch_ids = frozenset(branch.objects.values_list("id", flat=True))
+        cache.set(BRANCH_IDS_CACHE_KEY, branch_ids, BRANCH_IDS_CACHE_TIMEOUT)
+    return branch_ids
+
+
+def reset_branch_ids() -> None:
+    cache.delete(BRANCH_IDS_CACHE_KEY)
+
+
+def branch_atomic(branch_id: int) -> transaction.Atomic:
+    """Транзакция в базе филиала."""
+    return transaction.atomic(using=get_branch_database(branch_id))
+
+
+def get_request_branch(request: HttpRequest) -> int:
+    """Филиал запроса; без ``BranchMiddleware`` — филиал по умолчанию."""
+    return getattr(request, "branch_id", None) or get_default_branch()
+
+
+def atomic_in_request_branch(method: Callable[..., Any]) -> Callable[..., Any]:
+    """Выполняет метод представления в транзакции базы филиала запроса."""
+
+    @wraps(method)
+    def wrapper(view: Any, *args: Any, **kwargs: Any) -> Any:
+        with branch_atomic(get_request_branch(view.request)):
+            return method(view, *args, **kwargs)
+
+    return wrapper
+
+
+def parse_branch(value: Optional[str]) -> Optional[int]:
+    """
+    Разбирает ID филиала из параметра, заголовка или cookie.
+
+    Raises:
+        ValueError: Если значение не положительное целое число
+    """
+    if value is None or value == "":
+        return None
+    if not value.isdigit() or int(value) == 0:
+        # Значение из запроса в сообщение не попадает: оно уходит в ответ
+        raise ValueError("Некорректный ID филиала")
+    return int(value)
+
+
+class BranchMiddleware:
+    """Определяет филиал запроса и сохраняет его в ``request.branch_id``."""
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        from_cookie = False
+        try:
+            selected = parse_branch(request.GET.get(BRANCH_QUERY_PARAM))
+            branch_id = selected or parse_branch(request.headers.get(BRANCH_HEADER))
+            from_cookie = branch_id is None
+            branch_id = branch_id or parse_branch(request.COOKIES.get(BRANCH_COOKIE))
+            if branch_id is not None and branch_id not in get_branch_ids():
+                raise ValueError(f"Филиал {branch_id} не найден")
+        except ValueError as e:
+            response = HttpResponseBadRequest(
+                str(e), content_type="text/plain; charset=utf-8"
+            )
+            if from_cookie:
+                # Сохраненный филиал мог быть удален: cookie сбрасывается,
+                # чтобы следующий запрос получил филиал по умолчанию
+                response.delete_cookie(BRANCH_COOKIE, samesite="Lax")
+            return response
+
+        request.branch_id = branch_id or get_default_branch()
+        response = self.get_response(request)
+        if selected is not None:
+            response.set_cookie(
+                BRANCH_COOKIE,
+                str(selected),
+                max_age=BRANCH_COOKIE_MAX_AGE,
+                samesite="Lax",
+            )
+        return response
+
+
+class BranchScopedMixin:
+    """Примесь к представлениям с ``model``: объекты только филиала запроса."""
+
+    def get_queryset(self) -> Any:
+        return self.model._default_manager.for_branch(get_request_branch(self.request))
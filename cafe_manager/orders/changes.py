@@ -0,0 +1,280 @@
+"""
+Инкрементальная синхронизация заказов для терминалов.
+
+Лента ведется по филиалу запроса (см. orders.branches). Токен —
+``<филиал>.<время>``: ID филиала и время начала предыдущего запроса в
+микросекундах Unix; токен другого филиала отклоняется. Изменения ищутся по
+индексу ``(branch, updated_at, id)``: измененные и созданные заказы
+отдаются компактными строками (без вложенных блюд меню, только снимок
+позиции), мягко удаленные и отметки ``OrderTombstone`` — списком ID.
+
+Ответ ограничен ``limit`` заказами. Если изменений больше, ответ содержит
+``has_more: true`` и токен продолжения
+``<филиал>.<since>.<начало>.<updated_at>.<id>`` — исходный ``since``,
+время начала первой страницы и позицию последнего отданного заказа;
+терминал повторяет запрос с ним, пока ``has_more`` не станет ложным.
+Отметки удаления приходят на последней странице, а ее итоговый токен —
+время начала первой страницы: следующая дельта покрывает все, что
+изменилось и удалилось, пока терминал листал страницы (в том числе при
+полной синхронизации, которая удаленные заказы не читает).
+
+``updated_at`` выставляется при сохранении, а не при коммите, поэтому
+транзакция, начатая до выдачи токена, может закоммититься позже. Чтобы
+такие изменения не терялись, окно расширяется назад на
+``ORDERS_CHANGES_OVERLAP`` секунд. Повторно присланный заказ терминал
+просто перезаписывает, так что дельты идемпотентны.
+
+Отметки удаления хранятся ``ORDERS_TOMBSTONE_TTL_DAYS`` дней (команда
+``prune_order_tombstones``); токен старше этого срока отклоняется
+``ChangesTokenExpiredError``, и терминал выполняет полную синхронизацию.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Any, Optional
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .branches import DEFAULT_BRANCH_ID
+from .models import Order, OrderItem, OrderTombstone
+
+DEFAULT_OVERLAP: float = 5.0
+DEFAULT_LIMIT: int = 500
+MAX_LIMIT: int = 1000
+DEFAULT_TOMBSTONE_TTL_DAYS: int = 90
+
+FULL_SYNC_TOKEN: str = "0"
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Поля заказа в строке изменений
+ORDER_FIELDS: tuple[str, ...] = (
+    "id",
+    "table_number",
+    "status",
+    "total_price",
+    "created_at",
+    "updated_at",
+)
+
+ITEM_FIELDS: tuple[str, ...] = (
+    "order_id",
+    "id",
+    "dish_id",
+    "dish_name",
+    "unit_price",
+    "quantity",
+    "price",
+)
+
+
+class ChangesTokenExpiredError(ValueError):
+    """Токен старше срока хранения отметок удаления; нужна полная синхронизация."""
+
+
+def _micros(moment: datetime) -> int:
+    return (moment - EPOCH) // timedelta(microseconds=1)
+
+
+def _moment(micros: str) -> datetime:
+    return EPOCH + timedelta(microseconds=int(micros))
+
+
+def make_token(moment: datetime, branch_id: int = DEFAULT_BRANCH_ID) -> str:
+    """Кодирует филиал и момент времени в токен синхронизации."""
+    return f"{branch_id}.{_micros(moment)}"
+
+
+def make_continuation_token(
+    branch_id: int,
+    since: datetime,
+    started: datetime,
+    updated_at: datetime,
+    order_id: int,
+) -> str:
+    """
+    Токен продолжения: исходный ``since``, время начала первой страницы и
+    позиция последнего заказа.
+    """
+    return (
+        f"{branch_id}.{_micros(since)}.{_micros(started)}."
+        f"{_micros(updated_at)}.{order_id}"
+    )
+
+
+def parse_token(
+    token: str, branch_id: int = DEFAULT_BRANCH_ID
+) -> tuple[datetime, Optional[tuple[datetime, datetime, int]]]:
+    """
+    Разбирает токен синхронизации филиала.
+
+    Returns:
+        tuple: Момент ``since`` и для токена продолжения время начала первой
+        страницы и позиция (``updated_at``, ID), иначе None
+
+    Raises:
+        ValueError: Если токен некорректный или выдан другому филиалу
+    """
+    if token == FULL_SYNC_TOKEN:
+        return EPOCH, None
+    parts = token.split(".")
+    if len(parts) not in (2, 5) or not all(part.isdigit() for part in parts):
+        raise ValueError("Параметр since должен быть токеном из прошлого ответа")
+    if int(parts[0]) != branch_id:
+        raise ValueError("Токен since выдан для другого филиала")
+
+    since = _moment(parts[1])
+    if len(parts) == 2:
+        return since, None
+    return since, (_moment(parts[2]), _moment(parts[3]), int(parts[4]))
+
+
+def parse_limit(value: Optional[str]) -> int:
+    """
+    Разбирает ``?limit=``; по умолчанию ``DEFAULT_LIMIT``.
+
+    Raises:
+        ValueError: Если лимит не число от 1 до ``MAX_LIMIT``
+    """
+    if not value:
+        return DEFAULT_LIMIT
+    if not value.isdigit() or not 1 <= int(value) <= MAX_LIMIT:
+        raise ValueError(f"Параметр limit должен быть числом от 1 до {MAX_LIMIT}")
+    return int(value)
+
+
+def get_tombstone_cutoff() -> datetime:
+    """Момент, раньше которого отметки удаления уже могли быть удалены."""
+    days = getattr(settings, "ORDERS_TOMBSTONE_TTL_DAYS", DEFAULT_TOMBSTONE_TTL_DAYS)
+    return timezone.now() - timedelta(days=days)
+
+
+def _order_rows(rows: list[dict[str, Any]], branch_id: int) -> list[dict[str, Any]]:
+    """Компактные строки заказов с позициями; позиции читаются одним запросом."""
+    items: dict[int, list[dict[str, Any]]] = defaultdict(list)
+    order_items = (
+        OrderItem.objects.for_branch(branch_id)
+        .filter(order_id__in=[row["id"] for row in rows])
+        .order_by("order_id", "id")
+        .values_list(*ITEM_FIELDS)
+    )
+    for order_id, pk, dish_id, name, unit_price, quantity, price in order_items:
+        items[order_id].append(
+            {
+                "id": pk,
+                "dish": {"id": dish_id, "name": name, "price": str(unit_price)},
+                "quantity": quantity,
+                "price": str(price),
+            }
+        )
+
+    return [
+        {
+            **{field: row[field] for field in ORDER_FIELDS},
+            "total_price": str(row["total_price"]),
+            "items": items[row["id"]],
+        }
+        for row in rows
+    ]
+
+
+def get_order_changes(
+    since: str, branch_id: int = DEFAULT_BRANCH_ID, limit: int = DEFAULT_LIMIT
+) -> dict[str, Any]:
+    """
+    Возвращает страницу заказов филиала, измененных и удаленных после токена.
+
+    Args:
+        since (str): Токен из прошлого ответа; ``0`` — полная синхронизация
+        branch_id (int): Филиал
+        limit (int): Максимальное количество заказов в ответе
+
+    Returns:
+        dict: Новый токен, признак ``has_more``, измененные заказы и ID
+        удаленных заказов
+
+    Raises:
+        ValueError: Если токен некорректный
+        ChangesTokenExpiredError: Если токен старше срока хранения отметок
+    """
+    since_moment, position = parse_token(since, branch_id)
+    full_sync = since_moment == EPOCH
+    if not full_sync and since_moment < get_tombstone_cutoff():
+        raise ChangesTokenExpiredError(
+            "Токен since устарел, выполните полную синхронизацию (since=0)"
+        )
+
+    # Итоговый токен — начало первой страницы, а не текущей
+    started = timezone.now() if position is None else position[0]
+    overlap = getattr(settings, "ORDERS_CHANGES_OVERLAP", DEFAULT_OVERLAP)
+    cutoff = since_moment - timedelta(seconds=overlap)
+
+    # При полной синхронизации удаленные заказы не нужны, в дельте мягко
+    # удаленный заказ приходит как удаление
+    manager = Order.objects if full_sync else Order.all_objects
+    orders = manager.for_branch(branch_id)
+    if position is not None:
+        _, after, last_id = position
+        orders = orders.filter(
+            Q(updated_at__gt=after) | Q(updated_at=after, id__gt=last_id)
+        )
+    elif not full_sync:
+        orders = orders.filter(updated_at__gt=cutoff)
+
+    rows = list(
+        orders.order_by("updated_at", "id").values(*ORDER_FIELDS, "deleted_at")[
+            : limit + 1
+        ]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    deleted = {row["id"] for row in rows if row["deleted_at"] is not None}
+    changed = _order_rows([row for row in rows if row["deleted_at"] is None], branch_id)
+
+    if has_more:
+        last = rows[-1]
+        token = make_continuation_token(
+            branch_id, since_moment, started, last["updated_at"], last["id"]
+        )
+    else:
+        token = make_token(started, branch_id)
+        if not full_sync:
+            deleted.update(
+                OrderTombstone.objects.filter(
+                    branch_id=branch_id, deleted_at__gt=cutoff
+                ).values_list("order_id", flat=True)
+            )
+
+    return {
+        "token": token,
+        "has_more": has_more,
+        "changed": changed,
+        "deleted": sorted(deleted),
+    }
+
+
+def prune_tombstones(batch_size: int = 1000) -> int:
+    """
+    Удаляет отметки удаления старше ``ORDERS_TOMBSTONE_TTL_DAYS`` пачками.
+
+    Args:
+        batch_size (int): Количество отметок, удаляемых одним запросом
+
+    Returns:
+        int: Общее количество удаленных отметок
+    """
+    cutoff = get_tombstone_cutoff()
+    total = 0
+    while True:
+        ids = list(
+            OrderTombstone.objects.filter(deleted_at__lt=cutoff).values_list(
+                "id", flat=True
+            )[:batch_size]
+        )
+        if not ids:
+            return total
+        deleted, _ = OrderTombstone.objects.filter(id__in=ids).delete()
+        total += deleted
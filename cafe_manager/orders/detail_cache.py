@@ -0,0 +1,134 @@
+"""
+Кэш сериализованных деталей заказа для ``GET /api/orders/{id}/``.
+
+Ключ записи — ID заказа и его ``updated_at``. Любое изменение заказа и его
+позиций (включая ``add_items``) сохраняет заказ и сдвигает ``updated_at``,
+поэтому устаревшая запись просто перестает находиться во всех процессах.
+Блюда позиций берутся из снимка в самой позиции, так что правка меню
+детали заказа не меняет и инвалидации не требует.
+
+Кэш двухуровневый: LRU в памяти процесса перед общим кэшем Django. При
+сохранении заказа запись локального уровня удаляется сразу. Общим между
+воркерами второй уровень становится только с redis или memcached в
+``DJANGO_CACHE_BACKEND``; с LocMemCache по умолчанию он тоже свой у каждого
+процесса. Попадания и
+промахи обоих уровней считаются в метрике
+``cafe_order_detail_cache_total``.
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import metrics
+from .models import Order
+
+CACHE_KEY: str = "orders:detail:{order_id}:{version}"
+
+DEFAULT_LOCAL_SIZE: int = 512
+DEFAULT_TIMEOUT: int = 5 * 60
+
+TIER_LOCAL: str = "local"
+TIER_SHARED: str = "shared"
+
+CACHE_RESULTS = metrics.Counter(
+    "cafe_order_detail_cache_total",
+    "Обращения к кэшу деталей заказа",
+    ("tier", "result"),
+)
+
+
+class LRUCache:
+    """
+    Потокобезопасный LRU-кэш фиксированного размера.
+
+    Attributes:
+        maxsize (int): Максимальное количество записей
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._data: OrderedDict[Any, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Optional[Any]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Any) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+local_cache = LRUCache(
+    getattr(settings, "ORDERS_DETAIL_CACHE_SIZE", DEFAULT_LOCAL_SIZE)
+)
+
+
+def _cache_key(order_id: int, version: datetime) -> str:
+    return CACHE_KEY.format(order_id=order_id, version=version.timestamp())
+
+
+def get_order_detail(
+    order_id: int, version: datetime, build: Callable[[], dict[str, Any]]
+) -> dict[str, Any]:
+    """
+    Возвращает детали заказа из кэша, строя их при промахе обоих уровней.
+
+    Args:
+        order_id (int): ID заказа
+        version (datetime): Текущий ``updated_at`` заказа
+        build (Callable): Сериализует заказ при промахе
+
+    Returns:
+        dict: Данные ответа
+    """
+    entry = local_cache.get(order_id)
+    if entry is not None and entry[0] == version:
+        CACHE_RESULTS.labels(TIER_LOCAL, "hit").inc()
+        return entry[1]
+    CACHE_RESULTS.labels(TIER_LOCAL, "miss").inc()
+
+    key = _cache_key(order_id, version)
+    payload = cache.get(key)
+    if payload is None:
+        CACHE_RESULTS.labels(TIER_SHARED, "miss").inc()
+        payload = build()
+        cache.set(
+            key,
+            payload,
+            getattr(settings, "ORDERS_DETAIL_CACHE_TIMEOUT", DEFAULT_TIMEOUT),
+        )
+    else:
+        CACHE_RESULTS.labels(TIER_SHARED, "hit").inc()
+
+    local_cache.set(order_id, (version, payload))
+    return payload
+
+
+@receiver([post_save, post_delete], sender=Order)
+def invalidate_order_detail(sender, instance, **kwargs):
+    local_cache.delete(instance.pk)
@@ -28,4 +28,16 @@ class InvalidOrderStatusError(APIException):
 
 class DishNotFoundError(APIException):
     status_code = status.HTTP_404_NOT_FOUND
-    default_detail = "Блюдо не найдено" 
\ No newline at end of file
+    default_detail = "Блюдо не найдено" 
+
+class InvalidIdempotencyKeyError(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "Некорректный ключ идемпотентности"
+
+class IdempotencyKeyInProgressError(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Запрос с этим ключом идемпотентности еще выполняется"
+
+class IdempotencyKeyMismatchError(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "Ключ идемпотентности уже использован с другим телом запроса"
@@ -0,0 +1,63 @@
+"""
+Выборочные поля ответов API (``?fields=`` и ``?expand=``).
+
+``?fields=id,status`` оставляет в ответе только перечисленные поля, а
+``?expand=items`` добавляет к ним вложенные позиции. Без ``fields`` ответ
+полный, как раньше. Представление по этим параметрам сужает и QuerySet:
+загружаются только нужные столбцы, а позиции подгружаются лишь тогда,
+когда попадают в ответ.
+"""
+
+from typing import Any, Optional
+
+from django.db.models import QuerySet
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_QUERY_PARAM: str = "fields"
+EXPAND_QUERY_PARAM: str = "expand"
+
+
+def parse_names(value: Optional[str]) -> Optional[set[str]]:
+    """Разбирает список имен через запятую; None, если параметр не передан."""
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+class SparseFieldsViewMixin:
+    """
+    Примесь к DRF ViewSet: передает ``fields``/``expand`` в сериализатор.
+
+    Работает только для чтения (GET/HEAD): ответы на запись всегда полные,
+    а сохраняемые объекты загружаются со всеми столбцами.
+    """
+
+    def get_sparse_fields(self) -> Optional[set[str]]:
+        if self.request.method not in SAFE_METHODS:
+            return None
+        return parse_names(self.request.query_params.get(FIELDS_QUERY_PARAM))
+
+    def get_expand(self) -> set[str]:
+        if self.request.method not in SAFE_METHODS:
+            return set()
+        return parse_names(self.request.query_params.get(EXPAND_QUERY_PARAM)) or set()
+
+    def wants_field(self, name: str) -> bool:
+        """Попадет ли поле в ответ при текущих ``fields`` и ``expand``."""
+        fields = self.get_sparse_fields()
+        return fields is None or name in fields or name in self.get_expand()
+
+    def restrict_columns(self, queryset: QuerySet) -> QuerySet:
+        """Ограничивает загружаемые столбцы запрошенными полями модели."""
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+        concrete = {field.name for field in queryset.model._meta.concrete_fields}
+        return queryset.only("pk", *sorted(fields & concrete))
+
+    def get_serializer(self, *args: Any, **kwargs: Any) -> Any:
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            kwargs.setdefault("fields", fields)
+            kwargs.setdefault("expand", self.get_expand())
+        return super().get_serializer(*args, **kwargs)
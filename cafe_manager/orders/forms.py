@@ -64,3 +64,41 @@ OrderItemFormSet = modelformset_factory(
     form=OrderItemForm,
     extra=1,
 )
+
+
+class OrderItemAdminForm(forms.ModelForm):
+    """
+    Форма позиции в админке.
+
+    Цена продажи (``unit_price``) не редактируется и берется из блюда при
+    сохранении, поэтому ограничение ``orderitem_order_dish_price_uniq``
+    проверяется здесь: иначе второе такое же блюдо в заказе падало бы
+    с IntegrityError вместо ошибки формы.
+    """
+
+    class Meta:
+        model = OrderItem
+        fields = "__all__"
+
+    def clean(self) -> dict[str, Any]:
+        cleaned_data = super().clean()
+        order, dish = cleaned_data.get("order"), cleaned_data.get("dish")
+        if order is None or dish is None:
+            return cleaned_data
+
+        # Та же цена, что выставит OrderItem.save
+        unit_price = self.instance.unit_price
+        if dish.pk != getattr(self.instance, "_snapshot_dish_id", None):
+            unit_price = dish.price
+
+        duplicates = (
+            OrderItem.objects.using(order._state.db)
+            .filter(order=order, dish=dish, unit_price=unit_price)
+            .exclude(pk=self.instance.pk)
+        )
+        if duplicates.exists():
+            raise forms.ValidationError(
+                "Это блюдо по этой цене уже есть в заказе, "
+                "измените количество существующей позиции"
+            )
+        return cleaned_data
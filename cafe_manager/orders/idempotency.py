@@ -0,0 +1,159 @@
+"""
+Поддержка заголовка Idempotency-Key для повторяемых POST-запросов API.
+
+Повтор запроса с тем же ключом возвращает сохраненный ответ и не выполняет
+работу заново. Вместе с ключом хранится отпечаток тела запроса: повтор
+ключа с другим телом отклоняется ``IdempotencyKeyMismatchError`` (422),
+а не получает чужой ответ. Ключ записывается в базу филиала запроса, в той
+же транзакции, что и изменения заказа, поэтому ответ сохраняется только
+вместе с результатом работы.
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .branches import get_branch_database, get_request_branch, order_databases
+from .exceptions import (
+    IdempotencyKeyInProgressError,
+    IdempotencyKeyMismatchError,
+    InvalidIdempotencyKeyError,
+)
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER: str = "Idempotency-Key"
+REPLAYED_HEADER: str = "Idempotent-Replayed"
+
+MAX_KEY_LENGTH: int = 255
+DEFAULT_TTL: int = 24 * 60 * 60
+
+ViewMethod = Callable[..., Response]
+
+
+def make_key_hash(request: Request, key: str) -> str:
+    """Хэширует ключ вместе с методом и путем, чтобы ключи не пересекались."""
+    raw = f"{request.method} {request.path} {key}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def make_request_hash(request: Request) -> str:
+    """
+    Отпечаток разобранного тела запроса.
+
+    Считается по ``request.data``, а не по сырым байтам, поэтому порядок
+    ключей и пробелы в JSON на отпечаток не влияют.
+    """
+    raw = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _lookup(key_hash: str, using: str) -> Optional[IdempotencyKey]:
+    try:
+        return IdempotencyKey.objects.using(using).get(key_hash=key_hash)
+    except IdempotencyKey.DoesNotExist:
+        return None
+
+
+def _replay(record: IdempotencyKey, request_hash: str) -> Response:
+    # Ключи, сохраненные до появления отпечатков, его не имеют
+    if record.request_hash and record.request_hash != request_hash:
+        raise IdempotencyKeyMismatchError()
+    response = Response(record.response_body, status=record.response_status)
+    response[REPLAYED_HEADER] = "true"
+    return response
+
+
+def idempotent(view_method: ViewMethod) -> ViewMethod:
+    """
+    Делает метод ViewSet идемпотентным по заголовку Idempotency-Key.
+
+    Должен применяться внутри транзакции базы филиала запроса (под
+    ``atomic_in_request_branch``): ключ хранится в той же базе, что и заказ.
+    Запросы без заголовка выполняются как обычно.
+
+    Raises:
+        InvalidIdempotencyKeyError: Если ключ слишком длинный
+        IdempotencyKeyInProgressError: Если запрос с тем же ключом не завершен
+        IdempotencyKeyMismatchError: Если ключ уже использован с другим телом
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+
+        if len(key) > MAX_KEY_LENGTH:
+            raise InvalidIdempotencyKeyError()
+
+        key_hash = make_key_hash(request, key)
+        request_hash = make_request_hash(request)
+        using = get_branch_database(get_request_branch(request))
+        record = _lookup(key_hash, using)
+        if record is not None:
+            if not record.is_expired():
+                return _replay(record, request_hash)
+            record.delete()
+
+        ttl = getattr(settings, "ORDERS_IDEMPOTENCY_TTL", DEFAULT_TTL)
+        try:
+            with transaction.atomic(using=using):
+                record = IdempotencyKey.objects.using(using).create(
+                    key_hash=key_hash,
+                    request_hash=request_hash,
+                    expires_at=timezone.now() + timedelta(seconds=ttl),
+                )
+        except IntegrityError:
+            # Параллельный запрос с тем же ключом успел завершиться первым
+            record = _lookup(key_hash, using)
+            if record is None or record.response_status is None:
+                raise IdempotencyKeyInProgressError()
+            return _replay(record, request_hash)
+
+        response = view_method(self, request, *args, **kwargs)
+
+        if response.status_code >= 500:
+            record.delete()
+        else:
+            record.response_status = response.status_code
+            record.response_body = response.data
+            record.save(update_fields=["response_status", "response_body"])
+        return response
+
+    return wrapper
+
+
+def prune_expired(batch_size: int = 1000) -> int:
+    """
+    Удаляет просроченные ключи всех баз заказов пачками, не блокируя таблицу
+    надолго.
+
+    Args:
+        batch_size (int): Количество ключей, удаляемых одним запросом
+
+    Returns:
+        int: Общее количество удаленных ключей
+    """
+    total = 0
+    for using in order_databases():
+        keys = IdempotencyKey.objects.using(using)
+        while True:
+            ids = list(
+                keys.filter(expires_at__lte=timezone.now()).values_list(
+                    "id", flat=True
+                )[:batch_size]
+            )
+            if not ids:
+                break
+            deleted, _ = keys.filter(id__in=ids).delete()
+            total += deleted
+    return total
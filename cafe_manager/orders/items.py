@@ -0,0 +1,187 @@
+"""
+Слияние повторяющихся блюд заказа в одну позицию.
+
+В заказе на каждое блюдо по одной цене продажи приходится одна строка
+``OrderItem`` (ограничение ``orderitem_order_dish_price_uniq``). «Еще один
+кофе» не создает новую строку, а увеличивает ``quantity`` существующей
+одним ``INSERT ... ON CONFLICT DO UPDATE`` (поддерживается PostgreSQL и
+SQLite). Если цена блюда с тех пор изменилась, добавляется новая строка:
+в каждой строке ``price = unit_price × quantity``, поэтому правка
+количества в форме не пересчитывает по новой цене уже проданное.
+
+Запрос выполняется в базе заказа (см. orders.branches), а филиал позиции
+копируется из заказа.
+
+Старые заказы с дублями объединяет команда ``compact_order_items``.
+"""
+
+from collections import Counter
+from typing import Iterable
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count
+from django.forms import BaseModelFormSet
+from django.utils import timezone
+
+from .models import Dish, Order, OrderItem
+
+# Поля строки позиции в порядке столбцов INSERT
+UPSERT_FIELDS: tuple[str, ...] = (
+    "order",
+    "dish",
+    "dish_name",
+    "unit_price",
+    "quantity",
+    "price",
+    "branch",
+)
+
+
+def merge_entries(entries: Iterable[tuple[Dish, int]]) -> dict[Dish, int]:
+    """Суммирует количество одинаковых блюд, сохраняя порядок появления."""
+    quantities: Counter[Dish] = Counter()
+    for dish, quantity in entries:
+        quantities[dish] += quantity
+    return dict(quantities)
+
+
+def add_order_items(order: Order, entries: Iterable[tuple[Dish, int]]) -> int:
+    """
+    Добавляет блюда в заказ, сливая их с уже имеющимися позициями.
+
+    Все блюда записываются одним запросом, после чего сумма заказа
+    пересчитывается один раз, а не после каждой позиции.
+
+    Args:
+        order (Order): Заказ
+        entries (Iterable[tuple[Dish, int]]): Пары (блюдо, количество)
+
+    Returns:
+        int: Количество затронутых позиций (разных блюд)
+    """
+    quantities = merge_entries(entries)
+    if not quantities:
+        return 0
+
+    using = order._state.db or DEFAULT_DB_ALIAS
+    db = connections[using]
+    fields = [OrderItem._meta.get_field(name) for name in UPSERT_FIELDS]
+    table = db.ops.quote_name(OrderItem._meta.db_table)
+    columns = {field.name: db.ops.quote_name(field.column) for field in fields}
+
+    params = []
+    for dish, quantity in quantities.items():
+        values = (
+            order.pk,
+            dish.pk,
+            dish.name,
+            dish.price,
+            quantity,
+            dish.price * quantity,
+            order.branch_id,
+        )
+        params.extend(
+            field.get_db_prep_save(value, db) for field, value in zip(fields, values)
+        )
+
+    row = "({})".format(", ".join(["%s"] * len(fields)))
+    sql = (
+        f"INSERT INTO {table} ({', '.join(columns.values())}) "
+        f"VALUES {', '.join([row] * len(quantities))} "
+        f"ON CONFLICT ({columns['order']}, {columns['dish']}, "
+        f"{columns['unit_price']}) DO UPDATE SET "
+        f"{columns['quantity']} = {table}.{columns['quantity']} "
+        f"+ EXCLUDED.{columns['quantity']}, "
+        f"{columns['price']} = {table}.{columns['price']} "
+        f"+ EXCLUDED.{columns['price']}"
+    )
+    with transaction.atomic(using=using):
+        with db.cursor() as cursor:
+            cursor.execute(sql, params)
+        order.update_total_price()
+    return len(quantities)
+
+
+def save_item_formset(order: Order, formset: BaseModelFormSet) -> None:
+    """
+    Сохраняет формсет позиций заказа со слиянием одинаковых блюд.
+
+    Позиции, у которых изменилось только количество, сохраняются как
+    обычно. Новые позиции и позиции со смененным блюдом добавляются через
+    ``add_order_items`` и сливаются с позицией того же блюда, если она есть.
+    """
+    items = formset.save(commit=False)
+    for item in formset.deleted_objects:
+        item.delete()
+
+    added = []
+    for item in items:
+        if item.pk is not None:
+            if item.dish_id == getattr(item, "_snapshot_dish_id", None):
+                item.save()
+                continue
+            # Блюдо сменили: старая строка удаляется, новое блюдо
+            # добавляется заново и может слиться с другой позицией
+            item.delete()
+        added.append((item.dish, item.quantity))
+    add_order_items(order, added)
+
+
+def compact_order_items(batch_size: int = 1000, using: str = DEFAULT_DB_ALIAS) -> int:
+    """
+    Объединяет дубли позиций (один заказ, одно блюдо, одна цена) в одну строку.
+
+    В строке с наименьшим ID суммируются ``quantity`` и ``price``, остальные
+    строки удаляются прямым DELETE без сигналов: итог заказа не меняется.
+    ``updated_at`` заказов сдвигается, чтобы терминалы и кэш деталей
+    получили новый состав позиций.
+
+    Args:
+        batch_size (int): Количество групп дублей в одной транзакции
+        using (str): База заказов (``default`` или база филиала)
+
+    Returns:
+        int: Количество удаленных строк
+    """
+    db = connections[using]
+    table = db.ops.quote_name(OrderItem._meta.db_table)
+    pk_column = db.ops.quote_name(OrderItem._meta.pk.column)
+    items = OrderItem.objects.using(using)
+    duplicates = (
+        items.values("order_id", "dish_id", "unit_price")
+        .annotate(rows=Count("id"))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    removed = 0
+    while True:
+        groups = list(
+            duplicates.values_list("order_id", "dish_id", "unit_price")[:batch_size]
+        )
+        if not groups:
+            return removed
+
+        with transaction.atomic(using=using):
+            for order_id, dish_id, unit_price in groups:
+                rows = list(
+                    items.filter(
+                        order_id=order_id, dish_id=dish_id, unit_price=unit_price
+                    )
+                    .order_by("id")
+                    .values_list("id", "quantity", "price")
+                )
+                items.filter(pk=rows[0][0]).update(
+                    quantity=sum(quantity for _, quantity, _ in rows),
+                    price=sum(price for _, _, price in rows),
+                )
+                extra = [pk for pk, _, _ in rows[1:]]
+                with db.cursor() as cursor:
+                    cursor.execute(
+                        f"DELETE FROM {table} WHERE {pk_column} "
+                        f"IN ({', '.join(['%s'] * len(extra))})",
+                        extra,
+                    )
+                removed += len(extra)
+            Order.all_objects.using(using).filter(
+                pk__in={order_id for order_id, _, _ in groups}
+            ).update(updated_at=timezone.now())
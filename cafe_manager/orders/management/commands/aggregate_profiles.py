@@ -0,0 +1,82 @@
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from orders.profiling import PROFILE_FILE_SUFFIX, get_profile_dir, read_collapsed
+
+
+class Command(BaseCommand):
+    help = (
+        "Объединяет дампы профилировщика в один файл collapsed stacks "
+        "для flamegraph.pl/speedscope"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--dir",
+            type=Path,
+            default=None,
+            help="Каталог с дампами (по умолчанию ORDERS_PROFILING_DIR)",
+        )
+        parser.add_argument(
+            "--view",
+            default=None,
+            help="Учитывать только дампы указанного представления",
+        )
+        parser.add_argument(
+            "--output",
+            type=Path,
+            default=None,
+            help="Файл результата (по умолчанию stdout)",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=0,
+            help="Вывести N функций с наибольшим собственным временем",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Удалить исходные дампы после объединения",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        directory = options["dir"] or get_profile_dir()
+        if not directory.is_dir():
+            raise CommandError(f"Каталог {directory} не найден")
+
+        pattern = f"{options['view'] or ''}*{PROFILE_FILE_SUFFIX}"
+        paths = sorted(directory.glob(pattern))
+
+        samples: Counter[str] = Counter()
+        for path in paths:
+            samples.update(read_collapsed(path))
+
+        collapsed = "".join(
+            f"{stack} {count}\n" for stack, count in sorted(samples.items())
+        )
+        if options["output"]:
+            options["output"].write_text(collapsed)
+        else:
+            self.stdout.write(collapsed, ending="")
+
+        if options["top"]:
+            self_time: Counter[str] = Counter()
+            for stack, count in samples.items():
+                self_time[stack.rsplit(";", 1)[-1]] += count
+            total = sum(samples.values())
+            for frame, count in self_time.most_common(options["top"]):
+                self.stderr.write(f"{count / total:7.2%} {count:8d}  {frame}")
+
+        if options["clear"]:
+            for path in paths:
+                path.unlink()
+
+        self.stderr.write(
+            self.style.SUCCESS(
+                f"Объединено файлов: {len(paths)}, выборок: {sum(samples.values())}"
+            )
+        )
@@ -0,0 +1,63 @@
+from datetime import date, timedelta
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils import timezone
+
+from orders.models import Branch
+from orders.reports import DEFAULT_CHUNK_SIZE, close_day
+
+
+class Command(BaseCommand):
+    help = (
+        "Закрывает день: строит и сохраняет Z-отчеты филиалов "
+        "(по умолчанию всех филиалов за вчера)"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--date",
+            type=date.fromisoformat,
+            help="День отчета в формате ГГГГ-ММ-ДД",
+        )
+        parser.add_argument(
+            "--branch",
+            type=int,
+            help="ID филиала; по умолчанию закрываются все филиалы",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Количество строк, читаемых из базы за раз",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        day = options["date"] or timezone.localdate() - timedelta(days=1)
+        if options["branch"] is not None:
+            if not Branch.objects.filter(pk=options["branch"]).exists():
+                raise CommandError(f"Филиал {options['branch']} не найден")
+            branch_ids = [options["branch"]]
+        else:
+            branch_ids = list(
+                Branch.objects.order_by("id").values_list("id", flat=True)
+            )
+
+        for branch_id in branch_ids:
+            try:
+                report, created = close_day(
+                    day, branch_id, chunk_size=options["chunk_size"]
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+
+            if not created:
+                self.stdout.write(
+                    self.style.WARNING(f"День {day.isoformat()} уже закрыт: {report}")
+                )
+                continue
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"День {day.isoformat()} закрыт для филиала {branch_id}"
+                )
+            )
@@ -0,0 +1,25 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from orders.branches import order_databases
+from orders.items import compact_order_items
+
+
+class Command(BaseCommand):
+    help = "Объединяет повторяющиеся позиции заказов (одно блюдо в одном заказе)"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Количество групп дублей в одной транзакции",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        removed = sum(
+            compact_order_items(batch_size=options["batch_size"], using=using)
+            for using in order_databases()
+        )
+        self.stdout.write(self.style.SUCCESS(f"Объединено лишних позиций: {removed}"))
@@ -0,0 +1,140 @@
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+TARGETS = {
+    "wsgi": "cafe_manager.wsgi",
+    "asgi": "cafe_manager.asgi",
+}
+
+# -X importtime видит только импорты через оператор import, а Django грузит
+# приложения, модели и URLconf через importlib.import_module. Поэтому в
+# дочернем процессе import_module перенаправляется на __import__, а после
+# импорта приложения загружается URLconf, как при первом запросе.
+BOOT_SCRIPT = """
+import importlib, sys
+_import_module = importlib.import_module
+def import_module(name, package=None):
+    if package is None:
+        __import__(name)
+        return sys.modules[name]
+    return _import_module(name, package)
+importlib.import_module = import_module
+import {module}
+from django.urls import get_resolver
+get_resolver().url_patterns
+"""
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+def parse_importtime(output: str) -> list[ImportRecord]:
+    """
+    Разбирает вывод ``python -X importtime``.
+
+    Args:
+        output (str): stderr процесса, запущенного с -X importtime
+
+    Returns:
+        list[ImportRecord]: Время импорта каждого модуля в микросекундах
+    """
+    records = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        records.append(
+            ImportRecord(
+                module=parts[2].strip(),
+                self_us=int(parts[0]),
+                cumulative_us=int(parts[1]),
+            )
+        )
+    return records
+
+
+class Command(BaseCommand):
+    help = "Измеряет холодный старт приложения и время импорта каждого модуля"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--target",
+            choices=sorted(TARGETS),
+            default="wsgi",
+            help="Какое приложение импортировать",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=25,
+            help="Количество самых медленных модулей в отчете",
+        )
+        parser.add_argument(
+            "--sort",
+            choices=["self", "cumulative"],
+            default="cumulative",
+            help="Сортировка модулей",
+        )
+        parser.add_argument(
+            "--prefix",
+            default=None,
+            help="Показывать только модули с этим префиксом (например, orders)",
+        )
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=3,
+            help="Количество холодных запусков для замера общего времени",
+        )
+
+    def _run(self, module: str, *flags: str) -> subprocess.CompletedProcess:
+        result = subprocess.run(
+            [sys.executable, *flags, "-c", BOOT_SCRIPT.format(module=module)],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        return result
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        module = TARGETS[options["target"]]
+
+        timings = []
+        for _ in range(options["runs"]):
+            started = time.perf_counter()
+            self._run(module)
+            timings.append(time.perf_counter() - started)
+
+        records = parse_importtime(self._run(module, "-X", "importtime").stderr)
+        if options["prefix"]:
+            records = [r for r in records if r.module.startswith(options["prefix"])]
+        key = "self_us" if options["sort"] == "self" else "cumulative_us"
+        records.sort(key=lambda r: getattr(r, key), reverse=True)
+
+        self.stdout.write(
+            f"Холодный старт {module}: "
+            f"min {min(timings) * 1000:.1f} мс, max {max(timings) * 1000:.1f} мс "
+            f"({options['runs']} запусков, DJANGO_ENV={settings.DJANGO_ENV})"
+        )
+        self.stdout.write(f"{'self, мс':>10} {'cumulative, мс':>15}  модуль")
+        for record in records[: options["top"]]:
+            self.stdout.write(
+                f"{record.self_us / 1000:10.1f} "
+                f"{record.cumulative_us / 1000:15.1f}  {record.module}"
+            )
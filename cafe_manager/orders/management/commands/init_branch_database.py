@@ -0,0 +1,53 @@
+from typing import Any
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from orders.branches import get_branch_database
+from orders.models import Branch, Order, OrderItem
+
+# Размер диапазона ID на филиал: заказы и позиции филиала N в отдельной базе
+# нумеруются с N × ID_BLOCK, поэтому их ID не пересекаются с другими базами
+ID_BLOCK: int = 10**12
+
+
+class Command(BaseCommand):
+    help = "Готовит отдельную базу филиала из ORDERS_BRANCH_DATABASES"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("branch_id", type=int, help="ID филиала")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        branch_id = options["branch_id"]
+        alias = get_branch_database(branch_id)
+        if alias == DEFAULT_DB_ALIAS:
+            raise CommandError(
+                f"Филиал {branch_id} хранится в {DEFAULT_DB_ALIAS}: "
+                "добавьте его в ORDERS_BRANCH_DATABASES"
+            )
+        try:
+            branch = Branch.objects.get(pk=branch_id)
+        except Branch.DoesNotExist:
+            raise CommandError(f"Филиал {branch_id} не найден")
+
+        call_command("migrate", database=alias, verbosity=0)
+        # Заказы ссылаются на филиал внешним ключом, поэтому строка филиала
+        # нужна и в его базе
+        branch.save(using=alias)
+
+        connection = connections[alias]
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                for model in (Order, OrderItem):
+                    table = model._meta.db_table
+                    quoted = connection.ops.quote_name(table)
+                    cursor.execute(
+                        "SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+                        f"GREATEST(%s, (SELECT COALESCE(MAX(id), 0) FROM {quoted})))",
+                        [table, branch_id * ID_BLOCK],
+                    )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"База {alias} филиала {branch.name} готова")
+        )
@@ -0,0 +1,38 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from orders.branches import order_databases
+from orders.tasks import process_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Выполняет отложенные задачи из outbox всех баз заказов, "
+        "которые не успел обработать пул"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=None,
+            help="Максимальное количество задач в каждой базе за запуск",
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=float,
+            default=300,
+            help="Через сколько секунд захваченная задача считается потерянной",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        processed = sum(
+            process_pending(
+                limit=options["limit"],
+                stale_after=options["stale_after"],
+                using=using,
+            )
+            for using in order_databases()
+        )
+        self.stdout.write(self.style.SUCCESS(f"Обработано задач: {processed}"))
@@ -0,0 +1,21 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from orders.idempotency import prune_expired
+
+
+class Command(BaseCommand):
+    help = "Удаляет просроченные ключи идемпотентности пачками"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Количество ключей, удаляемых одним запросом",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        deleted = prune_expired(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Удалено ключей: {deleted}"))
@@ -0,0 +1,21 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from orders.changes import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = "Удаляет отметки удаления заказов старше ORDERS_TOMBSTONE_TTL_DAYS"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Количество отметок, удаляемых одним запросом",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        deleted = prune_tombstones(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Удалено отметок: {deleted}"))
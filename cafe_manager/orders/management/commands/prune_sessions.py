@@ -0,0 +1,55 @@
+from importlib import import_module
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils import timezone
+
+
+def prune_expired_sessions(batch_size: int = 1000) -> int:
+    """
+    Удаляет просроченные сессии из базы пачками.
+
+    В отличие от ``clearsessions``, не удаляет все строки одним DELETE и не
+    блокирует надолго таблицу сессий, в которую продолжают писать запросы.
+
+    Args:
+        batch_size (int): Количество сессий, удаляемых одним запросом
+
+    Returns:
+        int: Общее количество удаленных сессий
+    """
+    engine = import_module(settings.SESSION_ENGINE)
+    get_model_class = getattr(engine.SessionStore, "get_model_class", None)
+    if get_model_class is None:
+        # cache и signed_cookies: сессии истекают сами
+        return 0
+
+    model = get_model_class()
+    total = 0
+    while True:
+        keys = list(
+            model.objects.filter(expire_date__lt=timezone.now()).values_list(
+                "session_key", flat=True
+            )[:batch_size]
+        )
+        if not keys:
+            return total
+        deleted, _ = model.objects.filter(session_key__in=keys).delete()
+        total += deleted
+
+
+class Command(BaseCommand):
+    help = "Удаляет просроченные сессии из базы пачками"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Количество сессий, удаляемых одним запросом",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        deleted = prune_expired_sessions(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Удалено сессий: {deleted}"))
@@ -0,0 +1,92 @@
+from datetime import timedelta
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from orders.branches import order_databases
+from orders.models import Order, OrderItem, OrderTombstone
+
+
+def purge_batch(order_ids: list[int], using: str = DEFAULT_DB_ALIAS) -> int:
+    """
+    Удаляет заказы и их позиции прямыми DELETE, минуя каскад ORM и сигналы.
+
+    Перед удалением для заказов пишутся отметки OrderTombstone, чтобы
+    терминалы со старым токеном синхронизации узнали об удалении. Отметки
+    всех филиалов хранятся в ``default``; транзакция ``default`` коммитится
+    раньше транзакции базы филиала, поэтому сбой между ними оставляет
+    лишнюю отметку, а не удаленный заказ без отметки.
+
+    Args:
+        order_ids (list[int]): ID мягко удаленных заказов
+        using (str): База, в которой лежат заказы
+
+    Returns:
+        int: Количество удаленных позиций
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    placeholders = ", ".join(["%s"] * len(order_ids))
+    with transaction.atomic(using=using), transaction.atomic():
+        OrderTombstone.objects.bulk_create(
+            OrderTombstone(order_id=pk, deleted_at=deleted_at, branch_id=branch_id)
+            for pk, deleted_at, branch_id in Order.all_objects.using(using)
+            .filter(id__in=order_ids)
+            .values_list("id", "deleted_at", "branch_id")
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {quote(OrderItem._meta.db_table)} "
+                f"WHERE order_id IN ({placeholders})",
+                order_ids,
+            )
+            items = cursor.rowcount
+            cursor.execute(
+                f"DELETE FROM {quote(Order._meta.db_table)} "
+                f"WHERE id IN ({placeholders})",
+                order_ids,
+            )
+    return items
+
+
+class Command(BaseCommand):
+    help = (
+        "Физически удаляет мягко удаленные заказы и их позиции пачками "
+        "во всех базах заказов"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=30,
+            help="Удалять заказы, помеченные удаленными раньше этого срока",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Количество заказов в одной транзакции",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        cutoff = timezone.now() - timedelta(days=options["older_than_days"])
+        orders = items = 0
+        for using in order_databases():
+            candidates = (
+                Order.all_objects.using(using).filter(deleted_at__lt=cutoff).order_by()
+            )
+            while True:
+                order_ids = list(
+                    candidates.values_list("id", flat=True)[: options["batch_size"]]
+                )
+                if not order_ids:
+                    break
+                items += purge_batch(order_ids, using)
+                orders += len(order_ids)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Удалено заказов: {orders}, позиций: {items}")
+        )
@@ -0,0 +1,77 @@
+import time
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils import timezone
+
+from orders.models import Branch
+from orders.receipt_render import FORMAT_PDF, FORMATS
+from orders.receipts import render_shift
+
+
+class Command(BaseCommand):
+    help = (
+        "Рендерит счета всех заказов смены параллельно на всех ядрах; счета "
+        "каждого филиала пишутся в свой каталог branch-<ID>"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--date",
+            type=date.fromisoformat,
+            help="День смены в формате ГГГГ-ММ-ДД, по умолчанию сегодня",
+        )
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            default=FORMAT_PDF,
+            help="Формат счетов",
+        )
+        parser.add_argument(
+            "--output",
+            type=Path,
+            default=Path("receipts"),
+            help="Каталог для файлов счетов",
+        )
+        parser.add_argument(
+            "--branch",
+            type=int,
+            help="ID филиала; по умолчанию все филиалы",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Количество процессов, по умолчанию по числу ядер",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        day = options["date"] or timezone.localdate()
+        fmt = options["format"]
+        output = options["output"] / day.isoformat()
+        branches = Branch.objects.order_by("id")
+        if options["branch"] is not None:
+            branches = branches.filter(pk=options["branch"])
+            if not branches.exists():
+                raise CommandError(f"Филиал {options['branch']} не найден")
+
+        started = time.perf_counter()
+        count = 0
+        # ID заказов в разных базах филиалов могут совпадать
+        for branch_id in branches.values_list("id", flat=True):
+            branch_output = output / f"branch-{branch_id}"
+            branch_output.mkdir(parents=True, exist_ok=True)
+            for order_id, document in render_shift(
+                day, fmt, branch_id, workers=options["workers"]
+            ):
+                (branch_output / f"order-{order_id}.{fmt}").write_bytes(document)
+                count += 1
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Счетов: {count} в {output} за {elapsed:.1f} с "
+                f"({count / elapsed if elapsed else 0:.0f} в секунду)"
+            )
+        )
@@ -0,0 +1,102 @@
+"""
+Снимок меню для POS-терминалов.
+
+Все меню отдается одним сжатым gzip JSON-документом. Документ строится
+один раз на версию меню и хранится в кэше; терминал проверяет актуальность
+по ETag, а изменения после известной ему версии получает из дельты.
+"""
+
+import gzip
+import json
+from dataclasses import dataclass
+from typing import Any
+
+from django.core.cache import cache
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Dish, DishTombstone, MenuState
+from .serializers import DishSerializer
+
+SNAPSHOT_CACHE_KEY: str = "orders:menu:snapshot:{version}"
+SNAPSHOT_CACHE_TIMEOUT: int = 24 * 60 * 60
+
+
+def make_etag(version: int, compressed: bool = True) -> str:
+    """Сильный ETag снимка; у сжатого и несжатого представлений он разный."""
+    return f'"menu-{version}{"-gzip" if compressed else ""}"'
+
+
+@dataclass(frozen=True)
+class MenuSnapshot:
+    """
+    Сжатый снимок меню определенной версии.
+
+    Attributes:
+        version (int): Версия меню
+        content (bytes): JSON-документ, сжатый gzip
+    """
+
+    version: int
+    content: bytes
+
+    def etag(self, compressed: bool = True) -> str:
+        return make_etag(self.version, compressed)
+
+    def decompressed(self) -> bytes:
+        return gzip.decompress(self.content)
+
+
+def _encode(payload: dict[str, Any]) -> bytes:
+    return json.dumps(
+        payload, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+def build_snapshot(version: int) -> MenuSnapshot:
+    """
+    Строит снимок меню версии ``version``.
+
+    Версия читается до блюд. Версии выдаются под блокировкой, поэтому все
+    изменения до ``version`` уже закоммичены и попадут в снимок; более
+    новые изменения, если попадут, терминал просто получит повторно из
+    дельты.
+    """
+    dishes = DishSerializer(Dish.objects.order_by("id"), many=True).data
+    content = gzip.compress(_encode({"version": version, "dishes": dishes}), mtime=0)
+    return MenuSnapshot(version=version, content=content)
+
+
+def get_snapshot() -> MenuSnapshot:
+    """Возвращает снимок текущей версии меню из кэша, строя его при промахе."""
+    version = MenuState.current()
+    key = SNAPSHOT_CACHE_KEY.format(version=version)
+
+    content = cache.get(key)
+    if content is not None:
+        return MenuSnapshot(version=version, content=content)
+
+    snapshot = build_snapshot(version)
+    cache.set(key, snapshot.content, SNAPSHOT_CACHE_TIMEOUT)
+    return snapshot
+
+
+def get_changes(since: int) -> dict[str, Any]:
+    """
+    Возвращает изменения меню после указанной версии.
+
+    Args:
+        since (int): Последняя версия, известная терминалу
+
+    Returns:
+        dict: Новая версия, измененные блюда и ID удаленных блюд
+    """
+    version = MenuState.current()
+    changed = DishSerializer(
+        Dish.objects.filter(version__gt=since).order_by("version"), many=True
+    ).data
+    deleted = list(
+        DishTombstone.objects.filter(version__gt=since)
+        .order_by("version")
+        .values_list("dish_id", flat=True)
+    )
+    return {"version": version, "changed": changed, "deleted": deleted}
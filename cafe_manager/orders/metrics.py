@@ -0,0 +1,319 @@
+"""
+Метрики заказов и представлений в формате Prometheus.
+
+Счетчики и гистограммы живут в памяти процесса и отдаются текстом на
+``/metrics/``. Запись рассчитана на горячий путь: значения меток
+создаются один раз и кэшируются, корзины гистограмм выделены заранее,
+а наблюдение — это поиск корзины ``bisect`` и два сложения под коротким
+неконкурентным замком метрики.
+
+При нескольких воркерах gunicorn у каждого процесса свои значения, а
+Prometheus при каждом опросе попадает в случайный воркер. Поэтому
+метрики предназначены для ``rate()`` и гистограммных квантилей, а не для
+точных абсолютных значений.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from datetime import datetime
+from typing import Callable, Optional
+
+from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
+
+CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+
+UNMATCHED_VIEW: str = "unmatched"
+OTHER_METHOD: str = "other"
+
+KNOWN_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Заказ живет от минут до нескольких часов
+DWELL_BUCKETS: tuple[float, ...] = (
+    30,
+    60,
+    120,
+    300,
+    600,
+    900,
+    1800,
+    3600,
+    7200,
+    14400,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(ABC):
+    """
+    Базовый класс метрики с метками.
+
+    Подклассы создают значение одного набора меток (``_new_child``) и
+    выводят его строки (``_collect_child``).
+
+    Attributes:
+        name (str): Имя метрики
+        documentation (str): Описание для строки ``# HELP``
+        labelnames (tuple[str]): Имена меток
+    """
+
+    kind: str = ""
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], object] = {}
+        self._create_lock = threading.Lock()
+        REGISTRY.append(self)
+
+    @abstractmethod
+    def _new_child(self) -> object:
+        """Создает значение метрики для нового набора меток."""
+
+    def labels(self, *values: str):
+        """Возвращает значение метрики для набора меток, создавая его один раз."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}: ожидаются метки {self.labelnames}")
+            with self._create_lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def clear(self) -> None:
+        with self._create_lock:
+            self._children.clear()
+
+    def collect(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._collect_child(values, child))
+        return lines
+
+    @abstractmethod
+    def _collect_child(self, values: tuple[str, ...], child: object) -> list[str]:
+        """Возвращает строки экспозиции для одного набора меток."""
+
+
+class CounterValue:
+    """Монотонный счетчик одного набора меток."""
+
+    __slots__ = ("value", "_lock")
+
+    def __init__(self) -> None:
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> CounterValue:
+        return CounterValue()
+
+    def inc(self, amount: int = 1) -> None:
+        """Увеличивает счетчик без меток."""
+        self.labels().inc(amount)
+
+    def _collect_child(self, values: tuple[str, ...], child: CounterValue) -> list[str]:
+        labels = _format_labels(self.labelnames, values)
+        return [f"{self.name}{labels} {child.value}"]
+
+
+class HistogramValue:
+    """
+    Гистограмма одного набора меток.
+
+    Attributes:
+        buckets (tuple[float]): Верхние границы корзин по возрастанию
+        counts (list[int]): Наблюдения в каждой корзине (последняя — +Inf)
+        sum (float): Сумма наблюдений
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> HistogramValue:
+        return HistogramValue(self.buckets)
+
+    def _collect_child(
+        self, values: tuple[str, ...], child: HistogramValue
+    ) -> list[str]:
+        with child._lock:
+            counts = list(child.counts)
+            total = child.sum
+
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            labels = _format_labels(
+                self.labelnames + ("le",), values + (_format_number(bound),)
+            )
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_number(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+REGISTRY: list[_Metric] = []
+
+ORDERS_CREATED = Counter("cafe_orders_created_total", "Созданные заказы")
+ORDER_STATUS_TRANSITIONS = Counter(
+    "cafe_order_status_transitions_total",
+    "Смены статуса заказа",
+    ("from_status", "to_status"),
+)
+ORDER_STATUS_DURATION = Histogram(
+    "cafe_order_status_duration_seconds",
+    "Время, проведенное заказом в статусе до его смены",
+    ("status",),
+    buckets=DWELL_BUCKETS,
+)
+REQUEST_LATENCY = Histogram(
+    "cafe_http_request_duration_seconds",
+    "Время обработки запроса по представлениям",
+    ("view", "method"),
+)
+
+
+def record_order_created() -> None:
+    ORDERS_CREATED.inc()
+
+
+def record_status_change(
+    old_status: str,
+    new_status: str,
+    created_at: Optional[datetime],
+    updated_at: Optional[datetime],
+) -> None:
+    """
+    Учитывает смену статуса заказа и время в предыдущем статусе.
+
+    Заказ создается в ``pending``, поэтому время ожидания считается от
+    ``created_at``. Для остальных статусов началом считается последнее
+    изменение заказа (``updated_at`` до смены статуса): после перехода в
+    ``ready`` заказ обычно уже не редактируют.
+
+    Args:
+        old_status (str): Статус до изменения
+        new_status (str): Новый статус
+        created_at (datetime, optional): Время создания заказа
+        updated_at (datetime, optional): Время изменения заказа до смены статуса
+    """
+    ORDER_STATUS_TRANSITIONS.labels(old_status, new_status).inc()
+
+    entered_at = created_at if old_status == "pending" else updated_at
+    if entered_at is not None:
+        dwell = (timezone.now() - entered_at).total_seconds()
+        ORDER_STATUS_DURATION.labels(old_status).observe(max(dwell, 0.0))
+
+
+def render() -> str:
+    """Возвращает все метрики в текстовом формате Prometheus."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+
+def clear() -> None:
+    """Сбрасывает значения всех метрик (для тестов)."""
+    for metric in REGISTRY:
+        metric.clear()
+
+
+class MetricsMiddleware:
+    """
+    Измеряет время обработки запросов.
+
+    Метка ``view`` берется из имени URL-маршрута, а нестандартные HTTP-методы
+    сводятся к ``other``, поэтому число рядов ограничено числом маршрутов,
+    а не числом разных путей.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        started = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = (match.view_name if match else None) or UNMATCHED_VIEW
+        method = request.method if request.method in KNOWN_METHODS else OTHER_METHOD
+        REQUEST_LATENCY.labels(view, method).observe(elapsed)
+        return response
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:06
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0002_alter_dish_options_alter_order_options_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=101)),
+                ("payload", models.JSONField(default=dict)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "В очереди"),
+                            ("running", "Выполняется"),
+                            ("failed", "Ошибка"),
+                        ],
+                        default="pending",
+                        max_length=21,
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("last_error", models.TextField(blank=True)),
+                (
+                    "available_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("locked_at", models.DateTimeField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Outbox Job",
+                "ordering": ("id",),
+                "indexes": [
+                    models.Index(
+                        fields=["status", "available_at"],
+                        name="orders_outb_status_16671e_idx",
+                    )
+                ],
+            },
+        ),
+    ]
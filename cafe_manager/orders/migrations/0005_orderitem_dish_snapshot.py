@@ -0,0 +1,55 @@
+from django.db import migrations, models
+from django.db.models import (
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Subquery,
+)
+
+
+def backfill_dish_snapshot(apps, schema_editor):
+    """
+    Заполняет снимок блюда у существующих позиций одним UPDATE.
+
+    Цена продажи восстанавливается из сохраненной стоимости позиции
+    (price / quantity); название блюда в истории не хранилось, поэтому
+    берется текущее.
+    """
+    Dish = apps.get_model("orders", "Dish")
+    OrderItem = apps.get_model("orders", "OrderItem")
+    dishes = Dish.objects.filter(pk=OuterRef("dish_id"))
+
+    OrderItem.objects.update(
+        dish_name=Subquery(dishes.values("name")[:1]),
+        unit_price=Subquery(dishes.values("price")[:1]),
+    )
+    OrderItem.objects.filter(quantity__gt=0).update(
+        unit_price=ExpressionWrapper(
+            F("price") / F("quantity"),
+            output_field=DecimalField(max_digits=11, decimal_places=2),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0004_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="orderitem",
+            name="dish_name",
+            field=models.CharField(editable=False, max_length=101, null=True),
+        ),
+        migrations.AddField(
+            model_name="orderitem",
+            name="unit_price",
+            field=models.DecimalField(
+                decimal_places=2, editable=False, max_digits=11, null=True
+            ),
+        ),
+        migrations.RunPython(backfill_dish_snapshot, migrations.RunPython.noop),
+    ]
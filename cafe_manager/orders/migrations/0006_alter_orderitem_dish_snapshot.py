@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0005_orderitem_dish_snapshot"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="orderitem",
+            name="dish_name",
+            field=models.CharField(editable=False, max_length=101),
+        ),
+        migrations.AlterField(
+            model_name="orderitem",
+            name="unit_price",
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=11),
+        ),
+    ]
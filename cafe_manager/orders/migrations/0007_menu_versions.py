@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0006_alter_orderitem_dish_snapshot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DishTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("dish_id", models.BigIntegerField()),
+                ("version", models.PositiveBigIntegerField(db_index=True)),
+            ],
+            options={
+                "verbose_name": "Dish Tombstone",
+            },
+        ),
+        migrations.CreateModel(
+            name="MenuState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("version", models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Menu State",
+            },
+        ),
+        migrations.AddField(
+            model_name="dish",
+            name="version",
+            field=models.PositiveBigIntegerField(
+                db_index=True, default=0, editable=False
+            ),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:19
+
+import django.db.models.manager
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0007_menu_versions"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="order",
+            options={
+                "base_manager_name": "all_objects",
+                "ordering": ("-id",),
+                "verbose_name": "Order",
+            },
+        ),
+        migrations.AlterModelManagers(
+            name="order",
+            managers=[
+                ("objects", django.db.models.manager.Manager()),
+                ("all_objects", django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="deleted_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", False)),
+                fields=["deleted_at"],
+                name="order_deleted_at_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,80 @@
+from django.db import migrations, models
+
+# Копия orders.search на момент миграции
+SEARCH_TEXT_SEPARATOR = " | "
+TRIGRAM_INDEX = "order_search_text_trgm_idx"
+
+
+def build_search_text(dish_names):
+    return SEARCH_TEXT_SEPARATOR.join(sorted({name.lower() for name in dish_names}))
+
+
+def backfill_search_text(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            """
+            UPDATE orders_order AS o
+            SET search_text = names.search_text
+            FROM (
+                SELECT order_id,
+                       string_agg(DISTINCT lower(dish_name), %s ORDER BY lower(dish_name))
+                           AS search_text
+                FROM orders_orderitem
+                GROUP BY order_id
+            ) AS names
+            WHERE names.order_id = o.id
+            """,
+            [SEARCH_TEXT_SEPARATOR],
+        )
+        return
+
+    Order = apps.get_model("orders", "Order")
+    OrderItem = apps.get_model("orders", "OrderItem")
+    names: dict[int, list[str]] = {}
+    for order_id, dish_name in OrderItem.objects.values_list(
+        "order_id", "dish_name"
+    ).iterator():
+        names.setdefault(order_id, []).append(dish_name)
+    for order_id, dish_names in names.items():
+        Order._base_manager.filter(pk=order_id).update(
+            search_text=build_search_text(dish_names)
+        )
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} "
+        "ON orders_order USING gin (search_text gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {TRIGRAM_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0008_order_soft_delete"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="search_text",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["table_number", "created_at"],
+                name="order_table_created_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
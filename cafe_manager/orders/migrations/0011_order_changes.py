@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0010_order_created_id_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrderTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("order_id", models.BigIntegerField()),
+                ("deleted_at", models.DateTimeField(db_index=True)),
+            ],
+            options={
+                "verbose_name": "Order Tombstone",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["updated_at"], name="order_updated_at_idx"),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:37
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_items(apps, schema_editor):
+    """
+    Сливает оставшиеся дубли позиций перед созданием ограничения.
+
+    На больших базах дубли стоит заранее объединить пачками командой
+    ``compact_order_items``: тогда миграция почти ничего не делает.
+    """
+    OrderItem = apps.get_model("orders", "OrderItem")
+    groups = (
+        OrderItem.objects.values("order_id", "dish_id")
+        .annotate(
+            rows=Count("id"),
+            first_id=Min("id"),
+            total_quantity=Sum("quantity"),
+            total_price=Sum("price"),
+        )
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for group in groups:
+        OrderItem.objects.filter(pk=group["first_id"]).update(
+            quantity=group["total_quantity"],
+            price=group["total_price"],
+        )
+        OrderItem.objects.filter(
+            order_id=group["order_id"], dish_id=group["dish_id"]
+        ).exclude(pk=group["first_id"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0011_order_changes"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="orderitem",
+            constraint=models.UniqueConstraint(
+                fields=("order", "dish"), name="orderitem_order_dish_uniq"
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0012_orderitem_order_dish_uniq"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyReport",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(unique=True)),
+                ("data", models.JSONField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Daily Report",
+                "ordering": ("-day",),
+            },
+        ),
+    ]
@@ -0,0 +1,109 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:48
+
+import django.db.models.deletion
+from django.core.management.color import no_style
+from django.db import migrations, models
+
+
+def create_default_branch(apps, schema_editor):
+    """
+    Создает филиал по умолчанию (ID 1), к которому относятся все заказы.
+
+    ID задается явно, поэтому последовательность таблицы сдвигается, чтобы
+    следующий филиал не получил тот же ID.
+    """
+    Branch = apps.get_model("orders", "Branch")
+    alias = schema_editor.connection.alias
+    Branch.objects.using(alias).get_or_create(
+        id=1, defaults={"name": "Основной", "code": "main"}
+    )
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [Branch]):
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0013_dailyreport"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Branch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=101)),
+                ("code", models.SlugField(max_length=31, unique=True)),
+            ],
+            options={
+                "verbose_name": "Branch",
+            },
+        ),
+        migrations.RunPython(create_default_branch, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="orderitem",
+            name="dish",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="orders.dish",
+            ),
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="branch",
+            field=models.ForeignKey(
+                default=1,
+                editable=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="orders",
+                to="orders.branch",
+            ),
+        ),
+        migrations.AddField(
+            model_name="orderitem",
+            name="branch",
+            field=models.ForeignKey(
+                default=1,
+                editable=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                to="orders.branch",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["branch", "created_at", "id"], name="order_branch_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["branch", "status", "created_at"],
+                name="order_branch_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["branch", "table_number", "created_at"],
+                name="order_branch_table_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="orderitem",
+            index=models.Index(
+                fields=["branch", "dish"], name="orderitem_branch_dish_idx"
+            ),
+        ),
+    ]
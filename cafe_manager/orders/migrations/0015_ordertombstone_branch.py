@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0014_branches"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ordertombstone",
+            name="branch",
+            field=models.ForeignKey(
+                default=1,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="orders.branch",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ordertombstone",
+            index=models.Index(
+                fields=["branch", "deleted_at"], name="tombstone_branch_deleted_idx"
+            ),
+        ),
+    ]
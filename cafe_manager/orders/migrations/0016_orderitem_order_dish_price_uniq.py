@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0015_ordertombstone_branch"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="orderitem",
+            name="orderitem_order_dish_uniq",
+        ),
+        migrations.AddConstraint(
+            model_name="orderitem",
+            constraint=models.UniqueConstraint(
+                fields=("order", "dish", "unit_price"),
+                name="orderitem_order_dish_price_uniq",
+            ),
+        ),
+    ]
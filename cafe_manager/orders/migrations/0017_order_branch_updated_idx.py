@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0016_orderitem_order_dish_price_uniq"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["branch", "updated_at", "id"], name="order_branch_updated_idx"
+            ),
+        ),
+        migrations.RemoveIndex(
+            model_name="order",
+            name="order_updated_at_idx",
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0017_order_branch_updated_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="idempotencykey",
+            name="request_hash",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:10
+
+from django.db import migrations
+
+
+def create_menu_state(apps, schema_editor):
+    """
+    Создает единственную строку версии меню (ID 1).
+
+    Строка нужна заранее: ``MenuState.bump`` блокирует ее через
+    ``select_for_update().get()``, а ``get_or_create`` под блокировкой
+    гонялся бы при первом изменении меню.
+    """
+    MenuState = apps.get_model("orders", "MenuState")
+    alias = schema_editor.connection.alias
+    MenuState.objects.using(alias).get_or_create(id=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0018_idempotencykey_request_hash"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_menu_state, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0019_menustate_row"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dailyreport",
+            name="branch",
+            field=models.ForeignKey(
+                default=1,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="orders.branch",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="dailyreport",
+            name="day",
+            field=models.DateField(),
+        ),
+        migrations.AddConstraint(
+            model_name="dailyreport",
+            constraint=models.UniqueConstraint(
+                fields=("branch", "day"), name="dailyreport_branch_day_uniq"
+            ),
+        ),
+    ]
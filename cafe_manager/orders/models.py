@@ -1,9 +1,15 @@
+from decimal import Decimal
+from functools import partial
 from typing import Any
-from django.db import models
-from django.db.models import Sum
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
 from django.dispatch import receiver
 from django.db.models.signals import post_save, post_delete
-from decimal import Decimal
+from django.utils import timezone
+
+from . import metrics
+from .branches import DEFAULT_BRANCH_ID, get_branch_database, reset_branch_ids
+from .search import build_search_text
 
 
 class Dish(models.Model):
@@ -13,6 +19,7 @@ class Dish(models.Model):
     Attributes:
         name (str): Название блюда, уникальное
         price (Decimal): Цена блюда
+        version (int): Версия меню, в которой блюдо последний раз менялось
     """
 
     class Meta:
@@ -26,11 +33,130 @@ class Dish(models.Model):
         max_digits=11,
         decimal_places=2,
     )
+    version = models.PositiveBigIntegerField(
+        default=0,
+        db_index=True,
+        editable=False,
+    )
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        with transaction.atomic():
+            self.version = MenuState.bump()
+            super().save(*args, **kwargs)
 
     def __str__(self) -> str:
         return self.name
 
 
+class MenuState(models.Model):
+    """
+    Текущая версия меню (единственная строка с ID 1, создается миграцией).
+
+    Версия увеличивается при каждом изменении или удалении блюда под
+    блокировкой строки, поэтому порядок версий совпадает с порядком
+    коммитов и терминалы не пропускают изменения при синхронизации.
+
+    Attributes:
+        version (int): Номер последней версии меню
+    """
+
+    class Meta:
+        verbose_name = "Menu State"
+
+    version = models.PositiveBigIntegerField(default=0)
+
+    @classmethod
+    def bump(cls) -> int:
+        """Увеличивает версию меню; должен вызываться внутри транзакции."""
+        state = cls.objects.select_for_update().get(pk=1)
+        state.version += 1
+        state.save(update_fields=["version"])
+        return state.version
+
+    @classmethod
+    def current(cls) -> int:
+        return cls.objects.filter(pk=1).values_list("version", flat=True).first() or 0
+
+
+class DishTombstone(models.Model):
+    """
+    Отметка об удаленном блюде для инкрементальной синхронизации меню.
+
+    Attributes:
+        dish_id (int): ID удаленного блюда
+        version (int): Версия меню, в которой блюдо удалено
+    """
+
+    class Meta:
+        verbose_name = "Dish Tombstone"
+
+    dish_id = models.BigIntegerField()
+    version = models.PositiveBigIntegerField(db_index=True)
+
+    def __str__(self) -> str:
+        return f"Блюдо {self.dish_id} удалено в версии {self.version}"
+
+
+@receiver(post_delete, sender=Dish)
+def record_dish_tombstone(sender, instance, **kwargs):
+    with transaction.atomic():
+        DishTombstone.objects.create(dish_id=instance.pk, version=MenuState.bump())
+
+
+class Branch(models.Model):
+    """
+    Филиал (отдельное кафе) в общей установке.
+
+    Attributes:
+        name (str): Название филиала
+        code (str): Короткий код филиала, уникальный
+    """
+
+    class Meta:
+        verbose_name = "Branch"
+
+    name = models.CharField(max_length=101)
+    code = models.SlugField(max_length=31, unique=True)
+
+    def __str__(self) -> str:
+        return self.name
+
+
+@receiver([post_save, post_delete], sender=Branch)
+def reset_branch_cache(sender, instance, **kwargs):
+    reset_branch_ids()
+
+
+class BranchQuerySet(models.QuerySet):
+    def for_branch(self, branch_id: int) -> "BranchQuerySet":
+        """Строки филиала из его базы (см. orders.branches)."""
+        return self.using(get_branch_database(branch_id)).filter(branch_id=branch_id)
+
+    def create(self, **kwargs: Any) -> models.Model:
+        """Без явного ``using()`` строка записывается в базу своего филиала."""
+        if self._db is not None:
+            return super().create(**kwargs)
+        # QuerySet.create передает в save() базу запроса, минуя роутер
+        # (orders.routers), поэтому объект сохраняется без нее
+        obj = self.model(**kwargs)
+        obj.save(force_insert=True)
+        return obj
+
+
+class OrderQuerySet(BranchQuerySet):
+    def soft_delete(self) -> int:
+        """Помечает заказы удаленными одним UPDATE, без каскада и сигналов."""
+        now = timezone.now()
+        return self.update(deleted_at=now, updated_at=now)
+
+
+class ActiveOrderManager(models.Manager.from_queryset(OrderQuerySet)):
+    """Менеджер по умолчанию: скрывает мягко удаленные заказы."""
+
+    def get_queryset(self) -> OrderQuerySet:
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Order(models.Model):
     """
     Модель заказа.
@@ -41,11 +167,46 @@ class Order(models.Model):
         total_price (Decimal): Общая стоимость заказа
         created_at (datetime): Время создания заказа
         updated_at (datetime): Время последнего обновления
+        deleted_at (datetime): Время мягкого удаления (None для активных)
+        search_text (str): Названия блюд заказа для поиска (см. orders.search)
+        branch (Branch): Филиал заказа
     """
 
     class Meta:
         verbose_name = "Order"
         ordering = ("-id",)
+        base_manager_name = "all_objects"
+        indexes = [
+            models.Index(
+                fields=["branch", "created_at", "id"],
+                name="order_branch_created_idx",
+            ),
+            models.Index(
+                fields=["branch", "status", "created_at"],
+                name="order_branch_status_idx",
+            ),
+            models.Index(
+                fields=["branch", "table_number", "created_at"],
+                name="order_branch_table_idx",
+            ),
+            models.Index(
+                fields=["table_number", "created_at"],
+                name="order_table_created_idx",
+            ),
+            models.Index(
+                fields=["created_at", "id"],
+                name="order_created_id_idx",
+            ),
+            models.Index(
+                fields=["branch", "updated_at", "id"],
+                name="order_branch_updated_idx",
+            ),
+            models.Index(
+                fields=["deleted_at"],
+                condition=models.Q(deleted_at__isnull=False),
+                name="order_deleted_at_idx",
+            ),
+        ]
 
     STATUS_CHOICES = [
         ("pending", "В ожидании"),
@@ -53,6 +214,13 @@ class Order(models.Model):
         ("paid", "Оплачено"),
     ]
 
+    # Допустимые переходы статуса: из ключа в любой из статусов значения
+    STATUS_TRANSITIONS: dict[str, list[str]] = {
+        "pending": ["ready", "paid"],
+        "ready": ["paid"],
+        "paid": [],
+    }
+
     table_number = models.PositiveIntegerField()
     status = models.CharField(
         max_length=21,
@@ -66,13 +234,90 @@ class Order(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    search_text = models.TextField(
+        blank=True,
+        default="",
+        editable=False,
+    )
+    branch = models.ForeignKey(
+        Branch,
+        related_name="orders",
+        on_delete=models.PROTECT,
+        default=DEFAULT_BRANCH_ID,
+        editable=False,
+    )
 
-    def update_total_price(self) -> None:
-        """Пересчитывает общую стоимость заказа на основе позиций."""
-        self.total_price = self.items.aggregate(total=Sum("price"))["total"] or Decimal(
-            "0.00"
+    objects = ActiveOrderManager()
+    all_objects = models.Manager.from_queryset(OrderQuerySet)()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get("status")
+        instance._loaded_updated_at = instance.__dict__.get("updated_at")
+        return instance
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        created = self._state.adding
+        old_status = getattr(self, "_loaded_status", None)
+        old_updated_at = getattr(self, "_loaded_updated_at", None)
+        super().save(*args, **kwargs)
+
+        # Метрики учитываются только после коммита: откаченный заказ или
+        # смена статуса не должны попасть в счетчики
+        using = self._state.db
+        if created:
+            transaction.on_commit(metrics.record_order_created, using=using)
+        elif old_status is not None and old_status != self.status:
+            transaction.on_commit(
+                partial(
+                    metrics.record_status_change,
+                    old_status,
+                    self.status,
+                    self.created_at,
+                    old_updated_at,
+                ),
+                using=using,
+            )
+        self._loaded_status = self.status
+        self._loaded_updated_at = self.updated_at
+
+    def soft_delete(self) -> None:
+        """Мягко удаляет заказ; позиции остаются до запуска purge_deleted_orders."""
+        now = timezone.now()
+        Order.all_objects.using(self._state.db).filter(pk=self.pk).update(
+            deleted_at=now, updated_at=now
         )
-        self.save()
+        self.deleted_at = self.updated_at = now
+
+    def update_total_price(self) -> None:
+        """
+        Пересчитывает общую стоимость и поисковый текст заказа по позициям.
+
+        Строка заказа блокируется до чтения позиций: параллельный пересчет
+        ждет коммита текущего и видит все его позиции, поэтому итог не
+        теряет одновременно добавленные позиции. Блокировка NO KEY UPDATE не
+        конфликтует с KEY SHARE, которую берут вставки позиций по внешнему
+        ключу, поэтому два потока, добавивших позиции, не ждут друг друга
+        по кругу. Сохраняются только пересчитанные поля, чтобы не затереть
+        статус, измененный параллельно.
+        """
+        with transaction.atomic(using=self._state.db):
+            list(
+                Order.all_objects.using(self._state.db)
+                .select_for_update(no_key=True)
+                .filter(pk=self.pk)
+                .values_list("pk", flat=True)
+            )
+            items = list(self.items.values_list("price", "dish_name"))
+            self.total_price = sum((price for price, _ in items), Decimal("0.00"))
+            self.search_text = build_search_text(name for _, name in items)
+            self.save(update_fields=["total_price", "search_text", "updated_at"])
 
     def get_total_items(self) -> int:
         return self.items.count()
@@ -84,6 +329,48 @@ class Order(models.Model):
         return f"Заказ {self.id} - Стол {self.table_number}"
 
 
+class OrderTombstone(models.Model):
+    """
+    Отметка о физически удаленном заказе для синхронизации терминалов.
+
+    Мягко удаленный заказ сам служит отметкой (``deleted_at`` и
+    ``updated_at``), поэтому отметки пишутся только при физическом
+    удалении: через ORM и командой ``purge_deleted_orders``.
+
+    Attributes:
+        order_id (int): ID удаленного заказа
+        deleted_at (datetime): Время удаления
+        branch (Branch): Филиал удаленного заказа
+    """
+
+    class Meta:
+        verbose_name = "Order Tombstone"
+        indexes = [
+            models.Index(
+                fields=["branch", "deleted_at"], name="tombstone_branch_deleted_idx"
+            ),
+        ]
+
+    order_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(db_index=True)
+    branch = models.ForeignKey(
+        Branch,
+        related_name="+",
+        on_delete=models.PROTECT,
+        default=DEFAULT_BRANCH_ID,
+    )
+
+    def __str__(self) -> str:
+        return f"Заказ {self.order_id} удален {self.deleted_at}"
+
+
+@receiver(post_delete, sender=Order)
+def record_order_tombstone(sender, instance, **kwargs):
+    OrderTombstone.objects.create(
+        order_id=instance.pk, deleted_at=timezone.now(), branch_id=instance.branch_id
+    )
+
+
 class OrderItem(models.Model):
     """
     Модель позиции в заказе.
@@ -91,12 +378,33 @@ class OrderItem(models.Model):
     Attributes:
         order (Order): Заказ, к которому относится позиция
         dish (Dish): Заказанное блюдо
+        dish_name (str): Название блюда на момент продажи
+        unit_price (Decimal): Цена блюда на момент продажи
         quantity (int): Количество
         price (Decimal): Общая стоимость позиции (цена × количество)
+        branch (Branch): Филиал заказа (копия ``order.branch`` для индексов)
+
+    Меню общее для всех филиалов и хранится в ``default``, поэтому ссылка на
+    блюдо не закреплена внешним ключом в базе: позиции филиала из отдельной
+    базы ссылаются на блюда основной. Название и цена хранятся в снимке.
+
+    Блюдо по одной цене встречается в заказе не более одного раза:
+    повторные добавления сливаются в существующую позицию (см. orders.items).
     """
 
     class Meta:
         verbose_name = "Order Item"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["order", "dish", "unit_price"],
+                name="orderitem_order_dish_price_uniq",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["branch", "dish"], name="orderitem_branch_dish_idx"),
+        ]
+
+    objects = BranchQuerySet.as_manager()
 
     order = models.ForeignKey(
         Order,
@@ -106,6 +414,16 @@ class OrderItem(models.Model):
     dish = models.ForeignKey(
         Dish,
         on_delete=models.CASCADE,
+        db_constraint=False,
+    )
+    dish_name = models.CharField(
+        max_length=101,
+        editable=False,
+    )
+    unit_price = models.DecimalField(
+        max_digits=11,
+        decimal_places=2,
+        editable=False,
     )
     quantity = models.PositiveIntegerField()
     price = models.DecimalField(
@@ -113,13 +431,34 @@ class OrderItem(models.Model):
         decimal_places=2,
         editable=False,
     )
+    branch = models.ForeignKey(
+        Branch,
+        on_delete=models.PROTECT,
+        default=DEFAULT_BRANCH_ID,
+        editable=False,
+    )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_dish_id = instance.__dict__.get("dish_id")
+        return instance
+
+    def snapshot_dish(self) -> None:
+        """Запоминает название и цену блюда на момент продажи."""
+        self.dish_name = self.dish.name
+        self.unit_price = self.dish.price
+        self._snapshot_dish_id = self.dish_id
 
     def calculate_price(self) -> Decimal:
-        """Рассчитывает стоимость позиции на основе цены блюда и количества."""
-        return self.dish.price * self.quantity
+        """Рассчитывает стоимость позиции по цене продажи и количеству."""
+        return self.unit_price * self.quantity
 
     def save(self, *args: Any, **kwargs: Any) -> None:
+        if self.dish_id != getattr(self, "_snapshot_dish_id", None):
+            self.snapshot_dish()
         self.price = self.calculate_price()
+        self.branch_id = self.order.branch_id
         super().save(*args, **kwargs)
         self.order.update_total_price()
 
@@ -128,9 +467,139 @@ class OrderItem(models.Model):
         self.order.update_total_price()
 
     def __str__(self) -> str:
-        return f"{self.quantity} × {self.dish.name} (Заказ {self.order.id})"
+        return f"{self.quantity} × {self.dish_name} (Заказ {self.order_id})"
 
 
 @receiver([post_save, post_delete], sender=OrderItem)
 def update_order_total(sender, instance, **kwargs):
     instance.order.update_total_price()
+
+
+class OutboxJob(models.Model):
+    """
+    Отложенная задача, выполняемая после коммита транзакции.
+
+    Attributes:
+        name (str): Имя зарегистрированной задачи
+        payload (dict): Аргументы задачи
+        status (str): Состояние задачи (ожидает/выполняется/ошибка)
+        attempts (int): Количество сделанных попыток
+        last_error (str): Текст последней ошибки
+        available_at (datetime): Время, раньше которого задачу не запускают
+        locked_at (datetime): Время захвата задачи воркером
+        created_at (datetime): Время постановки в очередь
+    """
+
+    class Meta:
+        verbose_name = "Outbox Job"
+        ordering = ("id",)
+        indexes = [
+            models.Index(fields=["status", "available_at"]),
+        ]
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "В очереди"),
+        (STATUS_RUNNING, "Выполняется"),
+        (STATUS_FAILED, "Ошибка"),
+    ]
+
+    name = models.CharField(max_length=101)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=21,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"{self.name} #{self.id} ({self.status})"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Сохраненный ответ на запрос с заголовком Idempotency-Key.
+
+    Attributes:
+        key_hash (str): SHA-256 от метода, пути и ключа клиента
+        request_hash (str): SHA-256 от тела запроса, выполненного с ключом
+        response_status (int): HTTP статус сохраненного ответа
+        response_body (Any): Тело сохраненного ответа
+        expires_at (datetime): Время, после которого ключ удаляется
+    """
+
+    class Meta:
+        verbose_name = "Idempotency Key"
+
+    key_hash = models.CharField(
+        max_length=64,
+        unique=True,
+    )
+    request_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+    )
+    response_status = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(
+        null=True,
+        encoder=DjangoJSONEncoder,
+    )
+    expires_at = models.DateTimeField(db_index=True)
+
+    def is_expired(self) -> bool:
+        return self.expires_at <= timezone.now()
+
+    def __str__(self) -> str:
+        return f"{self.key_hash[:12]} ({self.response_status})"
+
+
+class DailyReport(models.Model):
+    """
+    Z-отчет закрытого дня (см. orders.reports).
+
+    Отчет неизменяем: после создания строка не перезаписывается. День
+    закрывается отдельно для каждого филиала; отчеты всех филиалов хранятся
+    в ``default``.
+
+    Attributes:
+        branch (Branch): Филиал отчета
+        day (date): День отчета
+        data (dict): Отчет в колоночном JSON
+        created_at (datetime): Время закрытия дня
+    """
+
+    class Meta:
+        verbose_name = "Daily Report"
+        ordering = ("-day",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["branch", "day"], name="dailyreport_branch_day_uniq"
+            ),
+        ]
+
+    branch = models.ForeignKey(
+        Branch,
+        related_name="+",
+        on_delete=models.PROTECT,
+        default=DEFAULT_BRANCH_ID,
+    )
+    day = models.DateField()
+    data = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        if not self._state.adding:
+            raise ValueError("Z-отчет закрытого дня нельзя изменить")
+        super().save(*args, **kwargs)
+
+    def __str__(self) -> str:
+        return f"Z-отчет за {self.day} (филиал {self.branch_id})"
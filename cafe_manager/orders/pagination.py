@@ -0,0 +1,216 @@
+"""
+Постраничная выдача заказов в API.
+
+По умолчанию используются номера страниц (``?page=``). Курсорный режим
+включается параметром ``?pagination=cursor`` или передачей ``?cursor=``:
+страница выбирается условием ``WHERE id < последний_id`` по индексу, поэтому
+время ответа не зависит от глубины, а вставки новых заказов не сдвигают
+страницы. Порядок задается ``?ordering=`` (``-id`` по умолчанию, ``id``,
+``-created_at``, ``created_at``).
+
+Для синхронизации клиент листает по ``ordering=id`` и сохраняет поле
+``resume``: курсор после последнего полученного заказа, который выдается
+и на последней странице, когда ``next`` пуст. Запрос с этим курсором
+позже вернет только заказы, созданные после него.
+
+В режиме номеров страниц ``count`` больших выборок берется из оценок
+планировщика PostgreSQL, а не из ``COUNT(*)`` (см. ``estimated_count``).
+"""
+
+import json
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.pagination import Cursor, CursorPagination, PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+PAGINATION_QUERY_PARAM: str = "pagination"
+CURSOR_MODE: str = "cursor"
+
+DEFAULT_MAX_PAGE_SIZE: int = 100
+
+# Ниже этого числа строк оценка неточна, а точный COUNT дешев
+DEFAULT_ESTIMATE_THRESHOLD: int = 10_000
+
+# Допустимые значения ?ordering= и соответствующие порядки сортировки;
+# id добавлен вторым ключом, чтобы порядок был однозначным
+CURSOR_ORDERINGS: dict[str, tuple[str, ...]] = {
+    "-id": ("-id",),
+    "id": ("id",),
+    "-created_at": ("-created_at", "-id"),
+    "created_at": ("created_at", "id"),
+}
+
+
+def get_max_page_size() -> int:
+    return getattr(settings, "ORDERS_MAX_PAGE_SIZE", DEFAULT_MAX_PAGE_SIZE)
+
+
+def get_estimate_threshold() -> int:
+    return getattr(
+        settings, "ORDERS_COUNT_ESTIMATE_THRESHOLD", DEFAULT_ESTIMATE_THRESHOLD
+    )
+
+
+def estimate_table_rows(queryset: QuerySet) -> Optional[int]:
+    """
+    Оценка числа строк таблицы из статистики планировщика PostgreSQL.
+
+    Returns:
+        int, optional: ``pg_class.reltuples`` или None, если таблица еще не
+        анализировалась
+    """
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+def estimate_query_rows(queryset: QuerySet) -> Optional[int]:
+    """Оценка числа строк фильтрованного QuerySet по плану ``EXPLAIN``."""
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    rows = plan[0]["Plan"].get("Plan Rows")
+    return int(rows) if rows is not None else None
+
+
+def is_unfiltered(queryset: QuerySet) -> bool:
+    """Нет ли у QuerySet условий сверх условий менеджера по умолчанию."""
+    base = queryset.model._default_manager.all()
+    return str(queryset.query.where) == str(base.query.where)
+
+
+def estimated_count(queryset: QuerySet) -> tuple[int, bool]:
+    """
+    Число строк QuerySet: оценка планировщика для больших выборок, иначе COUNT.
+
+    Для нефильтрованной таблицы берется ``pg_class.reltuples`` (он учитывает
+    и строки, скрытые менеджером по умолчанию, например мягко удаленные
+    заказы), для фильтрованной — оценка ``EXPLAIN``. Если оценка меньше
+    порога ``ORDERS_COUNT_ESTIMATE_THRESHOLD`` или база не PostgreSQL,
+    выполняется точный COUNT.
+
+    Returns:
+        tuple[int, bool]: Число строк и признак того, что оно приблизительное
+    """
+    if connections[queryset.db].vendor == "postgresql":
+        if is_unfiltered(queryset):
+            estimate = estimate_table_rows(queryset)
+        else:
+            estimate = estimate_query_rows(queryset)
+        if estimate is not None and estimate >= get_estimate_threshold():
+            return estimate, True
+    return queryset.count(), False
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator, не выполняющий COUNT(*) по большим выборкам.
+
+    Attributes:
+        count_is_approximate (bool): Получено ли ``count`` из оценки
+    """
+
+    count_is_approximate: bool = False
+
+    @cached_property
+    def count(self) -> int:
+        if not isinstance(self.object_list, QuerySet):
+            return super().count
+        count, self.count_is_approximate = estimated_count(self.object_list)
+        return count
+
+
+class ApproximateCountPagination(PageNumberPagination):
+    """
+    Пагинация номерами страниц с приблизительным ``count`` для больших выборок.
+
+    В ответ добавляется ``count_approximate``. При приблизительном числе
+    последняя страница может оказаться пустой или не последней; для обхода
+    всей выборки используйте курсорный режим.
+    """
+
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data: Any) -> Response:
+        response = super().get_paginated_response(data)
+        response.data["count_approximate"] = self.page.paginator.count_is_approximate
+        return response
+
+
+class OrderCursorPagination(CursorPagination):
+    """Курсорная пагинация заказов с выбором порядка и курсором возобновления."""
+
+    ordering = CURSOR_ORDERINGS["-id"]
+    page_size_query_param = "page_size"
+
+    def __init__(self) -> None:
+        self.max_page_size = get_max_page_size()
+
+    def get_ordering(
+        self, request: Request, queryset: QuerySet, view: Any
+    ) -> tuple[str, ...]:
+        return CURSOR_ORDERINGS.get(request.query_params.get("ordering"), self.ordering)
+
+    def get_resume_link(self) -> Optional[str]:
+        """Курсор сразу после последнего заказа страницы."""
+        if not self.page:
+            # Новых заказов нет: клиент продолжит с того же места
+            return self.encode_cursor(self.cursor) if self.cursor else self.base_url
+        position = self._get_position_from_instance(self.page[-1], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_paginated_response(self, data: Any) -> Response:
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "resume": self.get_resume_link(),
+                "results": data,
+            }
+        )
+
+
+class OrderPagination(ApproximateCountPagination):
+    """
+    Пагинация заказов: номера страниц или курсор (см. описание модуля).
+
+    Размер страницы задается ``?page_size=`` и ограничен настройкой
+    ``ORDERS_MAX_PAGE_SIZE``.
+    """
+
+    page_size_query_param = "page_size"
+
+    def __init__(self) -> None:
+        self.max_page_size = get_max_page_size()
+        self.cursor_paginator: Optional[OrderCursorPagination] = None
+
+    @staticmethod
+    def wants_cursor(request: Request) -> bool:
+        params = request.query_params
+        return (
+            params.get(PAGINATION_QUERY_PARAM) == CURSOR_MODE
+            or OrderCursorPagination.cursor_query_param in params
+        )
+
+    def paginate_queryset(
+        self, queryset: QuerySet, request: Request, view: Any = None
+    ) -> Optional[list]:
+        if self.wants_cursor(request):
+            self.cursor_paginator = OrderCursorPagination()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data: Any) -> Response:
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,180 @@
+"""
+Выборочный профилировщик представлений заказов.
+
+Профилирование включается настройкой ``ORDERS_PROFILING_ENABLED`` и
+срабатывает для запроса с заголовком ``X-Profile`` либо для случайной доли
+запросов ``ORDERS_PROFILING_SAMPLE_RATE``. Заголовок учитывается только от
+сотрудника (``is_staff``) или со значением общего секрета
+``ORDERS_PROFILING_SECRET``: иначе любой клиент мог бы замедлять и
+профилировать запросы по своему желанию. Во время запроса отдельный поток
+периодически снимает стек потока обработчика; результат пишется в формате
+collapsed stacks (``frame;frame;frame count``), который понимают
+flamegraph.pl, speedscope и inferno. Файлы объединяет команда
+``aggregate_profiles``.
+"""
+
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Any, Optional
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+PROFILE_HEADER: str = "X-Profile"
+PROFILE_FILE_SUFFIX: str = ".collapsed"
+
+DEFAULT_INTERVAL: float = 0.001
+
+
+def _frame_label(frame: FrameType) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{frame.f_code.co_qualname}".replace(";", ":")
+
+
+class SamplingProfiler:
+    """
+    Сэмплирующий профилировщик одного потока.
+
+    Attributes:
+        name (str): Корневая метка стеков (обычно имя представления)
+        interval (float): Период снятия стека в секундах
+        samples (Counter): Количество попаданий каждого свернутого стека
+    """
+
+    def __init__(self, name: str, interval: float = DEFAULT_INTERVAL) -> None:
+        self.name = name
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._target_id: Optional[int] = None
+        self._root: Optional[FrameType] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Начинает снимать стеки текущего потока ниже вызывающей функции."""
+        self._start(sys._getframe(1))
+
+    def _start(self, root: FrameType) -> None:
+        self._target_id = threading.get_ident()
+        self._root = root
+        self._thread = threading.Thread(
+            target=self._run, name="orders-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._root = None
+
+    def __enter__(self) -> "SamplingProfiler":
+        self._start(sys._getframe(1))
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target_id)
+            if frame is not None:
+                self._sample(frame)
+
+    def _sample(self, frame: FrameType) -> None:
+        stack = []
+        current: Optional[FrameType] = frame
+        while current is not None and current is not self._root:
+            stack.append(_frame_label(current))
+            current = current.f_back
+        stack.append(self.name)
+        self.samples[";".join(reversed(stack))] += 1
+
+    def dump(self, directory: Path) -> Optional[Path]:
+        """
+        Записывает собранные стеки в файл формата collapsed stacks.
+
+        Args:
+            directory (Path): Каталог для файлов профилей
+
+        Returns:
+            Optional[Path]: Путь к файлу или None, если выборок нет
+        """
+        if not self.samples:
+            return None
+
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / (
+            f"{self.name}-{time.time_ns()}-{os.getpid()}{PROFILE_FILE_SUFFIX}"
+        )
+        path.write_text(
+            "".join(f"{stack} {count}\n" for stack, count in self.samples.items())
+        )
+        return path
+
+
+def _may_request_profile(request: HttpRequest) -> bool:
+    """Проверяет, вправе ли клиент включить профилирование заголовком."""
+    user = getattr(request, "user", None)
+    if user is not None and user.is_staff:
+        return True
+    secret = getattr(settings, "ORDERS_PROFILING_SECRET", "")
+    return bool(secret) and hmac.compare_digest(
+        request.headers[PROFILE_HEADER].encode(), secret.encode()
+    )
+
+
+def should_profile(request: HttpRequest) -> bool:
+    """Решает, профилировать ли запрос; при выключенной настройке — сразу нет."""
+    if not getattr(settings, "ORDERS_PROFILING_ENABLED", False):
+        return False
+    if PROFILE_HEADER in request.headers and _may_request_profile(request):
+        return True
+    return random.random() < getattr(settings, "ORDERS_PROFILING_SAMPLE_RATE", 0)
+
+
+def get_profile_dir() -> Path:
+    return Path(
+        getattr(settings, "ORDERS_PROFILING_DIR", settings.BASE_DIR / "profiles")
+    )
+
+
+def read_collapsed(path: Path) -> Counter[str]:
+    """Читает файл collapsed stacks в счетчик стеков."""
+    samples: Counter[str] = Counter()
+    for line in path.read_text().splitlines():
+        stack, _, count = line.rpartition(" ")
+        if stack and count.isdigit():
+            samples[stack] += int(count)
+    return samples
+
+
+class ProfiledViewMixin:
+    """
+    Примесь к представлениям (Django CBV и DRF), профилирующая dispatch.
+
+    Ответ рендерится внутри профилируемого участка, поэтому в стеки попадает
+    время шаблонов и рендереров DRF, а не только логика представления.
+    """
+
+    def dispatch(self, request: HttpRequest, *args: Any, **kwargs: Any) -> Any:
+        if not should_profile(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        profiler = SamplingProfiler(
+            type(self).__name__,
+            interval=getattr(settings, "ORDERS_PROFILING_INTERVAL", DEFAULT_INTERVAL),
+        )
+        with profiler:
+            response: HttpResponse = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, "render") and not response.is_rendered:
+                response.render()
+        profiler.dump(get_profile_dir())
+        return response
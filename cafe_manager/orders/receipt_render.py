@@ -0,0 +1,117 @@
+"""
+Рендеринг счетов в текст и PDF.
+
+Модуль выполняется в дочерних процессах пула (см. orders.receipts) и не
+импортирует Django: на вход приходит готовый словарь счета из простых
+типов, на выходе — байты документа. Поэтому процессу пула не нужны ни
+настройки, ни соединение с базой.
+
+Счет (``bill``)::
+
+    {"title": "Заказ 7", "table_number": 3, "created_at": "18.10.2026 19:05",
+     "lines": [["Суп", 2, "250.00", "500.00"], ...], "total": "500.00"}
+"""
+
+import io
+from typing import Any, Optional
+
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+FORMAT_TEXT: str = "txt"
+FORMAT_PDF: str = "pdf"
+FORMATS: tuple[str, ...] = (FORMAT_TEXT, FORMAT_PDF)
+
+# Ширина чековой ленты в символах и в миллиметрах
+TEXT_WIDTH: int = 40
+PAPER_WIDTH: float = 80 * mm
+
+FONT_SIZE: int = 8
+LINE_HEIGHT: float = 4.5 * mm
+MARGIN: float = 5 * mm
+
+# Встроенный шрифт PDF без кириллицы; используется, если TTF не найден
+FALLBACK_FONT: str = "Courier"
+RECEIPT_FONT: str = "Receipt"
+
+_registered_fonts: dict[str, str] = {}
+
+
+def _text_lines(bill: dict[str, Any]) -> list[str]:
+    """Строки счета фиксированной ширины; общие для текста и PDF."""
+    rule = "-" * TEXT_WIDTH
+    lines = [
+        bill["title"].center(TEXT_WIDTH),
+        f"Стол {bill['table_number']}".center(TEXT_WIDTH),
+        bill["created_at"].center(TEXT_WIDTH),
+        rule,
+    ]
+    for name, quantity, unit_price, price in bill["lines"]:
+        lines.append(name[:TEXT_WIDTH])
+        detail = f"  {quantity} × {unit_price}"
+        lines.append(detail + price.rjust(TEXT_WIDTH - len(detail)))
+    lines.append(rule)
+    label = "ИТОГО"
+    lines.append(label + bill["total"].rjust(TEXT_WIDTH - len(label)))
+    return lines
+
+
+def render_text(bill: dict[str, Any]) -> bytes:
+    """Счет для чекового принтера в UTF-8."""
+    return ("\n".join(_text_lines(bill)) + "\n").encode()
+
+
+def _font(font_path: Optional[str]) -> str:
+    """Регистрирует TTF-шрифт один раз на процесс; иначе встроенный шрифт."""
+    if not font_path:
+        return FALLBACK_FONT
+    if font_path not in _registered_fonts:
+        try:
+            name = f"{RECEIPT_FONT}{len(_registered_fonts)}"
+            pdfmetrics.registerFont(TTFont(name, font_path))
+        except Exception:
+            name = FALLBACK_FONT
+        _registered_fonts[font_path] = name
+    return _registered_fonts[font_path]
+
+
+def render_pdf(bill: dict[str, Any], font_path: Optional[str] = None) -> bytes:
+    """
+    Счет в PDF на ленту шириной 80 мм; высота страницы по числу строк.
+
+    Args:
+        bill (dict): Данные счета
+        font_path (str, optional): Путь к моноширинному TTF с кириллицей
+
+    Returns:
+        bytes: Документ PDF
+    """
+    lines = _text_lines(bill)
+    height = 2 * MARGIN + LINE_HEIGHT * len(lines)
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=(PAPER_WIDTH, height), pageCompression=1)
+    pdf.setTitle(bill["title"])
+    text = pdf.beginText(MARGIN, height - MARGIN - FONT_SIZE)
+    text.setFont(_font(font_path), FONT_SIZE, leading=LINE_HEIGHT)
+    for line in lines:
+        text.textLine(line)
+    pdf.drawText(text)
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def render(bill: dict[str, Any], fmt: str, font_path: Optional[str] = None) -> bytes:
+    """
+    Рендерит счет в заданном формате; точка входа для процессов пула.
+
+    Raises:
+        ValueError: Если формат не поддерживается
+    """
+    if fmt == FORMAT_TEXT:
+        return render_text(bill)
+    if fmt == FORMAT_PDF:
+        return render_pdf(bill, font_path)
+    raise ValueError(f"Неизвестный формат счета '{fmt}'")
@@ -0,0 +1,370 @@
+"""
+Счета по заказу и по столику (текст и PDF).
+
+Данные счета собираются в процессе Django, а сам документ рендерится в
+пуле процессов (orders.receipt_render), поэтому формирование PDF не
+занимает воркер сервера. Пул ограничен: одновременно в нем ждут не больше
+``2 × ORDERS_RECEIPTS_WORKERS`` счетов, а запрос, не дождавшийся места за
+``ORDERS_RECEIPTS_QUEUE_TIMEOUT`` секунд или рендера за
+``ORDERS_RECEIPTS_RENDER_TIMEOUT`` секунд, получает ``ReceiptsBusyError``.
+Место в очереди освобождается только по завершении рендера, поэтому
+зависший счет не дает пулу набрать новых задач сверх лимита.
+
+Пул свой у каждого процесса сервера: всего процессов рендеринга
+``ORDERS_RECEIPTS_WORKERS × GUNICORN_WORKERS``, что нужно учитывать при
+выборе числа ядер и памяти контейнера.
+
+Счета строятся по заказам одного филиала (см. orders.branches): номера
+столиков в разных филиалах совпадают.
+
+Готовые счета кэшируются. Ключ счета заказа — его ``updated_at``, ключ
+счета столика — филиал, ID и ``updated_at`` всех неоплаченных заказов
+столика, поэтому любое изменение состава выдает новый счет без явной
+инвалидации.
+
+Пакетный режим (``render_shift``, команда ``render_receipts``) рендерит все
+счета смены параллельно на всех ядрах.
+"""
+
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import repeat
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from . import metrics
+from .branches import DEFAULT_BRANCH_ID
+from .models import Order, OrderItem
+from .receipt_render import FORMATS, render
+from .reports import day_bounds
+
+DEFAULT_WORKERS: int = 2
+DEFAULT_QUEUE_TIMEOUT: float = 5.0
+DEFAULT_RENDER_TIMEOUT: float = 30.0
+DEFAULT_CACHE_TIMEOUT: int = 24 * 60 * 60
+DEFAULT_FONT: str = "/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf"
+DEFAULT_CHUNK_SIZE: int = 500
+
+CACHE_KEY: str = "orders:receipt:{branch}:{kind}:{key}:{version}:{fmt}"
+
+ITEMS = Prefetch("items", queryset=OrderItem.objects.order_by("id"))
+
+KIND_ORDER: str = "order"
+KIND_TABLE: str = "table"
+
+# Статусы заказов, которые входят в счет столика
+UNPAID_STATUSES: tuple[str, ...] = ("pending", "ready")
+
+# Процессы пула запускаются через spawn: fork многопоточного воркера
+# сервера может унаследовать захваченные блокировки
+START_METHOD: str = "spawn"
+
+RECEIPTS = metrics.Counter(
+    "cafe_receipts_total",
+    "Выданные счета",
+    ("format", "result"),
+)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_slots: Optional[threading.BoundedSemaphore] = None
+_pool_lock = threading.Lock()
+
+
+class ReceiptsBusyError(Exception):
+    """Пул рендеринга переполнен или не успел; запрос стоит повторить позже."""
+
+
+def get_workers() -> int:
+    return getattr(settings, "ORDERS_RECEIPTS_WORKERS", DEFAULT_WORKERS)
+
+
+def get_font() -> Optional[str]:
+    font = getattr(settings, "ORDERS_RECEIPTS_FONT", DEFAULT_FONT)
+    return str(font) if font and os.path.exists(font) else None
+
+
+def get_pool() -> tuple[ProcessPoolExecutor, threading.BoundedSemaphore]:
+    """Возвращает пул процессов и семафор очереди, создавая их при первом вызове."""
+    global _pool, _slots
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _slots = threading.BoundedSemaphore(2 * get_workers())
+                _pool = ProcessPoolExecutor(
+                    max_workers=get_workers(),
+                    mp_context=multiprocessing.get_context(START_METHOD),
+                )
+    return _pool, _slots
+
+
+def shutdown_pool() -> None:
+    """Останавливает пул; следующий счет создаст новый."""
+    global _pool, _slots
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+        _pool = _slots = None
+
+
+def render_in_pool(bill: dict[str, Any], fmt: str) -> bytes:
+    """
+    Рендерит счет в пуле процессов.
+
+    Args:
+        bill (dict): Данные счета
+        fmt (str): Формат (txt/pdf)
+
+    Returns:
+        bytes: Документ
+
+    Raises:
+        ReceiptsBusyError: Если место в очереди не освободилось вовремя или
+            рендер не уложился в ``ORDERS_RECEIPTS_RENDER_TIMEOUT``
+    """
+    if getattr(settings, "ORDERS_RECEIPTS_EAGER", False):
+        return render(bill, fmt, get_font())
+
+    pool, slots = get_pool()
+    timeout = getattr(settings, "ORDERS_RECEIPTS_QUEUE_TIMEOUT", DEFAULT_QUEUE_TIMEOUT)
+    if not slots.acquire(timeout=timeout):
+        raise ReceiptsBusyError()
+    try:
+        future = pool.submit(render, bill, fmt, get_font())
+    except BrokenProcessPool:
+        slots.release()
+        shutdown_pool()
+        raise
+    # Место освобождается, когда процесс закончит работу, а не когда
+    # запрос перестанет ждать
+    future.add_done_callback(lambda _: slots.release())
+
+    render_timeout = getattr(
+        settings, "ORDERS_RECEIPTS_RENDER_TIMEOUT", DEFAULT_RENDER_TIMEOUT
+    )
+    try:
+        return future.result(timeout=render_timeout)
+    except TimeoutError:
+        future.cancel()
+        raise ReceiptsBusyError()
+    except BrokenProcessPool:
+        # Процесс пула упал (например, по OOM): пул пересоздается
+        shutdown_pool()
+        raise
+
+
+def _money(value: Decimal) -> str:
+    return str(value.quantize(Decimal("0.01")))
+
+
+def _bill(
+    title: str, table_number: int, moment: datetime, items: list[OrderItem]
+) -> dict[str, Any]:
+    """Собирает счет из позиций; одно блюдо по одной цене дает одну строку."""
+    lines: dict[tuple[int, Decimal], list] = {}
+    for item in items:
+        line = lines.setdefault(
+            (item.dish_id, item.unit_price),
+            [item.dish_name, 0, _money(item.unit_price), Decimal("0.00")],
+        )
+        line[1] += item.quantity
+        line[3] += item.price
+
+    total = sum((line[3] for line in lines.values()), Decimal("0.00"))
+    return {
+        "title": title,
+        "table_number": table_number,
+        "created_at": timezone.localtime(moment).strftime("%d.%m.%Y %H:%M"),
+        "lines": [
+            [name, qty, unit, _money(price)]
+            for name, qty, unit, price in lines.values()
+        ],
+        "total": _money(total),
+    }
+
+
+def order_bill(order: Order) -> dict[str, Any]:
+    """Счет заказа; позиции лучше загрузить заранее через prefetch_related."""
+    return _bill(
+        f"Заказ {order.id}",
+        order.table_number,
+        order.created_at,
+        list(order.items.all()),
+    )
+
+
+def table_bill(table_number: int, orders: list[Order]) -> dict[str, Any]:
+    """Общий счет столика по его заказам."""
+    items = [item for order in orders for item in order.items.all()]
+    return _bill(f"Стол {table_number}", table_number, timezone.now(), items)
+
+
+def _cache_key(branch_id: int, kind: str, key: int, version: str, fmt: str) -> str:
+    return CACHE_KEY.format(
+        branch=branch_id, kind=kind, key=key, version=version, fmt=fmt
+    )
+
+
+def _cached(cache_key: str, fmt: str, build: Callable[[], dict[str, Any]]) -> bytes:
+    document = cache.get(cache_key)
+    if document is not None:
+        RECEIPTS.labels(fmt, "hit").inc()
+        return document
+
+    RECEIPTS.labels(fmt, "rendered").inc()
+    document = render_in_pool(build(), fmt)
+    cache.set(
+        cache_key,
+        document,
+        getattr(settings, "ORDERS_RECEIPTS_CACHE_TIMEOUT", DEFAULT_CACHE_TIMEOUT),
+    )
+    return document
+
+
+def get_order_receipt(
+    order_id: int, fmt: str, branch_id: int = DEFAULT_BRANCH_ID
+) -> Optional[bytes]:
+    """
+    Счет заказа филиала из кэша или из пула.
+
+    Args:
+        order_id (int): ID заказа
+        fmt (str): Формат (txt/pdf)
+        branch_id (int): Филиал, которому должен принадлежать заказ
+
+    Returns:
+        bytes, optional: Документ или None, если заказа нет в филиале
+
+    Raises:
+        ValueError: Если формат не поддерживается
+        ReceiptsBusyError: Если пул переполнен
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Неизвестный формат счета '{fmt}'")
+    orders = Order.objects.for_branch(branch_id).filter(pk=order_id)
+    version = orders.values_list("updated_at", flat=True).first()
+    if version is None:
+        return None
+
+    def build() -> dict[str, Any]:
+        return order_bill(orders.prefetch_related(ITEMS).get())
+
+    return _cached(
+        _cache_key(branch_id, KIND_ORDER, order_id, str(version.timestamp()), fmt),
+        fmt,
+        build,
+    )
+
+
+def get_table_receipt(
+    table_number: int, fmt: str, branch_id: int = DEFAULT_BRANCH_ID
+) -> Optional[bytes]:
+    """
+    Общий счет по неоплаченным заказам столика филиала.
+
+    Args:
+        table_number (int): Номер столика
+        fmt (str): Формат (txt/pdf)
+        branch_id (int): Филиал столика
+
+    Returns:
+        bytes, optional: Документ или None, если неоплаченных заказов нет
+
+    Raises:
+        ValueError: Если формат не поддерживается
+        ReceiptsBusyError: Если пул переполнен
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Неизвестный формат счета '{fmt}'")
+    orders = (
+        Order.objects.for_branch(branch_id)
+        .filter(table_number=table_number, status__in=UNPAID_STATUSES)
+        .order_by("id")
+    )
+    versions = list(orders.values_list("id", "updated_at"))
+    if not versions:
+        return None
+
+    digest = hashlib.sha1(
+        ";".join(f"{pk}:{moment.timestamp()}" for pk, moment in versions).encode()
+    ).hexdigest()
+
+    def build() -> dict[str, Any]:
+        return table_bill(
+            table_number,
+            list(
+                orders.filter(pk__in=[pk for pk, _ in versions]).prefetch_related(ITEMS)
+            ),
+        )
+
+    return _cached(
+        _cache_key(branch_id, KIND_TABLE, table_number, digest, fmt), fmt, build
+    )
+
+
+def render_shift(
+    day: date,
+    fmt: str,
+    branch_id: int = DEFAULT_BRANCH_ID,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[tuple[int, bytes]]:
+    """
+    Рендерит счета всех заказов смены филиала параллельно на всех ядрах.
+
+    Заказы читаются частями по ``chunk_size`` вместе с позициями, счета
+    раздаются процессам пачками. Пул создается на время вызова и не
+    связан с пулом запросов.
+
+    Args:
+        day (date): День смены
+        fmt (str): Формат (txt/pdf)
+        branch_id (int): Филиал; заказы читаются из его базы
+        workers (int, optional): Количество процессов, по умолчанию по числу ядер
+        chunk_size (int): Количество заказов, читаемых из базы за раз
+
+    Yields:
+        tuple[int, bytes]: ID заказа и документ
+
+    Raises:
+        ValueError: Если формат не поддерживается
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Неизвестный формат счета '{fmt}'")
+    start, end = day_bounds(day)
+    orders = (
+        Order.objects.for_branch(branch_id)
+        .filter(created_at__gte=start, created_at__lt=end)
+        .prefetch_related(ITEMS)
+        .order_by("id")
+    )
+    order_ids = []
+    bills = []
+    for order in orders.iterator(chunk_size=chunk_size):
+        order_ids.append(order.id)
+        bills.append(order_bill(order))
+    if not bills:
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context(START_METHOD)
+    ) as pool:
+        documents = pool.map(
+            render,
+            bills,
+            repeat(fmt),
+            repeat(get_font()),
+            chunksize=max(1, len(bills) // (workers * 4)),
+        )
+        yield from zip(order_ids, documents)
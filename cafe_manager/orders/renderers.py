@@ -0,0 +1,189 @@
+"""
+Компактный колоночный JSON для POS-терминалов.
+
+Клиент запрашивает его заголовком ``Accept: application/vnd.cafe.columnar+json``
+(или ``?format=columnar``). Списки однотипных объектов превращаются в
+таблицы ``{"columns": [...], "rows": [[...], ...]}``, поэтому имена полей
+передаются один раз на список, а не на каждый объект. Вложенные объекты
+из ``DICTIONARY_FIELDS`` (блюда позиций) выносятся в общий словарь
+``dictionaries`` и заменяются индексом строки в нем: одно и то же блюдо,
+встречающееся в сотне заказов, передается один раз.
+
+Пример списка заказов::
+
+    {
+      "dictionaries": {"dish": {"columns": ["id", "name", "price"],
+                                "rows": [[1, "Суп", "250.00"]]}},
+      "data": {"count": 1, "next": null, "previous": null,
+               "results": {"columns": ["id", ..., "items", ...],
+                           "rows": [[7, ..., {"columns": ["id", "dish", ...],
+                                              "rows": [[15, 0, ...]]}, ...]]}}
+    }
+
+Формат обратим: ``decode_columnar`` восстанавливает исходные данные, а
+``ColumnarJSONParser`` принимает тела запросов в том же формате.
+"""
+
+from typing import Any
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+COLUMNAR_MEDIA_TYPE: str = "application/vnd.cafe.columnar+json"
+
+# Поля, значения которых выносятся в общий словарь
+DICTIONARY_FIELDS: tuple[str, ...] = ("dish",)
+
+TABLE_KEYS = frozenset({"columns", "rows"})
+
+
+class _Encoder:
+    """
+    Кодировщик одного документа; хранит словари вынесенных объектов.
+
+    Attributes:
+        dictionaries (dict): Поле → (колонки, строки, индекс строки по значению)
+    """
+
+    def __init__(self) -> None:
+        self.dictionaries: dict[str, tuple[list[str], list[list], dict]] = {}
+
+    def encode(self, value: Any) -> Any:
+        if isinstance(value, list):
+            return self._encode_list(value)
+        if isinstance(value, dict):
+            return {key: self._encode_field(key, item) for key, item in value.items()}
+        return value
+
+    def _encode_list(self, values: list) -> Any:
+        if not values or not all(isinstance(value, dict) for value in values):
+            return [self.encode(value) for value in values]
+
+        columns = list(values[0])
+        if any(list(value) != columns for value in values):
+            return [self.encode(value) for value in values]
+
+        return {
+            "columns": columns,
+            "rows": [
+                [self._encode_field(key, value[key]) for key in columns]
+                for value in values
+            ],
+        }
+
+    def _encode_field(self, key: str, value: Any) -> Any:
+        if key in DICTIONARY_FIELDS and isinstance(value, dict):
+            return self._intern(key, value)
+        return self.encode(value)
+
+    def _intern(self, key: str, value: dict) -> Any:
+        columns, rows, index = self.dictionaries.setdefault(key, (list(value), [], {}))
+        if list(value) != columns:
+            return self.encode(value)
+
+        # Снимок блюда в позиции может отличаться от текущего меню,
+        # поэтому ключом служит вся строка, а не только id
+        row_key = tuple(value.values())
+        try:
+            position = index.get(row_key)
+        except TypeError:
+            return self.encode(value)
+        if position is None:
+            position = index[row_key] = len(rows)
+            rows.append([self.encode(item) for item in row_key])
+        return position
+
+
+def encode_columnar(data: Any) -> dict[str, Any]:
+    """
+    Переводит данные ответа в колоночный формат.
+
+    Args:
+        data: Данные DRF-ответа (списки, словари, скаляры)
+
+    Returns:
+        dict: Документ с ключами ``dictionaries`` и ``data``
+    """
+    encoder = _Encoder()
+    encoded = encoder.encode(data)
+    return {
+        "dictionaries": {
+            key: {"columns": columns, "rows": rows}
+            for key, (columns, rows, _) in encoder.dictionaries.items()
+            if rows
+        },
+        "data": encoded,
+    }
+
+
+def _is_table(value: Any) -> bool:
+    return isinstance(value, dict) and value.keys() == TABLE_KEYS
+
+
+def _decode(value: Any, dictionaries: dict[str, list[dict]], key: str = "") -> Any:
+    if key in dictionaries and isinstance(value, int):
+        return dict(dictionaries[key][value])
+    if _is_table(value):
+        columns = value["columns"]
+        return [
+            {
+                column: _decode(item, dictionaries, column)
+                for column, item in zip(columns, row)
+            }
+            for row in value["rows"]
+        ]
+    if isinstance(value, list):
+        return [_decode(item, dictionaries) for item in value]
+    if isinstance(value, dict):
+        return {
+            column: _decode(item, dictionaries, column)
+            for column, item in value.items()
+        }
+    return value
+
+
+def decode_columnar(document: Any) -> Any:
+    """
+    Восстанавливает данные из колоночного документа.
+
+    Документ без ключа ``data`` считается обычным JSON и возвращается как есть
+    (с разворачиванием таблиц), поэтому клиенту не обязательно кодировать
+    простые тела запросов.
+    """
+    if not isinstance(document, dict) or "data" not in document:
+        return _decode(document, {})
+
+    dictionaries = {
+        key: _decode(table, {})
+        for key, table in document.get("dictionaries", {}).items()
+    }
+    return _decode(document["data"], dictionaries)
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """Рендерер колоночного JSON (см. описание модуля)."""
+
+    media_type = COLUMNAR_MEDIA_TYPE
+    format = "columnar"
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: str = None,
+        renderer_context: dict = None,
+    ) -> bytes:
+        if data is None:
+            return b""
+        return super().render(
+            encode_columnar(data), accepted_media_type, renderer_context
+        )
+
+
+class ColumnarJSONParser(JSONParser):
+    """Парсер тел запросов в колоночном JSON."""
+
+    media_type = COLUMNAR_MEDIA_TYPE
+    renderer_class = ColumnarJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None) -> Any:
+        return decode_columnar(super().parse(stream, media_type, parser_context))
@@ -0,0 +1,159 @@
+"""
+Z-отчеты: неизменяемые итоги закрытого дня.
+
+Отчет строится командой ``close_day`` один раз за день для каждого
+филиала; заказы читаются из базы филиала (``for_branch``). Заказы дня (по
+времени создания, в локальной зоне) и позиции оплаченных заказов читаются
+одним проходом каждый, частями по ``chunk_size`` строк, без агрегатов по
+всей таблице. Готовый отчет хранится в ``DailyReport`` в колоночном JSON
+(см. orders.renderers), поэтому страница выручки и API отдают прошлые дни
+одним чтением строки, ничего не пересчитывая.
+
+Выручка — сумма оплаченных заказов; разбивка по блюдам тоже считается
+только по оплаченным заказам.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .branches import DEFAULT_BRANCH_ID
+from .models import DailyReport, Order, OrderItem
+from .renderers import decode_columnar, encode_columnar
+
+DEFAULT_CHUNK_SIZE: int = 2000
+
+STATUS_PAID: str = "paid"
+
+CENT = Decimal("0.01")
+
+
+def day_bounds(day: date) -> tuple[datetime, datetime]:
+    """Начало и конец (не включительно) дня в текущей временной зоне."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
+
+
+def _money(value: Decimal) -> str:
+    return str(value.quantize(CENT))
+
+
+def build_day_report(
+    day: date,
+    branch_id: int = DEFAULT_BRANCH_ID,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> dict[str, Any]:
+    """
+    Считает Z-отчет филиала за день.
+
+    Args:
+        day (date): День отчета
+        branch_id (int): Филиал
+        chunk_size (int): Количество строк, читаемых из базы за раз
+
+    Returns:
+        dict: Число заказов, выручка, средний чек и разбивки по статусам,
+        столикам и блюдам
+    """
+    start, end = day_bounds(day)
+    orders = Order.objects.for_branch(branch_id).filter(
+        created_at__gte=start, created_at__lt=end
+    )
+
+    by_status: dict[str, list] = defaultdict(lambda: [0, Decimal("0.00")])
+    by_table: dict[int, list] = defaultdict(lambda: [0, Decimal("0.00")])
+    rows = orders.order_by().values_list("status", "table_number", "total_price")
+    for status, table_number, total_price in rows.iterator(chunk_size=chunk_size):
+        by_status[status][0] += 1
+        by_status[status][1] += total_price
+        by_table[table_number][0] += 1
+        if status == STATUS_PAID:
+            by_table[table_number][1] += total_price
+
+    by_dish: dict[int, list] = {}
+    items = (
+        OrderItem.objects.for_branch(branch_id)
+        .filter(order__in=orders.filter(status=STATUS_PAID))
+        .values_list("dish_id", "dish_name", "quantity", "price")
+    )
+    for dish_id, name, quantity, price in items.order_by().iterator(
+        chunk_size=chunk_size
+    ):
+        dish = by_dish.setdefault(dish_id, [name, 0, Decimal("0.00")])
+        dish[1] += quantity
+        dish[2] += price
+
+    paid_orders, revenue = by_status.get(STATUS_PAID, (0, Decimal("0.00")))
+    return {
+        "day": day.isoformat(),
+        "orders": sum(count for count, _ in by_status.values()),
+        "paid_orders": paid_orders,
+        "revenue": _money(revenue),
+        "average_ticket": _money(revenue / paid_orders if paid_orders else revenue),
+        "by_status": [
+            {"status": status, "orders": count, "amount": _money(amount)}
+            for status, (count, amount) in sorted(by_status.items())
+        ],
+        "by_table": [
+            {"table_number": table, "orders": count, "revenue": _money(amount)}
+            for table, (count, amount) in sorted(by_table.items())
+        ],
+        "by_dish": [
+            {
+                "dish_id": dish_id,
+                "name": name,
+                "quantity": quantity,
+                "revenue": _money(amount),
+            }
+            for dish_id, (name, quantity, amount) in sorted(
+                by_dish.items(), key=lambda entry: (-entry[1][2], entry[0])
+            )
+        ],
+    }
+
+
+def close_day(
+    day: date,
+    branch_id: int = DEFAULT_BRANCH_ID,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> tuple[DailyReport, bool]:
+    """
+    Строит и сохраняет Z-отчет филиала за день, если его еще нет.
+
+    Args:
+        day (date): Закрываемый день
+        branch_id (int): Филиал
+        chunk_size (int): Количество строк, читаемых из базы за раз
+
+    Returns:
+        tuple[DailyReport, bool]: Отчет и признак того, что он создан сейчас
+
+    Raises:
+        ValueError: Если день еще не закончился
+    """
+    if day_bounds(day)[1] > timezone.now():
+        raise ValueError(f"День {day.isoformat()} еще не закончился")
+
+    reports = DailyReport.objects.filter(branch_id=branch_id)
+    existing = reports.filter(day=day).first()
+    if existing is not None:
+        return existing, False
+
+    data = encode_columnar(build_day_report(day, branch_id, chunk_size))
+    try:
+        with transaction.atomic():
+            report = DailyReport.objects.create(branch_id=branch_id, day=day, data=data)
+            return report, True
+    except IntegrityError:
+        # День параллельно закрыл другой процесс
+        return reports.get(day=day), False
+
+
+def load_report(report: DailyReport) -> dict[str, Any]:
+    """Разворачивает сохраненный отчет в обычный словарь."""
+    return decode_columnar(report.data)
@@ -0,0 +1,71 @@
+"""
+Маршрутизация баз данных филиалов.
+
+Подключается в ``DATABASE_ROUTERS``. Без ``ORDERS_BRANCH_DATABASES`` все
+решения совпадают с поведением Django по умолчанию.
+
+- Новые заказ и позиция записываются в базу своего филиала (филиал
+  позиции копируется из заказа в ``OrderItem.save``). Загруженные объекты
+  остаются в той базе, откуда пришли, а запросы по филиалу выбирают базу
+  сами (``for_branch``).
+- Меню, филиалы и остальные модели живут в ``default``. Позиции ссылаются
+  на общее меню без внешнего ключа в базе (см. ``OrderItem``).
+- В базах филиалов создаются только таблицы приложения orders.
+"""
+
+from typing import Any, Optional
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Model
+
+from .branches import branch_databases, get_branch_database
+
+APP_LABEL: str = "orders"
+
+# Модели, общие для всех филиалов: хранятся в default, а связи с ними
+# допустимы из любой базы
+SHARED_MODELS: frozenset[str] = frozenset({"branch", "dish"})
+
+# Модели, строки которых распределены по базам филиалов
+BRANCH_MODELS: frozenset[str] = frozenset({"order", "orderitem"})
+
+
+class BranchRouter:
+    """Направляет заказы и позиции в базы филиалов."""
+
+    def _instance_database(self, instance: Optional[Model]) -> Optional[str]:
+        if instance is None:
+            return None
+        if instance._state.db is not None:
+            return instance._state.db
+        branch_id = getattr(instance, "branch_id", None)
+        if branch_id is not None:
+            return get_branch_database(branch_id)
+        return None
+
+    def db_for_read(self, model: type[Model], **hints: Any) -> Optional[str]:
+        if model._meta.app_label != APP_LABEL:
+            return None
+        if model._meta.model_name in SHARED_MODELS:
+            return DEFAULT_DB_ALIAS
+        if model._meta.model_name in BRANCH_MODELS:
+            return self._instance_database(hints.get("instance"))
+        return None
+
+    def db_for_write(self, model: type[Model], **hints: Any) -> Optional[str]:
+        return self.db_for_read(model, **hints)
+
+    def allow_relation(self, obj1: Model, obj2: Model, **hints: Any) -> Optional[bool]:
+        if any(
+            obj._meta.app_label == APP_LABEL and obj._meta.model_name in SHARED_MODELS
+            for obj in (obj1, obj2)
+        ):
+            return True
+        return None
+
+    def allow_migrate(
+        self, db: str, app_label: str, model_name: Optional[str] = None, **hints: Any
+    ) -> Optional[bool]:
+        if db in branch_databases():
+            return app_label == APP_LABEL
+        return None
@@ -0,0 +1,119 @@
+"""
+Поиск заказов по свободному запросу вида «стол 7 тирамису сегодня».
+
+Номер стола и период фильтруются по индексу ``(table_number, created_at)``,
+а блюда ищутся подстрокой в ``Order.search_text`` — денормализованном
+списке названий блюд заказа, который обновляется при изменении позиций.
+На PostgreSQL по этому полю построен триграммный GIN-индекс, поэтому
+``LIKE '%тирамису%'`` не сканирует таблицу заказов.
+
+Слова короче ``MIN_TERM_LENGTH`` (3) символов, кроме номера стола, в поиск
+по блюдам не попадают: триграммный индекс для них не работает, и запрос
+свелся бы к полному сканированию. Такие слова игнорируются без ошибки, так
+что «стол 7 чай» ищет «чай», а «стол 7 ок» — все заказы стола 7.
+
+Время поиска замеряет ``orders/tests/bench_search.py``.
+"""
+
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+from typing import Iterable, Optional
+
+from django.db.models import QuerySet
+from django.utils import timezone
+
+SEARCH_TEXT_SEPARATOR: str = " | "
+
+# Триграммный индекс не помогает для подстрок короче трех символов
+MIN_TERM_LENGTH: int = 3
+
+TABLE_WORDS = {"table", "стол", "столик", "стола", "столика"}
+TODAY_WORDS = {"today", "сегодня"}
+YESTERDAY_WORDS = {"yesterday", "вчера"}
+STOP_WORDS = {"with", "and", "c", "с", "и", "на", "за", "order", "заказ"}
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class OrderQuery:
+    """
+    Разобранный поисковый запрос.
+
+    Attributes:
+        table_number (int, optional): Номер стола
+        created_from (datetime, optional): Начало периода создания
+        created_to (datetime, optional): Конец периода создания
+        terms (list[str]): Подстроки названий блюд в нижнем регистре
+    """
+
+    table_number: Optional[int] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    terms: list[str] = field(default_factory=list)
+
+
+def build_search_text(dish_names: Iterable[str]) -> str:
+    """Собирает поисковый текст заказа из названий блюд его позиций."""
+    return SEARCH_TEXT_SEPARATOR.join(sorted({name.lower() for name in dish_names}))
+
+
+def _day_bounds(day_offset: int) -> tuple[datetime, datetime]:
+    today = timezone.localdate() + timedelta(days=day_offset)
+    start = timezone.make_aware(datetime.combine(today, time.min))
+    return start, start + timedelta(days=1)
+
+
+def parse_query(text: str) -> OrderQuery:
+    """
+    Разбирает запрос на номер стола, период и названия блюд.
+
+    Args:
+        text (str): Запрос пользователя, например «table 7 with tiramisu today».
+            Слова короче ``MIN_TERM_LENGTH`` символов пропускаются
+
+    Returns:
+        OrderQuery: Условия поиска
+    """
+    query = OrderQuery()
+    tokens = [token.lower() for token in TOKEN_RE.findall(text)]
+
+    expect_table = False
+    for token in tokens:
+        if token in TABLE_WORDS:
+            expect_table = True
+        elif token.isdigit() and (expect_table or query.table_number is None):
+            query.table_number = int(token)
+            expect_table = False
+        elif token in TODAY_WORDS:
+            query.created_from, query.created_to = _day_bounds(0)
+        elif token in YESTERDAY_WORDS:
+            query.created_from, query.created_to = _day_bounds(-1)
+        elif token not in STOP_WORDS and len(token) >= MIN_TERM_LENGTH:
+            query.terms.append(token)
+    return query
+
+
+def search_orders(queryset: QuerySet, text: str) -> QuerySet:
+    """
+    Применяет поисковый запрос к QuerySet заказов.
+
+    Args:
+        queryset (QuerySet[Order]): Исходный набор заказов
+        text (str): Запрос пользователя
+
+    Returns:
+        QuerySet[Order]: Заказы, удовлетворяющие всем условиям запроса
+    """
+    query = parse_query(text)
+
+    if query.table_number is not None:
+        queryset = queryset.filter(table_number=query.table_number)
+    if query.created_from is not None:
+        queryset = queryset.filter(
+            created_at__gte=query.created_from, created_at__lt=query.created_to
+        )
+    for term in query.terms:
+        queryset = queryset.filter(search_text__contains=term)
+    return queryset
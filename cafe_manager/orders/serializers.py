@@ -1,10 +1,42 @@
 from rest_framework import serializers
-from .models import Order, OrderItem, Dish
+from .models import DailyReport, Order, OrderItem, Dish
 from typing import Dict, Any
 from decimal import Decimal
 
 
-class DishSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    Оставляет в сериализаторе только поля из ``fields``.
+
+    Поля из ``expandable_fields`` (вложенные объекты) попадают в ответ при
+    выборочных полях, только если перечислены в ``expand``.
+
+    Raises:
+        ValidationError: Если запрошены несуществующие поля
+    """
+
+    expandable_fields: tuple[str, ...] = ()
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        fields = kwargs.pop("fields", None)
+        expand = kwargs.pop("expand", None) or set()
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            return
+
+        unknown = (set(fields) - set(self.fields)) | (
+            set(expand) - set(self.expandable_fields)
+        )
+        if unknown:
+            raise serializers.ValidationError(
+                {"fields": f"Неизвестные поля: {', '.join(sorted(unknown))}"}
+            )
+        keep = set(fields) | set(expand)
+        for name in set(self.fields) - keep:
+            self.fields.pop(name)
+
+
+class DishSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Dish
         fields = ["id", "name", "price"]
@@ -26,15 +58,29 @@ class OrderItemCreateSerializer(serializers.ModelSerializer):
         return value
 
 
+class DishSnapshotSerializer(serializers.Serializer):
+    """
+    Блюдо позиции в том виде, в каком оно было продано.
+
+    Читает снимок из самой позиции, поэтому не требует JOIN с Dish.
+    """
+
+    id = serializers.IntegerField(source="dish_id")
+    name = serializers.CharField(source="dish_name")
+    price = serializers.DecimalField(
+        source="unit_price", max_digits=11, decimal_places=2
+    )
+
+
 class OrderItemSerializer(serializers.ModelSerializer):
-    dish = DishSerializer(read_only=True)
+    dish = DishSnapshotSerializer(source="*", read_only=True)
 
     class Meta:
         model = OrderItem
         fields = ["id", "dish", "quantity", "price"]
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Сериализатор для модели Order.
 
@@ -46,11 +92,15 @@ class OrderSerializer(serializers.ModelSerializer):
         created_at (datetime): Время создания
         items (List[OrderItem]): Позиции заказа
         total_items (int): Количество позиций
+
+    При выборочных полях (``fields``) позиции включаются через ``expand``.
     """
 
     items = OrderItemSerializer(many=True, read_only=True)
     total_items = serializers.IntegerField(read_only=True)
 
+    expandable_fields = ("items",)
+
     class Meta:
         model = Order
         fields = [
@@ -89,3 +139,11 @@ class OrderSerializer(serializers.ModelSerializer):
         if "table_number" in data and data["table_number"] > 100:
             raise serializers.ValidationError("Номер столика не может быть больше 100")
         return data
+
+
+class DailyReportSerializer(serializers.ModelSerializer):
+    """Закрытый день в списке Z-отчетов (без самого отчета)."""
+
+    class Meta:
+        model = DailyReport
+        fields = ["day", "created_at"]
@@ -0,0 +1,280 @@
+"""
+Статистика заказов по временным окнам.
+
+Окно ``[from, to)`` делится на корзины по часу или по дню. Все корзины
+считаются одним запросом ``GROUP BY date_trunc(...), status``. Закрытые
+корзины кэшируются на ``ORDERS_STATS_CACHE_TTL`` секунд, текущая
+пересчитывается при каждом запросе. Заказ попадает в корзину по времени
+создания, поэтому после изменения старого заказа его закрытые корзины
+сбрасываются задачей outbox (см. ``orders.tasks``); TTL ограничивает
+устаревание только для записей в обход представлений и админки.
+
+Статистика считается по одному филиалу (``branch_id``), в его базе; ключ
+корзины в кэше включает филиал.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .branches import DEFAULT_BRANCH_ID
+from .models import Order
+
+BUCKET_SIZES: dict[str, timedelta] = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+# Окно по умолчанию: последние сутки по часам или последние 30 дней по дням
+DEFAULT_BUCKET_COUNT: dict[str, int] = {"hour": 24, "day": 30}
+MAX_BUCKETS: int = 1000
+
+DEFAULT_CACHE_TTL: int = 60 * 60
+BUCKET_CACHE_KEY: str = "orders:stats:{branch}:{kind}:{start}"
+
+STATUS_PAID: str = "paid"
+
+
+@dataclass(frozen=True)
+class StatsWindow:
+    """
+    Окно статистики, выровненное по границам корзин.
+
+    Attributes:
+        start (datetime): Начало первой корзины
+        end (datetime): Конец последней корзины (не включительно)
+        kind (str): Размер корзины (hour/day)
+    """
+
+    start: datetime
+    end: datetime
+    kind: str
+
+    @property
+    def step(self) -> timedelta:
+        return BUCKET_SIZES[self.kind]
+
+    def bucket_starts(self) -> list[datetime]:
+        starts = []
+        current = self.start
+        while current < self.end:
+            starts.append(current)
+            current += self.step
+        return starts
+
+
+def _truncate(moment: datetime, kind: str) -> datetime:
+    moment = timezone.localtime(moment)
+    if kind == "day":
+        return timezone.make_aware(datetime.combine(moment.date(), time.min))
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _parse_moment(value: str, name: str) -> datetime:
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Параметр {name} должен быть датой или датой-временем")
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def parse_window(
+    start: Optional[str], end: Optional[str], kind: Optional[str]
+) -> StatsWindow:
+    """
+    Разбирает параметры ``from``, ``to`` и ``bucket`` запроса.
+
+    Args:
+        start (str, optional): Начало окна (ISO дата или дата-время)
+        end (str, optional): Конец окна, по умолчанию текущий момент
+        kind (str, optional): Размер корзины, по умолчанию hour
+
+    Returns:
+        StatsWindow: Окно, расширенное до целых корзин
+
+    Raises:
+        ValueError: Если параметры некорректны или корзин слишком много
+    """
+    kind = kind or "hour"
+    if kind not in BUCKET_SIZES:
+        raise ValueError("Параметр bucket должен быть hour или day")
+    step = BUCKET_SIZES[kind]
+
+    end_moment = _parse_moment(end, "to") if end else timezone.now()
+    end_bucket = _truncate(end_moment, kind)
+    if end_bucket < end_moment:
+        end_bucket += step
+
+    if start:
+        start_bucket = _truncate(_parse_moment(start, "from"), kind)
+    else:
+        start_bucket = end_bucket - step * DEFAULT_BUCKET_COUNT[kind]
+
+    if start_bucket >= end_bucket:
+        raise ValueError("Параметр from должен быть раньше to")
+    if (end_bucket - start_bucket) / step > MAX_BUCKETS:
+        raise ValueError(f"Окно не должно содержать больше {MAX_BUCKETS} корзин")
+    return StatsWindow(start=start_bucket, end=end_bucket, kind=kind)
+
+
+def _empty_bucket() -> dict[str, Any]:
+    return {"orders": 0, "revenue": Decimal("0.00"), "by_status": {}}
+
+
+def _query_buckets(
+    branch_id: int, kind: str, start: datetime, end: datetime
+) -> dict[datetime, dict[str, Any]]:
+    """Считает корзины диапазона одним GROUP BY по корзине и статусу."""
+    rows = (
+        Order.objects.for_branch(branch_id)
+        .filter(created_at__gte=start, created_at__lt=end)
+        .annotate(bucket=Trunc("created_at", kind))
+        .values("bucket", "status")
+        .annotate(
+            count=Count("id"),
+            revenue=Sum("total_price", filter=Q(status=STATUS_PAID)),
+        )
+        .order_by()
+    )
+
+    buckets: dict[datetime, dict[str, Any]] = {}
+    for row in rows:
+        bucket = buckets.setdefault(row["bucket"], _empty_bucket())
+        bucket["orders"] += row["count"]
+        bucket["revenue"] += row["revenue"] or 0
+        bucket["by_status"][row["status"]] = row["count"]
+    return buckets
+
+
+def _cache_key(branch_id: int, kind: str, start: datetime) -> str:
+    return BUCKET_CACHE_KEY.format(branch=branch_id, kind=kind, start=start.isoformat())
+
+
+def is_closed_bucket(moment: datetime) -> bool:
+    """Проверяет, закрыта ли (и может ли быть в кэше) часовая корзина момента."""
+    return _truncate(moment, "hour") + BUCKET_SIZES["hour"] <= timezone.now()
+
+
+def invalidate_buckets(branch_id: int, moment: datetime) -> None:
+    """
+    Удаляет из кэша часовую и дневную корзины, в которые попадает момент.
+
+    Args:
+        branch_id (int): Филиал
+        moment (datetime): Время создания измененного заказа
+    """
+    cache.delete_many(
+        [_cache_key(branch_id, kind, _truncate(moment, kind)) for kind in BUCKET_SIZES]
+    )
+
+
+def get_buckets(
+    window: StatsWindow, branch_id: int = DEFAULT_BRANCH_ID
+) -> list[dict[str, Any]]:
+    """
+    Возвращает корзины окна, беря закрытые из кэша.
+
+    Args:
+        window (StatsWindow): Окно статистики
+        branch_id (int): Филиал
+
+    Returns:
+        list[dict]: Корзины с началом, числом заказов, выручкой и статусами
+    """
+    now = timezone.now()
+    starts = window.bucket_starts()
+    closed = [start for start in starts if start + window.step <= now]
+
+    cached = cache.get_many(
+        [_cache_key(branch_id, window.kind, start) for start in closed]
+    )
+    missing = [
+        start
+        for start in starts
+        if _cache_key(branch_id, window.kind, start) not in cached
+    ]
+
+    computed: dict[datetime, dict[str, Any]] = {}
+    if missing:
+        computed = _query_buckets(
+            branch_id,
+            window.kind,
+            missing[0],
+            min(missing[-1] + window.step, window.end),
+        )
+        cache.set_many(
+            {
+                _cache_key(branch_id, window.kind, start): computed.get(
+                    start, _empty_bucket()
+                )
+                for start in missing
+                if start in closed
+            },
+            getattr(settings, "ORDERS_STATS_CACHE_TTL", DEFAULT_CACHE_TTL),
+        )
+
+    result = []
+    for start in starts:
+        bucket = cached.get(_cache_key(branch_id, window.kind, start))
+        if bucket is None:
+            bucket = computed.get(start, _empty_bucket())
+        result.append({"start": start, **bucket})
+    return result
+
+
+def get_totals(branch_id: int = DEFAULT_BRANCH_ID) -> dict[str, Any]:
+    """Итоги филиала за все время одним запросом с группировкой по статусу."""
+    rows = list(
+        Order.objects.for_branch(branch_id)
+        .values("status")
+        .annotate(
+            count=Count("id"),
+            revenue=Sum("total_price", filter=Q(status=STATUS_PAID)),
+        )
+        .order_by("status")
+    )
+    return {
+        "total_orders": sum(row["count"] for row in rows),
+        "total_revenue": sum((row["revenue"] or 0 for row in rows), Decimal("0.00")),
+        "orders_by_status": [
+            {"status": row["status"], "count": row["count"]} for row in rows
+        ],
+    }
+
+
+def get_window_statistics(
+    window: StatsWindow, branch_id: int = DEFAULT_BRANCH_ID
+) -> dict[str, Any]:
+    """Итоги и корзины окна; итоги складываются из корзин без доп. запросов."""
+    buckets = get_buckets(window, branch_id)
+    by_status: dict[str, int] = {}
+    for bucket in buckets:
+        for name, count in bucket["by_status"].items():
+            by_status[name] = by_status.get(name, 0) + count
+
+    return {
+        "from": window.start,
+        "to": window.end,
+        "bucket": window.kind,
+        "total_orders": sum(bucket["orders"] for bucket in buckets),
+        "total_revenue": sum(
+            (bucket["revenue"] for bucket in buckets), Decimal("0.00")
+        ),
+        "orders_by_status": [
+            {"status": name, "count": count}
+            for name, count in sorted(by_status.items())
+        ],
+        "buckets": buckets,
+    }
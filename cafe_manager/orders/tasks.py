@@ -0,0 +1,295 @@
+"""
+Фоновые задачи для побочных эффектов записи заказов.
+
+Задача записывается в таблицу outbox той базы, где лежит заказ (базы его
+филиала), в той же транзакции, что и основные INSERT, а после коммита этой
+базы передается в пул потоков процесса. Задачи, которые не успели
+выполниться (падение процесса, исчерпанные попытки), добирает команда
+``process_outbox`` по всем базам заказов.
+
+``notify_order_changed`` ставит побочные эффекты изменения заказа:
+
+- ``invalidate_order_statistics`` сбрасывает закрытые корзины статистики,
+  в которые попадает заказ. Ставится, только если корзина уже закрыта:
+  текущая корзина не кэшируется.
+- ``order_changed`` публикует изменение сигналом ``order_changed``.
+  Ставится, только если у сигнала есть получатели.
+
+Поэтому запись нового заказа без подписчиков не платит лишним INSERT в
+outbox.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, transaction
+from django.db.models import F
+from django.dispatch import Signal
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import statistics
+from .models import Order, OutboxJob
+
+logger = logging.getLogger(__name__)
+
+TASK_ORDER_CHANGED: str = "order_changed"
+TASK_INVALIDATE_STATISTICS: str = "invalidate_order_statistics"
+
+EVENT_CREATED: str = "created"
+EVENT_UPDATED: str = "updated"
+EVENT_DELETED: str = "deleted"
+
+DEFAULT_WORKERS: int = 4
+DEFAULT_MAX_ATTEMPTS: int = 5
+DEFAULT_RETRY_DELAY: float = 2.0
+
+TaskHandler = Callable[..., None]
+
+order_changed = Signal()
+
+_registry: dict[str, TaskHandler] = {}
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def task(name: str) -> Callable[[TaskHandler], TaskHandler]:
+    """
+    Регистрирует функцию как фоновую задачу под указанным именем.
+
+    Args:
+        name (str): Имя задачи, по которому она ставится в очередь
+
+    Returns:
+        Callable: Декоратор, возвращающий функцию без изменений
+    """
+
+    def decorator(func: TaskHandler) -> TaskHandler:
+        _registry[name] = func
+        return func
+
+    return decorator
+
+
+def enqueue(name: str, using: str = DEFAULT_DB_ALIAS, **payload: Any) -> OutboxJob:
+    """
+    Ставит задачу в очередь; запуск произойдет только после коммита.
+
+    Args:
+        name (str): Имя зарегистрированной задачи
+        using (str): База, в транзакции которой пишется заказ
+        **payload: JSON-сериализуемые аргументы задачи
+
+    Returns:
+        OutboxJob: Созданная запись outbox
+
+    Raises:
+        LookupError: Если задача с таким именем не зарегистрирована
+    """
+    if name not in _registry:
+        raise LookupError(f"Неизвестная задача '{name}'")
+
+    job = OutboxJob.objects.using(using).create(name=name, payload=payload)
+    transaction.on_commit(partial(dispatch, job.pk, using), using=using)
+    return job
+
+
+def invalidate_statistics_later(
+    branch_id: int, created_at: datetime, using: str = DEFAULT_DB_ALIAS
+) -> Optional[OutboxJob]:
+    """
+    Ставит сброс кэша статистики заказа, если его корзина уже закрыта.
+
+    Args:
+        branch_id (int): Филиал заказа
+        created_at (datetime): Время создания заказа
+        using (str): База заказа
+
+    Returns:
+        Optional[OutboxJob]: Созданная запись outbox или None
+    """
+    if not statistics.is_closed_bucket(created_at):
+        return None
+    return enqueue(
+        TASK_INVALIDATE_STATISTICS,
+        using=using,
+        branch_id=branch_id,
+        created_at=created_at.isoformat(),
+    )
+
+
+def notify_order_changed(order: Order, event: str) -> list[OutboxJob]:
+    """
+    Ставит побочные эффекты изменения заказа в outbox базы заказа.
+
+    Args:
+        order (Order): Созданный, измененный или удаленный заказ
+        event (str): Событие (created/updated/deleted)
+
+    Returns:
+        list[OutboxJob]: Созданные записи outbox
+    """
+    using = order._state.db or DEFAULT_DB_ALIAS
+    jobs = []
+    job = invalidate_statistics_later(order.branch_id, order.created_at, using)
+    if job is not None:
+        jobs.append(job)
+    if order_changed.has_listeners(Order):
+        jobs.append(
+            enqueue(TASK_ORDER_CHANGED, using=using, order_id=order.id, event=event)
+        )
+    return jobs
+
+
+def dispatch(job_id: int, using: str = DEFAULT_DB_ALIAS, delay: float = 0) -> None:
+    """Передает задачу на выполнение: сразу (eager) или в пул потоков."""
+    if getattr(settings, "ORDERS_TASKS_EAGER", False):
+        run_job(job_id, using)
+        return
+
+    if delay:
+        timer = threading.Timer(delay, dispatch, args=(job_id, using))
+        timer.daemon = True
+        timer.start()
+        return
+
+    get_executor().submit(_run_in_worker, job_id, using)
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Возвращает пул потоков процесса, создавая его при первом обращении."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(
+                        settings, "ORDERS_TASKS_WORKERS", DEFAULT_WORKERS
+                    ),
+                    thread_name_prefix="orders-tasks",
+                )
+    return _executor
+
+
+def _run_in_worker(job_id: int, using: str) -> None:
+    close_old_connections()
+    try:
+        retry_in = run_job(job_id, using)
+    finally:
+        close_old_connections()
+
+    if retry_in is not None:
+        dispatch(job_id, using, delay=retry_in)
+
+
+def run_job(job_id: int, using: str = DEFAULT_DB_ALIAS) -> Optional[float]:
+    """
+    Выполняет одну задачу из outbox.
+
+    Задача захватывается атомарным UPDATE, поэтому одновременный запуск
+    из пула и из ``process_outbox`` выполнит ее только один раз. Успешная
+    задача удаляется, неуспешная возвращается в очередь с экспоненциальной
+    задержкой либо помечается ошибочной после последней попытки.
+
+    Args:
+        job_id (int): ID записи outbox
+        using (str): База, в outbox которой лежит задача
+
+    Returns:
+        Optional[float]: Задержка перед повтором в секундах или None
+    """
+    jobs = OutboxJob.objects.using(using)
+    claimed = jobs.filter(pk=job_id, status=OutboxJob.STATUS_PENDING).update(
+        status=OutboxJob.STATUS_RUNNING,
+        locked_at=timezone.now(),
+        attempts=F("attempts") + 1,
+    )
+    if not claimed:
+        return None
+
+    job = jobs.get(pk=job_id)
+
+    try:
+        handler = _registry.get(job.name)
+        if handler is None:
+            raise LookupError(f"Неизвестная задача '{job.name}'")
+        handler(**job.payload)
+    except Exception as e:
+        logger.exception("Задача %s #%s завершилась с ошибкой", job.name, job.pk)
+        max_attempts = getattr(
+            settings, "ORDERS_TASKS_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS
+        )
+        if job.attempts >= max_attempts:
+            jobs.filter(pk=job_id).update(
+                status=OutboxJob.STATUS_FAILED, last_error=str(e)
+            )
+            return None
+
+        delay = getattr(
+            settings, "ORDERS_TASKS_RETRY_DELAY", DEFAULT_RETRY_DELAY
+        ) * 2 ** (job.attempts - 1)
+        jobs.filter(pk=job_id).update(
+            status=OutboxJob.STATUS_PENDING,
+            available_at=timezone.now() + timedelta(seconds=delay),
+            last_error=str(e),
+        )
+        return delay
+
+    jobs.filter(pk=job_id).delete()
+    return None
+
+
+def process_pending(
+    limit: Optional[int] = None,
+    stale_after: float = 300,
+    using: str = DEFAULT_DB_ALIAS,
+) -> int:
+    """
+    Синхронно выполняет задачи, готовые к запуску.
+
+    Задачи в статусе «выполняется», захваченные раньше ``stale_after``
+    секунд назад, считаются потерянными и возвращаются в очередь.
+
+    Args:
+        limit (int, optional): Максимальное количество задач за вызов
+        stale_after (float): Таймаут потерянной задачи в секундах
+        using (str): База, outbox которой обрабатывается
+
+    Returns:
+        int: Количество обработанных задач
+    """
+    now = timezone.now()
+    jobs = OutboxJob.objects.using(using)
+    jobs.filter(
+        status=OutboxJob.STATUS_RUNNING,
+        locked_at__lt=now - timedelta(seconds=stale_after),
+    ).update(status=OutboxJob.STATUS_PENDING)
+
+    job_ids = jobs.filter(
+        status=OutboxJob.STATUS_PENDING, available_at__lte=now
+    ).values_list("id", flat=True)
+    if limit is not None:
+        job_ids = job_ids[:limit]
+
+    processed = 0
+    for job_id in list(job_ids):
+        run_job(job_id, using)
+        processed += 1
+    return processed
+
+
+@task(TASK_ORDER_CHANGED)
+def broadcast_order_changed(order_id: int, event: str) -> None:
+    """Рассылает подписчикам событие об изменении заказа."""
+    order_changed.send(sender=Order, order_id=order_id, event=event)
+
+
+@task(TASK_INVALIDATE_STATISTICS)
+def invalidate_order_statistics(branch_id: int, created_at: str) -> None:
+    """Сбрасывает закрытые корзины статистики, в которые попадает заказ."""
+    statistics.invalidate_buckets(branch_id, parse_datetime(created_at))
@@ -0,0 +1,12 @@
+from django import template
+from django.utils.safestring import SafeString, mark_safe
+
+from orders.fragments import CSRF_PLACEHOLDER
+
+register = template.Library()
+
+
+@register.simple_tag
+def csrf_placeholder() -> SafeString:
+    """Маркер CSRF-поля для кэшируемых фрагментов (см. orders.fragments)."""
+    return mark_safe(CSRF_PLACEHOLDER)
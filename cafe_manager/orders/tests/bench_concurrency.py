@@ -0,0 +1,29 @@
+import pytest
+from decimal import Decimal
+from django.db import connection
+from orders.models import Dish, Order
+
+from benchmarking import run_order_workload
+
+WORKERS = (1, 2, 4, 8)
+OPERATIONS = 50
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db(transaction=True, serialized_rollback=True)
+def test_order_write_scalability():
+    dishes = [
+        Dish.objects.create(name=f"Блюдо {n}", price=Decimal(100 + n))
+        for n in range(10)
+    ]
+
+    print(f"\nПараллельные записи в один заказ ({connection.vendor}), операций/с:")
+    for workers in WORKERS:
+        order = Order.objects.create(table_number=workers)
+        throughput = run_order_workload(order, dishes, workers, OPERATIONS)
+
+        order.refresh_from_db()
+        prices = list(order.items.values_list("price", flat=True))
+        drift = order.total_price - sum(prices, Decimal("0.00"))
+        print(f"  потоков={workers:<3} {throughput:9.1f}  расхождение суммы={drift}")
+        assert drift == 0
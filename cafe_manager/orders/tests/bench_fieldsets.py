@@ -0,0 +1,25 @@
+import pytest
+from django.urls import reverse
+
+from benchmarking import create_board, measure, report
+
+BOARD_SIZE = 500
+LEAN_FIELDS = "id,table_number,status,total_price"
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_lean_vs_full_order_list(client):
+    create_board(BOARD_SIZE, items_per_order=4)
+    url = reverse("order-list")
+    params = {"pagination": "cursor", "page_size": 100}
+
+    report(
+        "/api/orders/, 100 заказов по 4 позиции (мс)",
+        {
+            "полный": measure(lambda: client.get(url, params)),
+            "?fields=": measure(
+                lambda: client.get(url, {**params, "fields": LEAN_FIELDS})
+            ),
+        },
+    )
@@ -0,0 +1,40 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from benchmarking import create_board, measure, report
+
+BOARD_SIZE = 200
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_order_board_fragment_cache(client):
+    create_board(BOARD_SIZE)
+    url = reverse("order_list")
+
+    def render_cold():
+        cache.clear()
+        client.get(url)
+
+    def render_warm():
+        client.get(url)
+
+    with CaptureQueriesContext(connection) as cold_queries:
+        render_cold()
+    cold_count = len(cold_queries)
+    with CaptureQueriesContext(connection) as warm_queries:
+        render_warm()
+    warm_count = len(warm_queries)
+
+    report(
+        f"order_list, {BOARD_SIZE} заказов (мс)",
+        {
+            "cold cache": measure(render_cold),
+            "warm cache": measure(render_warm),
+        },
+    )
+    print(f"  SQL-запросов: cold={cold_count} warm={warm_count}")
+    assert warm_count < cold_count
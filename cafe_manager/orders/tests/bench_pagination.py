@@ -0,0 +1,49 @@
+from base64 import b64encode
+from urllib.parse import urlencode
+
+import pytest
+from django.urls import reverse
+
+from benchmarking import create_board, measure, report
+
+BOARD_SIZE = 5000
+PAGE_SIZE = 50
+
+
+def make_cursor(position: int) -> str:
+    return b64encode(urlencode({"p": position}).encode()).decode()
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_cursor_vs_page_number_depth(client):
+    orders = create_board(BOARD_SIZE, items_per_order=1)
+    url = reverse("order-list")
+    last_page = BOARD_SIZE // PAGE_SIZE
+    deep_position = orders[PAGE_SIZE].id
+
+    report(
+        f"/api/orders/, {BOARD_SIZE} заказов, страница {PAGE_SIZE} (мс)",
+        {
+            "page=1": measure(
+                lambda: client.get(url, {"page": 1, "page_size": PAGE_SIZE})
+            ),
+            f"page={last_page}": measure(
+                lambda: client.get(url, {"page": last_page, "page_size": PAGE_SIZE})
+            ),
+            "cursor, первая": measure(
+                lambda: client.get(
+                    url, {"pagination": "cursor", "page_size": PAGE_SIZE}
+                )
+            ),
+            "cursor, последняя": measure(
+                lambda: client.get(
+                    url, {"cursor": make_cursor(deep_position), "page_size": PAGE_SIZE}
+                )
+            ),
+        },
+    )
+    response = client.get(
+        url, {"cursor": make_cursor(deep_position), "page_size": PAGE_SIZE}
+    )
+    assert len(response.json()["results"]) == PAGE_SIZE
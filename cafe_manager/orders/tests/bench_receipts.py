@@ -0,0 +1,35 @@
+import os
+import time
+
+import pytest
+from django.utils import timezone
+from orders.receipt_render import FORMAT_PDF, render
+from orders.receipts import get_font, order_bill, render_shift
+from orders.models import Order
+
+from benchmarking import create_board
+
+SHIFT_SIZE = 400
+WORKERS = (1, 2, 4)
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_shift_receipts_throughput():
+    create_board(SHIFT_SIZE, items_per_order=4)
+    day = timezone.localdate()
+    bills = [order_bill(order) for order in Order.objects.prefetch_related("items")]
+
+    print(f"\nСчета PDF за смену, {SHIFT_SIZE} заказов, ядер: {os.cpu_count()}")
+    started = time.perf_counter()
+    for bill in bills:
+        render(bill, FORMAT_PDF, get_font())
+    elapsed = time.perf_counter() - started
+    print(f"  {'в процессе Django':<24} {SHIFT_SIZE / elapsed:9.1f} счетов/с")
+
+    for workers in WORKERS:
+        started = time.perf_counter()
+        count = sum(1 for _ in render_shift(day, FORMAT_PDF, workers=workers))
+        elapsed = time.perf_counter() - started
+        assert count == SHIFT_SIZE
+        print(f"  {f'пул, процессов={workers}':<24} {count / elapsed:9.1f} счетов/с")
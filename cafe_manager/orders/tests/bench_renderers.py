@@ -0,0 +1,52 @@
+import json
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from benchmarking import create_board, measure, report
+from orders.models import Order
+from orders.renderers import ColumnarJSONRenderer, decode_columnar
+from orders.serializers import OrderSerializer
+
+BOARD_SIZE = 500
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_columnar_renderer_vs_json():
+    create_board(BOARD_SIZE, items_per_order=4)
+    data = {
+        "count": BOARD_SIZE,
+        "next": None,
+        "previous": None,
+        "results": OrderSerializer(
+            Order.objects.prefetch_related("items"), many=True
+        ).data,
+    }
+    json_renderer = JSONRenderer()
+    columnar_renderer = ColumnarJSONRenderer()
+    json_body = json_renderer.render(data)
+    columnar_body = columnar_renderer.render(data)
+
+    report(
+        f"Список из {BOARD_SIZE} заказов: кодирование (мс)",
+        {
+            "JSONRenderer": measure(lambda: json_renderer.render(data)),
+            "ColumnarJSONRenderer": measure(lambda: columnar_renderer.render(data)),
+        },
+    )
+    report(
+        f"Список из {BOARD_SIZE} заказов: декодирование (мс)",
+        {
+            "json.loads": measure(lambda: json.loads(json_body)),
+            "columnar + decode": measure(
+                lambda: decode_columnar(json.loads(columnar_body))
+            ),
+        },
+    )
+    print(
+        f"  размер: json={len(json_body)} байт, columnar={len(columnar_body)} байт "
+        f"({len(columnar_body) / len(json_body):.0%})"
+    )
+    assert decode_columnar(json.loads(columnar_body)) == json.loads(json_body)
+    assert len(columnar_body) < len(json_body)
@@ -0,0 +1,28 @@
+import pytest
+from datetime import timedelta
+from django.urls import reverse
+from django.utils import timezone
+from orders.models import Order
+from orders.reports import build_day_report, close_day
+
+from benchmarking import create_board, measure, report
+
+BOARD_SIZE = 5000
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_stored_vs_rebuilt_day_report(client):
+    create_board(BOARD_SIZE, items_per_order=4)
+    yesterday = timezone.localdate() - timedelta(days=1)
+    Order.objects.update(created_at=timezone.now() - timedelta(days=1))
+    close_day(yesterday)
+    url = reverse("dailyreport-detail", args=[yesterday])
+
+    report(
+        f"Z-отчет за день, {BOARD_SIZE} заказов по 4 позиции (мс)",
+        {
+            "пересчет": measure(lambda: build_day_report(yesterday)),
+            "из снимка (API)": measure(lambda: client.get(url)),
+        },
+    )
@@ -0,0 +1,47 @@
+import pytest
+from collections import defaultdict
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from orders.models import Order, OrderItem
+from orders.search import build_search_text, search_orders
+
+from benchmarking import create_board, measure, report
+
+BOARD_SIZE = 5000
+QUERY = "стол 7 блюдо сегодня"
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_order_search(client):
+    orders = create_board(BOARD_SIZE)
+    # create_board минует пересчет заказа, поэтому поисковый текст
+    # заполняется здесь по тем же позициям
+    names = defaultdict(list)
+    for order_id, name in OrderItem.objects.values_list("order_id", "dish_name"):
+        names[order_id].append(name)
+    for order in orders:
+        order.search_text = build_search_text(names[order.id])
+    Order.objects.bulk_update(orders, ["search_text"], batch_size=1000)
+
+    def search():
+        return list(search_orders(Order.objects.all(), QUERY))
+
+    def search_api():
+        client.get(reverse("order-list"), {"q": QUERY})
+
+    # Журнал запросов переполнен наполнением доски, а CaptureQueriesContext
+    # считает запросы по его длине
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        found = search()
+    # Поиск читает только таблицу заказов, без соединения с позициями
+    assert len(queries) == 1
+    assert "orders_orderitem" not in queries[0]["sql"]
+
+    report(
+        f"Поиск «{QUERY}», {BOARD_SIZE} заказов (мс)",
+        {"search_orders": measure(search), "API ?q=": measure(search_api)},
+    )
+    print(f"  найдено: {len(found)}")
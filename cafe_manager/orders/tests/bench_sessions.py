@@ -0,0 +1,67 @@
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from benchmarking import create_board
+
+CONFIGURATIONS = {
+    "db + session messages": ("db", "session"),
+    "db + fallback messages": ("db", "fallback"),
+    "cache + cookie messages": ("cache", "cookie"),
+    "signed_cookies + cookie": ("signed_cookies", "cookie"),
+}
+
+
+def session_queries(queries: CaptureQueriesContext) -> int:
+    return sum("django_session" in query["sql"] for query in queries)
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_session_queries_per_request(settings):
+    orders = create_board(50, items_per_order=1)
+    dish_id = orders[0].items.first().dish_id
+
+    requests = {
+        "order_list": lambda client: client.get(reverse("order_list")),
+        "add_order": lambda client: client.post(
+            reverse("add_order"),
+            {
+                "table_number": 5,
+                "form-TOTAL_FORMS": 1,
+                "form-INITIAL_FORMS": 0,
+                "form-0-dish": dish_id,
+                "form-0-quantity": 1,
+            },
+        ),
+        "update_status": lambda client: client.post(
+            reverse("update_status", args=[orders[1].id]), {"status": "pending"}
+        ),
+    }
+
+    counts = {}
+    for name, (engine, storage) in CONFIGURATIONS.items():
+        settings.SESSION_ENGINE = settings.SESSION_ENGINES[engine]
+        settings.MESSAGE_STORAGE = settings.MESSAGE_STORAGES[storage]
+        # Клиент с уже существующей сессией, как у сотрудника в админке
+        client = Client()
+        session = client.session
+        session["cashier"] = 1
+        session.save()
+        # Прогрев кэша строк списка, чтобы считать только запросы сессии
+        requests["order_list"](client)
+
+        row = []
+        for view, send in requests.items():
+            with CaptureQueriesContext(connection) as queries:
+                send(client)
+            row.append(f"{view}={len(queries)} ({session_queries(queries)})")
+            if storage == "cookie":
+                assert session_queries(queries) == 0
+        counts[name] = row
+
+    print("\nSQL-запросов на запрос (из них к django_session):")
+    for name, row in counts.items():
+        print(f"  {name:<26} {'  '.join(row)}")
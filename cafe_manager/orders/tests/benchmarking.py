@@ -0,0 +1,166 @@
+"""Вспомогательные функции для замеров производительности (bench_*.py)."""
+
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Callable
+
+from django.db import OperationalError, connection, transaction
+
+from orders.items import add_order_items
+from orders.models import Dish, Order, OrderItem
+
+
+def create_board(
+    orders: int, items_per_order: int = 3, dishes: int = 20
+) -> list[Order]:
+    """
+    Быстро создает доску заказов через bulk_create, минуя пересчет сумм.
+
+    Args:
+        orders (int): Количество заказов
+        items_per_order (int): Количество позиций в каждом заказе
+        dishes (int): Размер меню
+
+    Returns:
+        list[Order]: Созданные заказы
+    """
+    menu = Dish.objects.bulk_create(
+        Dish(name=f"Блюдо {i}", price=Decimal(100 + i)) for i in range(dishes)
+    )
+    created = Order.objects.bulk_create(
+        Order(table_number=i % 100 + 1, status=Order.STATUS_CHOICES[i % 3][0])
+        for i in range(orders)
+    )
+    items = []
+    for n, order in enumerate(created):
+        total = Decimal("0.00")
+        for k in range(items_per_order):
+            dish = menu[(n + k) % dishes]
+            items.append(
+                OrderItem(
+                    order=order,
+                    dish=dish,
+                    dish_name=dish.name,
+                    unit_price=dish.price,
+                    quantity=k + 1,
+                    price=dish.price * (k + 1),
+                )
+            )
+            total += dish.price * (k + 1)
+        order.total_price = total
+    OrderItem.objects.bulk_create(items)
+    Order.objects.bulk_update(created, ["total_price"])
+    return created
+
+
+def measure(func: Callable[[], object], repeat: int = 5) -> dict[str, float]:
+    """Выполняет функцию несколько раз и возвращает время в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "max": max(timings),
+    }
+
+
+def report(title: str, rows: dict[str, dict[str, float]]) -> None:
+    """Печатает таблицу замеров (видна при запуске pytest с -s)."""
+    print(f"\n{title}")
+    for name, timing in rows.items():
+        cells = "  ".join(f"{key}={value:9.2f}" for key, value in timing.items())
+        print(f"  {name:<24} {cells}")
+
+
+def retry_locked(func: Callable[[], object], attempts: int = 50) -> object:
+    """
+    Повторяет операцию, пока SQLite отвечает «database is locked».
+
+    Тестовая SQLite в памяти не ждет блокировок, а сразу возвращает ошибку;
+    на PostgreSQL повторов не бывает.
+    """
+    for attempt in range(attempts):
+        try:
+            with transaction.atomic():
+                return func()
+        except OperationalError as e:
+            if "locked" not in str(e) or attempt == attempts - 1:
+                raise
+            time.sleep(0.001 * (attempt + 1))
+
+
+def run_order_workload(
+    order: Order, dishes: list[Dish], workers: int, operations: int
+) -> float:
+    """
+    Параллельно меняет позиции и статус одного заказа из пула потоков.
+
+    Каждый поток добавляет блюда (повторное добавление сливается с
+    позицией), меняет количество и удаляет позиции своих блюд и переключает
+    статус заказа, повторяя пути кода add_items, формсета EditOrderView и
+    update_status. Блюда делятся между потоками, поэтому потоков должно
+    быть не больше, чем блюд.
+
+    Args:
+        order (Order): Заказ под нагрузкой
+        dishes (list[Dish]): Блюда для новых позиций
+        workers (int): Количество потоков
+        operations (int): Количество операций в каждом потоке
+
+    Returns:
+        float: Операций в секунду
+    """
+    statuses = [status for status, _ in Order.STATUS_CHOICES]
+
+    def set_status(status: str) -> None:
+        fresh = Order.objects.get(pk=order.pk)
+        fresh.status = status
+        fresh.save(update_fields=["status", "updated_at"])
+
+    def set_quantity(dish: Dish, quantity: int) -> None:
+        item = OrderItem.objects.get(order_id=order.pk, dish=dish)
+        item.quantity = quantity
+        item.save()
+
+    def remove(dish: Dish) -> None:
+        OrderItem.objects.get(order_id=order.pk, dish=dish).delete()
+
+    def worker(seed: int) -> None:
+        rng = random.Random(seed)
+        menu = dishes[seed::workers]
+        present: list[Dish] = []
+        try:
+            for _ in range(operations):
+                choice = rng.random()
+                if choice < 0.4 or not present:
+                    dish = rng.choice(menu)
+                    retry_locked(
+                        lambda: add_order_items(
+                            Order.objects.get(pk=order.pk),
+                            [(dish, rng.randint(1, 3))],
+                        )
+                    )
+                    if dish not in present:
+                        present.append(dish)
+                elif choice < 0.7:
+                    dish = rng.choice(present)
+                    retry_locked(lambda: set_quantity(dish, rng.randint(1, 5)))
+                elif choice < 0.85:
+                    dish = present.pop(rng.randrange(len(present)))
+                    retry_locked(lambda: remove(dish))
+                else:
+                    retry_locked(lambda: set_status(rng.choice(statuses)))
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in [pool.submit(worker, seed) for seed in range(workers)]:
+            future.result()
+    return workers * operations / (time.perf_counter() - started)
@@ -1,6 +1,8 @@
 import pytest
 from decimal import Decimal
+from django.core.cache import cache
 from django.test import Client
+from orders import detail_cache, metrics
 from orders.models import Order, Dish, OrderItem
 
 
@@ -31,3 +33,6 @@ def clean_db():
     yield
     Order.objects.all().delete()
     Dish.objects.all().delete()
+    cache.clear()
+    metrics.clear()
+    detail_cache.local_cache.clear()
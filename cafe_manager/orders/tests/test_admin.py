@@ -0,0 +1,83 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from orders import metrics
+from orders.models import Order, OrderItem
+from orders.pagination import EstimatedCountPaginator
+
+
+@pytest.mark.django_db
+class TestAdmin:
+    def test_order_item_changelist_has_no_n_plus_one(self, admin_client, dish):
+        url = reverse("admin:orders_orderitem_changelist")
+        order = Order.objects.create(table_number=1)
+        OrderItem.objects.create(order=order, dish=dish, quantity=1)
+        with CaptureQueriesContext(connection) as one:
+            admin_client.get(url)
+
+        for table in range(2, 12):
+            order = Order.objects.create(table_number=table)
+            OrderItem.objects.create(order=order, dish=dish, quantity=1)
+        with CaptureQueriesContext(connection) as many:
+            response = admin_client.get(url)
+
+        assert response.status_code == 200
+        assert len(many) == len(one)
+
+    def test_duplicate_item_is_a_form_error(self, admin_client, order_with_items, dish):
+        response = admin_client.post(
+            reverse("admin:orders_orderitem_add"),
+            {"order": order_with_items.id, "dish": dish.id, "quantity": 1},
+        )
+
+        assert response.status_code == 200
+        assert response.context["adminform"].form.non_field_errors()
+        assert OrderItem.objects.get().quantity == 2
+
+    def test_item_str_does_not_load_order(self, order_with_items):
+        item = OrderItem.objects.get()
+        with CaptureQueriesContext(connection) as queries:
+            assert str(item) == f"2 × Тестовое блюдо (Заказ {order_with_items.id})"
+        assert len(queries) == 0
+
+    def test_bulk_status_action_is_single_update(self, admin_client):
+        orders = [Order.objects.create(table_number=n) for n in (1, 2, 3)]
+        with CaptureQueriesContext(connection) as queries:
+            admin_client.post(
+                reverse("admin:orders_order_changelist"),
+                {
+                    "action": "mark_paid",
+                    "_selected_action": [order.id for order in orders],
+                },
+            )
+
+        updates = [q for q in queries if q["sql"].startswith("UPDATE")]
+        assert len(updates) == 1
+        assert set(Order.objects.values_list("status", flat=True)) == {"paid"}
+
+    def test_status_action_skips_forbidden_transitions(
+        self, admin_client, django_capture_on_commit_callbacks
+    ):
+        pending = Order.objects.create(table_number=1)
+        paid = Order.objects.create(table_number=2, status="paid")
+        with django_capture_on_commit_callbacks(execute=True):
+            response = admin_client.post(
+                reverse("admin:orders_order_changelist"),
+                {"action": "mark_ready", "_selected_action": [pending.id, paid.id]},
+                follow=True,
+            )
+
+        pending.refresh_from_db()
+        paid.refresh_from_db()
+        assert (pending.status, paid.status) == ("ready", "paid")
+        assert [str(m) for m in response.context["messages"]] == [
+            "Обновлено заказов: 1",
+            "Пропущено заказов с недопустимым переходом статуса: 1",
+        ]
+        transitions = metrics.ORDER_STATUS_TRANSITIONS
+        assert transitions.labels("pending", "ready").value == 1
+        assert transitions.labels("paid", "ready").value == 0
+
+    def test_estimated_count_falls_back_to_count(self, order):
+        assert EstimatedCountPaginator(Order.objects.all(), 10).count == 1
@@ -0,0 +1,201 @@
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+from django.utils import timezone
+from orders.branches import BRANCH_COOKIE, order_databases
+from orders.items import add_order_items
+from orders.models import Branch, DailyReport, Order, OrderItem
+from orders.receipts import render_shift
+from orders.routers import BranchRouter
+
+
+@pytest.fixture
+def branch():
+    return Branch.objects.create(name="Второй", code="second")
+
+
+@pytest.fixture
+def branch_orders(branch):
+    main = Order.objects.create(table_number=1, status="paid", total_price="100.00")
+    other = Order.objects.create(
+        table_number=2, status="paid", total_price="250.00", branch=branch
+    )
+    return main, other
+
+
+@pytest.mark.django_db
+class TestBranchScoping:
+    def test_list_is_scoped_and_branch_is_remembered(self, client, branch_orders):
+        main, other = branch_orders
+        url = reverse("order_list")
+
+        assert list(client.get(url).context["orders"]) == [main]
+
+        response = client.get(url, {"branch": other.branch_id})
+        assert list(response.context["orders"]) == [other]
+        assert response.cookies[BRANCH_COOKIE].value == str(other.branch_id)
+        # Выбранный филиал сохраняется в cookie для следующих страниц
+        assert list(client.get(url).context["orders"]) == [other]
+
+    def test_api_uses_branch_header(self, client, branch_orders):
+        main, other = branch_orders
+        url = reverse("order-list")
+
+        response = client.get(url, headers={"X-Branch": str(other.branch_id)})
+        assert [row["id"] for row in response.json()["results"]] == [other.id]
+
+        detail = reverse("order-detail", args=[other.id])
+        assert client.get(detail).status_code == 404
+        assert client.get(detail, {"branch": other.branch_id}).status_code == 200
+
+    def test_invalid_branch_is_rejected(self, client):
+        response = client.get(reverse("order_list"), {"branch": "main"})
+        assert response.status_code == 400
+
+    def test_invalid_branch_is_not_echoed(self, client):
+        response = client.get(
+            reverse("order_list"), {"branch": "<script>alert(1)</script>"}
+        )
+        assert response.status_code == 400
+        assert response["Content-Type"].startswith("text/plain")
+        assert b"<script>" not in response.content
+
+    def test_unknown_branch_is_rejected(self, client, branch):
+        response = client.post(
+            reverse("order-list") + "?branch=999",
+            {"table_number": 5},
+            content_type="application/json",
+        )
+        assert response.status_code == 400
+        assert not Order.objects.exists()
+
+        client.cookies[BRANCH_COOKIE] = "999"
+        response = client.get(reverse("order_list"))
+        assert response.status_code == 400
+        assert response.cookies[BRANCH_COOKIE].value == ""
+
+        # Созданный филиал виден сразу, без ожидания кэша
+        assert (
+            client.get(reverse("order_list"), {"branch": branch.id}).status_code == 200
+        )
+
+    def test_table_receipt_covers_only_request_branch(
+        self, client, settings, branch, dish
+    ):
+        settings.ORDERS_RECEIPTS_EAGER = True
+        add_order_items(Order.objects.create(table_number=5), [(dish, 1)])
+        other = Order.objects.create(table_number=5, branch=branch)
+        add_order_items(other, [(dish, 3)])
+        headers = {"X-Branch": str(branch.id)}
+
+        text = client.get(
+            reverse("table_receipt", args=[5, "txt"]), headers=headers
+        ).content.decode()
+        assert text.splitlines()[-1].endswith("300.00")
+
+        order_url = reverse("order_receipt", args=[other.id, "txt"])
+        assert client.get(order_url).status_code == 404
+        assert client.get(order_url, headers=headers).status_code == 200
+
+    def test_changes_feed_is_scoped(self, client, branch_orders):
+        main, other = branch_orders
+        url = reverse("order-changes")
+        headers = {"X-Branch": str(other.branch_id)}
+
+        feed = client.get(url, {"since": "0"}, headers=headers).json()
+        assert [order["id"] for order in feed["changed"]] == [other.id]
+        main.delete()
+        other_delta = client.get(url, {"since": feed["token"]}, headers=headers)
+        assert other_delta.json()["deleted"] == []
+
+        # Токен одного филиала не принимается в другом
+        assert client.get(url, {"since": feed["token"]}).status_code == 400
+
+    def test_statistics_and_revenue_per_branch(self, client, branch_orders):
+        _, other = branch_orders
+        params = {"branch": other.branch_id}
+
+        stats = client.get(reverse("order-statistics"), params).json()
+        assert stats["total_orders"] == 1
+        assert stats["total_revenue"] == 250.0
+
+        window = client.get(reverse("order-statistics"), {**params, "bucket": "day"})
+        assert window.json()["total_orders"] == 1
+        assert client.get(reverse("order-statistics")).json()["total_orders"] == 1
+
+        revenue = client.get(reverse("revenue"), params).context["total_revenue"]
+        assert revenue == Decimal("250.00")
+
+    def test_day_is_closed_per_branch(self, client, branch_orders):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        Order.objects.update(created_at=timezone.now() - timedelta(days=1))
+        call_command("close_day")
+        params = {"branch": branch_orders[1].branch_id}
+
+        assert DailyReport.objects.count() == 2
+        detail = reverse("dailyreport-detail", args=[yesterday])
+        assert client.get(detail).json()["revenue"] == "100.00"
+        assert client.get(detail, params).json()["revenue"] == "250.00"
+        revenue = client.get(reverse("revenue"), params).context["report"]
+        assert revenue["revenue"] == "250.00"
+
+    def test_shift_receipts_are_rendered_per_branch(self, branch, dish):
+        add_order_items(Order.objects.create(table_number=1), [(dish, 1)])
+        other = Order.objects.create(table_number=1, branch=branch)
+        add_order_items(other, [(dish, 2)])
+
+        rendered = list(render_shift(timezone.localdate(), "txt", branch.id, workers=1))
+        assert [order_id for order_id, _ in rendered] == [other.id]
+
+    def test_new_order_and_items_belong_to_request_branch(self, client, branch, dish):
+        response = client.post(
+            reverse("order-list"),
+            {"table_number": 5},
+            content_type="application/json",
+            headers={"X-Branch": str(branch.id)},
+        )
+        order = Order.objects.get(pk=response.json()["id"])
+        add_order_items(order, [(dish, 2)])
+
+        assert order.branch == branch
+        assert list(OrderItem.objects.for_branch(branch.id)) == list(order.items.all())
+        assert not OrderItem.objects.for_branch(1).exists()
+
+
+@pytest.mark.django_db
+class TestBranchRouter:
+    @pytest.fixture(autouse=True)
+    def branch_databases(self, settings):
+        settings.ORDERS_BRANCH_DATABASES = {2: "branch2"}
+
+    def test_queries_go_to_branch_database(self):
+        assert Order.objects.for_branch(2).db == "branch2"
+        assert Order.objects.for_branch(1).db == "default"
+
+    def test_new_rows_are_written_to_branch_database(self):
+        router = BranchRouter()
+        order = Order(table_number=1, branch_id=2)
+
+        assert router.db_for_write(Order, instance=order) == "branch2"
+        assert router.db_for_write(Order, instance=Order(table_number=1)) == "default"
+        item = OrderItem(order=order)
+        assert router.db_for_write(OrderItem, instance=item) == "branch2"
+        assert router.db_for_read(Branch) == "default"
+
+    def test_maintenance_covers_every_order_database(self):
+        assert order_databases() == ["default", "branch2"]
+
+    def test_branch_database_holds_only_orders_tables(self):
+        router = BranchRouter()
+
+        assert router.allow_migrate("branch2", "orders") is True
+        assert router.allow_migrate("branch2", "auth") is False
+        assert router.allow_migrate("default", "auth") is None
+
+    def test_init_requires_separate_database(self):
+        with pytest.raises(CommandError):
+            call_command("init_branch_database", "1")
+        with pytest.raises(CommandError):
+            call_command("init_branch_database", "2")
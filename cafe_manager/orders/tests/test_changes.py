@@ -0,0 +1,119 @@
+import pytest
+from datetime import timedelta
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from orders.changes import make_token, parse_token
+from orders.models import Order, OrderTombstone
+
+
+def get_changes(client, since):
+    return client.get(reverse("order-changes"), {"since": since})
+
+
+@pytest.mark.django_db
+class TestOrderChanges:
+    def test_full_sync_then_delta(self, client, order_with_items, settings):
+        settings.ORDERS_CHANGES_OVERLAP = 0
+        first = get_changes(client, "0").json()
+        assert [order["id"] for order in first["changed"]] == [order_with_items.id]
+        assert first["changed"][0]["items"][0]["quantity"] == 2
+
+        untouched = Order.objects.create(table_number=3)
+        Order.objects.filter(pk=untouched.pk).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+        order_with_items.status = "ready"
+        order_with_items.save()
+        removed = Order.objects.create(table_number=4)
+        removed.soft_delete()
+
+        delta = get_changes(client, first["token"]).json()
+        assert [order["id"] for order in delta["changed"]] == [order_with_items.id]
+        assert delta["deleted"] == [removed.id]
+        assert delta["token"].startswith(f"{order_with_items.branch_id}.")
+        assert parse_token(delta["token"])[0] >= parse_token(first["token"])[0]
+        assert delta["has_more"] is False
+
+    def test_overlap_catches_late_commits(self, client, order):
+        token = make_token(timezone.now())
+        Order.objects.filter(pk=order.pk).update(
+            updated_at=timezone.now() - timedelta(seconds=2)
+        )
+
+        delta = get_changes(client, token).json()
+        assert [changed["id"] for changed in delta["changed"]] == [order.id]
+
+    def test_purged_and_hard_deleted_orders_leave_tombstones(self, client, order):
+        token = make_token(timezone.now() - timedelta(days=40))
+        old = Order.objects.create(table_number=2)
+        Order.all_objects.filter(pk=old.pk).update(
+            deleted_at=timezone.now() - timedelta(days=31),
+            updated_at=timezone.now() - timedelta(days=31),
+        )
+        call_command("purge_deleted_orders")
+        order_id = order.id
+        order.delete()
+
+        assert OrderTombstone.objects.count() == 2
+        delta = get_changes(client, token).json()
+        assert delta["deleted"] == sorted([old.id, order_id])
+
+    def test_invalid_token(self, client):
+        assert get_changes(client, "вчера").status_code == 400
+        assert get_changes(client, "1.2.3.4").status_code == 400
+
+    def test_pages_follow_continuation_token(self, client, settings):
+        settings.ORDERS_CHANGES_OVERLAP = 0
+        orders = [Order.objects.create(table_number=n) for n in range(1, 6)]
+        url = reverse("order-changes")
+
+        seen = []
+        since = "0"
+        while True:
+            page = client.get(url, {"since": since, "limit": 2}).json()
+            assert len(page["changed"]) <= 2
+            seen.extend(order["id"] for order in page["changed"])
+            since = page["token"]
+            if not page["has_more"]:
+                break
+            # Заказ, измененный между страницами, приходит на следующей
+            if len(seen) == 2:
+                orders[0].save()
+
+        assert seen == [order.id for order in orders] + [orders[0].id]
+        # Итоговый токен — начало первой страницы: изменение во время обхода
+        # повторяется в следующей дельте
+        after = client.get(url, {"since": since}).json()["changed"]
+        assert [order["id"] for order in after] == [orders[0].id]
+        assert client.get(url, {"since": "0", "limit": 0}).status_code == 400
+
+    def test_order_deleted_during_full_sync_is_reported(self, client, settings):
+        settings.ORDERS_CHANGES_OVERLAP = 0
+        orders = [Order.objects.create(table_number=n) for n in range(1, 4)]
+        url = reverse("order-changes")
+
+        page = client.get(url, {"since": "0", "limit": 2}).json()
+        orders[0].soft_delete()
+        page = client.get(url, {"since": page["token"], "limit": 2}).json()
+        assert page["has_more"] is False
+
+        delta = client.get(url, {"since": page["token"]}).json()
+        assert delta["deleted"] == [orders[0].id]
+
+    def test_expired_token_requires_full_sync(self, client, settings):
+        settings.ORDERS_TOMBSTONE_TTL_DAYS = 30
+        token = make_token(timezone.now() - timedelta(days=31))
+        assert get_changes(client, token).status_code == 410
+
+    def test_old_tombstones_are_pruned(self, settings):
+        settings.ORDERS_TOMBSTONE_TTL_DAYS = 30
+        now = timezone.now()
+        for age in (1, 31, 45):
+            OrderTombstone.objects.create(
+                order_id=age, deleted_at=now - timedelta(days=age)
+            )
+
+        call_command("prune_order_tombstones", batch_size=1)
+
+        assert list(OrderTombstone.objects.values_list("order_id", flat=True)) == [1]
@@ -0,0 +1,63 @@
+import pytest
+from datetime import timedelta
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.utils import timezone
+from orders.management.commands.importtime import ImportRecord, parse_importtime
+from orders.management.commands.prune_sessions import prune_expired_sessions
+from orders.models import Order, OrderItem
+
+
+@pytest.mark.django_db
+class TestImportTime:
+    def test_parse_importtime(self):
+        output = "\n".join(
+            [
+                "import time: self [us] | cumulative | imported package",
+                "import time:       120 |        120 |     orders.models",
+                "import time:        35 |        155 |   orders",
+                "Traceback (most recent call last):",
+            ]
+        )
+        assert parse_importtime(output) == [
+            ImportRecord(module="orders.models", self_us=120, cumulative_us=120),
+            ImportRecord(module="orders", self_us=35, cumulative_us=155),
+        ]
+
+
+@pytest.mark.django_db
+class TestPurgeDeletedOrders:
+    def test_purges_only_old_soft_deleted_orders(self, order_with_items):
+        fresh = Order.objects.create(table_number=2)
+        fresh.soft_delete()
+        Order.all_objects.filter(pk=order_with_items.pk).update(
+            deleted_at=timezone.now() - timedelta(days=31)
+        )
+
+        call_command("purge_deleted_orders", batch_size=1)
+
+        assert not Order.all_objects.filter(pk=order_with_items.pk).exists()
+        assert not OrderItem.objects.filter(order_id=order_with_items.pk).exists()
+        assert Order.all_objects.filter(pk=fresh.pk).exists()
+
+
+@pytest.mark.django_db
+class TestPruneSessions:
+    def test_deletes_only_expired_db_sessions(self, settings):
+        settings.SESSION_ENGINE = "django.contrib.sessions.backends.db"
+        Session.objects.create(
+            session_key="expired", session_data="", expire_date=timezone.now()
+        )
+        Session.objects.create(
+            session_key="active",
+            session_data="",
+            expire_date=timezone.now() + timedelta(days=1),
+        )
+
+        call_command("prune_sessions", batch_size=1)
+
+        assert list(Session.objects.values_list("session_key", flat=True)) == ["active"]
+
+    def test_cookie_sessions_need_no_cleanup(self, settings):
+        settings.SESSION_ENGINE = "django.contrib.sessions.backends.signed_cookies"
+        assert prune_expired_sessions() == 0
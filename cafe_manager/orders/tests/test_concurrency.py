@@ -0,0 +1,21 @@
+import pytest
+from decimal import Decimal
+from orders.models import Dish, Order
+
+from benchmarking import run_order_workload
+
+
+@pytest.mark.django_db(transaction=True, serialized_rollback=True)
+class TestConcurrentOrderWrites:
+    def test_total_matches_items_after_parallel_writes(self):
+        dishes = [
+            Dish.objects.create(name=f"Блюдо {n}", price=Decimal(100 + n))
+            for n in range(5)
+        ]
+        order = Order.objects.create(table_number=1)
+
+        run_order_workload(order, dishes, workers=4, operations=25)
+
+        order.refresh_from_db()
+        prices = list(order.items.values_list("price", flat=True))
+        assert order.total_price == sum(prices, Decimal("0.00"))
@@ -0,0 +1,74 @@
+import pytest
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from orders.detail_cache import CACHE_RESULTS, LRUCache, local_cache
+from orders.models import Dish, OrderItem
+
+
+def results(tier, result):
+    return CACHE_RESULTS.labels(tier, result).value
+
+
+@pytest.mark.django_db
+class TestOrderDetailCache:
+    def test_lru_evicts_least_recently_used(self):
+        lru = LRUCache(maxsize=2)
+        lru.set(1, "a")
+        lru.set(2, "b")
+        lru.get(1)
+        lru.set(3, "c")
+
+        assert lru.get(2) is None
+        assert lru.get(1) == "a" and lru.get(3) == "c"
+
+    def test_repeated_retrieve_hits_local_then_shared_tier(
+        self, client, order_with_items
+    ):
+        url = reverse("order-detail", args=[order_with_items.id])
+        first = client.get(url).json()
+
+        with CaptureQueriesContext(connection) as queries:
+            second = client.get(url).json()
+        assert second == first
+        assert len(queries) == 1
+        assert results("local", "hit") == 1
+
+        local_cache.clear()
+        client.get(url)
+        assert results("shared", "hit") == 1
+        assert results("shared", "miss") == 1
+
+    def test_add_items_and_status_refresh_detail(self, client, order_with_items):
+        url = reverse("order-detail", args=[order_with_items.id])
+        client.get(url)
+        soup = Dish.objects.create(name="Суп", price=Decimal("50.00"))
+
+        client.post(
+            reverse("order-add-items", args=[order_with_items.id]),
+            [{"dish": soup.id, "quantity": 1}],
+            content_type="application/json",
+        )
+        data = client.get(url).json()
+        assert len(data["items"]) == 2
+        assert data["total_price"] == "250.00"
+
+        order_with_items.refresh_from_db()
+        order_with_items.status = "ready"
+        order_with_items.save()
+        assert client.get(url).json()["status"] == "ready"
+
+    def test_dish_change_does_not_affect_sold_items(self, client, order_with_items):
+        url = reverse("order-detail", args=[order_with_items.id])
+        client.get(url)
+        Dish.objects.update(name="Переименовано")
+        cache.clear()
+        local_cache.clear()
+
+        item = client.get(url).json()["items"][0]
+        assert item["dish"]["name"] == OrderItem.objects.get().dish_name
+
+    def test_missing_order(self, client):
+        assert client.get(reverse("order-detail", args=[999])).status_code == 404
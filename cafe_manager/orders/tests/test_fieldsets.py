@@ -0,0 +1,48 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+    def test_full_response_by_default(self, client, order_with_items):
+        data = client.get(reverse("order-list")).json()
+        assert "items" in data["results"][0]
+
+    def test_lean_list_skips_items(self, client, order_with_items):
+        params = {
+            "fields": "id,table_number,status,total_price",
+            "pagination": "cursor",
+        }
+        with CaptureQueriesContext(connection) as queries:
+            data = client.get(reverse("order-list"), params).json()
+
+        assert len(queries) == 1
+        assert "orderitem" not in queries[0]["sql"].lower()
+        assert "search_text" not in queries[0]["sql"]
+        assert data["results"] == [
+            {
+                "id": order_with_items.id,
+                "table_number": 1,
+                "status": "pending",
+                "total_price": "200.00",
+            }
+        ]
+
+    def test_expand_items(self, client, order_with_items):
+        response = client.get(
+            reverse("order-detail", args=[order_with_items.id]),
+            {"fields": "id", "expand": "items"},
+        )
+
+        data = response.json()
+        assert set(data) == {"id", "items"}
+        assert data["items"][0]["dish"]["name"] == "Тестовое блюдо"
+
+    def test_dish_fields_and_unknown_field(self, client, dish):
+        data = client.get(reverse("dish-list"), {"fields": "name"}).json()
+        assert data["results"] == [{"name": "Тестовое блюдо"}]
+
+        response = client.get(reverse("order-list"), {"fields": "id,secret"})
+        assert response.status_code == 400
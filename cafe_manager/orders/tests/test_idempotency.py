@@ -0,0 +1,70 @@
+import pytest
+from datetime import timedelta
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from orders.idempotency import IDEMPOTENCY_HEADER, REPLAYED_HEADER
+from orders.models import IdempotencyKey, Order, OrderItem
+
+HEADERS = {"headers": {IDEMPOTENCY_HEADER: "pos-1-request-42"}}
+
+
+@pytest.mark.django_db
+class TestIdempotency:
+    def test_retried_create_returns_stored_response(self, client):
+        url = reverse("order-list")
+        data = {"table_number": 5}
+
+        first = client.post(url, data, content_type="application/json", **HEADERS)
+        retry = client.post(url, data, content_type="application/json", **HEADERS)
+
+        assert first.status_code == retry.status_code == 201
+        assert retry.json()["id"] == first.json()["id"]
+        assert retry[REPLAYED_HEADER] == "true"
+        assert Order.objects.count() == 1
+
+    def test_retried_add_items_does_not_duplicate(self, client, order, dish):
+        url = reverse("order-add-items", args=[order.id])
+        data = [{"dish": dish.id, "quantity": 1}]
+
+        client.post(url, data, content_type="application/json", **HEADERS)
+        retry = client.post(url, data, content_type="application/json", **HEADERS)
+
+        assert retry.status_code == 200
+        assert list(
+            OrderItem.objects.filter(order=order).values_list("quantity", flat=True)
+        ) == [1]
+
+    def test_same_key_with_other_body_is_rejected(self, client):
+        url = reverse("order-list")
+        client.post(
+            url, {"table_number": 5}, content_type="application/json", **HEADERS
+        )
+        reused = client.post(
+            url, {"table_number": 6}, content_type="application/json", **HEADERS
+        )
+
+        assert reused.status_code == 422
+        assert list(Order.objects.values_list("table_number", flat=True)) == [5]
+
+    def test_expired_key_is_executed_again(self, client):
+        url = reverse("order-list")
+        client.post(
+            url, {"table_number": 5}, content_type="application/json", **HEADERS
+        )
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        client.post(
+            url, {"table_number": 5}, content_type="application/json", **HEADERS
+        )
+        assert Order.objects.count() == 2
+
+    def test_prune_command_removes_expired_keys(self):
+        now = timezone.now()
+        IdempotencyKey.objects.create(key_hash="a" * 64, expires_at=now - timedelta(1))
+        IdempotencyKey.objects.create(key_hash="b" * 64, expires_at=now + timedelta(1))
+
+        call_command("prune_idempotency_keys", batch_size=1)
+        assert list(IdempotencyKey.objects.values_list("key_hash", flat=True)) == [
+            "b" * 64
+        ]
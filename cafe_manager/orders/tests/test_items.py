@@ -0,0 +1,150 @@
+import pytest
+from decimal import Decimal
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from orders.items import add_order_items
+from orders.models import Dish, Order, OrderItem
+
+
+def item_rows(order):
+    return list(
+        OrderItem.objects.filter(order=order)
+        .order_by("dish_id")
+        .values_list("dish_id", "quantity", "price")
+    )
+
+
+@pytest.mark.django_db
+class TestItemCoalescing:
+    def test_repeated_add_items_increments_quantity(self, client, order, dish):
+        url = reverse("order-add-items", args=[order.id])
+        for quantity in (1, 2):
+            response = client.post(
+                url,
+                [{"dish": dish.id, "quantity": quantity}],
+                content_type="application/json",
+            )
+            assert response.status_code == 200
+
+        order.refresh_from_db()
+        assert item_rows(order) == [(dish.id, 3, Decimal("300.00"))]
+        assert order.total_price == Decimal("300.00")
+
+    def test_duplicates_in_one_request_are_merged(self, client, order, dish):
+        url = reverse("order-add-items", args=[order.id])
+        data = [{"dish": dish.id, "quantity": 1}, {"dish": dish.id, "quantity": 4}]
+        client.post(url, data, content_type="application/json")
+
+        assert item_rows(order) == [(dish.id, 5, Decimal("500.00"))]
+
+    def test_new_price_gets_its_own_item(self, client, order, dish):
+        url = reverse("order-add-items", args=[order.id])
+        for price in ("100.00", "150.00", "150.00"):
+            dish.price = Decimal(price)
+            dish.save()
+            client.post(
+                url, [{"dish": dish.id, "quantity": 1}], content_type="application/json"
+            )
+
+        order.refresh_from_db()
+        assert list(
+            order.items.order_by("unit_price").values_list(
+                "unit_price", "quantity", "price"
+            )
+        ) == [
+            (Decimal("100.00"), 1, Decimal("100.00")),
+            (Decimal("150.00"), 2, Decimal("300.00")),
+        ]
+        assert order.total_price == Decimal("400.00")
+
+    def test_quantity_edit_after_price_change_keeps_sold_price(
+        self, client, order, dish
+    ):
+        add_order_items(order, [(dish, 1)])
+        dish.price = Decimal("150.00")
+        dish.save()
+        add_order_items(order, [(dish, 1)])
+        first, second = order.items.order_by("id")
+        data = {
+            "table_number": 1,
+            "form-TOTAL_FORMS": "2",
+            "form-INITIAL_FORMS": "2",
+            "form-0-id": first.id,
+            "form-0-dish": dish.id,
+            "form-0-quantity": 2,
+            "form-1-id": second.id,
+            "form-1-dish": dish.id,
+            "form-1-quantity": 1,
+        }
+        response = client.post(reverse("edit_order", args=[order.id]), data)
+
+        order.refresh_from_db()
+        assert response.status_code == 302
+        assert order.total_price == Decimal("350.00")
+
+    def test_create_view_merges_same_dish(self, client, dish):
+        data = {
+            "table_number": 1,
+            "form-TOTAL_FORMS": "2",
+            "form-INITIAL_FORMS": "0",
+            "form-0-dish": dish.id,
+            "form-0-quantity": 2,
+            "form-1-dish": dish.id,
+            "form-1-quantity": 1,
+        }
+        response = client.post(reverse("add_order"), data)
+
+        order = Order.objects.get()
+        assert response.status_code == 302
+        assert item_rows(order) == [(dish.id, 3, Decimal("300.00"))]
+        assert order.total_price == Decimal("300.00")
+
+    def test_edit_view_merges_changed_dish(self, client, order_with_items, dish):
+        soup = Dish.objects.create(name="Суп", price=Decimal("50.00"))
+        OrderItem.objects.create(order=order_with_items, dish=soup, quantity=1)
+        first, second = OrderItem.objects.filter(order=order_with_items).order_by("id")
+        data = {
+            "table_number": 1,
+            "form-TOTAL_FORMS": "2",
+            "form-INITIAL_FORMS": "2",
+            "form-0-id": first.id,
+            "form-0-dish": dish.id,
+            "form-0-quantity": 2,
+            "form-1-id": second.id,
+            "form-1-dish": dish.id,
+            "form-1-quantity": 1,
+        }
+        response = client.post(reverse("edit_order", args=[order_with_items.id]), data)
+
+        order_with_items.refresh_from_db()
+        assert response.status_code == 302
+        assert item_rows(order_with_items) == [(dish.id, 3, Decimal("300.00"))]
+        assert order_with_items.total_price == Decimal("300.00")
+
+
+@pytest.mark.django_db(transaction=True, serialized_rollback=True)
+class TestCompactOrderItems:
+    def test_command_merges_existing_duplicates(self, order, dish, monkeypatch):
+        # Данные до миграции: таблица без ограничения (SQLite пересоздает
+        # таблицу по _meta модели, поэтому ограничение убирается и оттуда)
+        (constraint,) = OrderItem._meta.constraints
+        with monkeypatch.context() as patch, connection.schema_editor() as editor:
+            patch.setattr(OrderItem._meta, "constraints", [])
+            editor.remove_constraint(OrderItem, constraint)
+        try:
+            for quantity in (1, 2):
+                OrderItem.objects.create(order=order, dish=dish, quantity=quantity)
+            order.refresh_from_db()
+            updated_at = order.updated_at
+
+            call_command("compact_order_items", batch_size=1)
+
+            order.refresh_from_db()
+            assert item_rows(order) == [(dish.id, 3, Decimal("300.00"))]
+            assert order.total_price == Decimal("300.00")
+            assert order.updated_at > updated_at
+        finally:
+            OrderItem.objects.all().delete()
+            with connection.schema_editor() as editor:
+                editor.add_constraint(OrderItem, constraint)
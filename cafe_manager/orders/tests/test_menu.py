@@ -0,0 +1,76 @@
+import gzip
+import json
+import pytest
+from decimal import Decimal
+from django.urls import reverse
+from orders.models import Dish, MenuState
+
+
+@pytest.mark.django_db
+class TestMenuVersions:
+    def test_every_change_bumps_menu_version(self, dish):
+        created_version = dish.version
+        dish.price = Decimal("120.00")
+        dish.save()
+
+        assert dish.version == created_version + 1
+        assert MenuState.current() == dish.version
+
+
+@pytest.mark.django_db
+class TestMenuSnapshot:
+    def test_snapshot_is_gzipped_with_strong_etag(self, client, dish):
+        response = client.get(
+            reverse("dish-snapshot"), headers={"Accept-Encoding": "gzip"}
+        )
+
+        assert response.status_code == 200
+        assert response["Content-Encoding"] == "gzip"
+        assert response["ETag"] == f'"menu-{dish.version}-gzip"'
+        payload = json.loads(gzip.decompress(response.content))
+        assert payload == {
+            "version": dish.version,
+            "dishes": [{"id": dish.id, "name": dish.name, "price": "100.00"}],
+        }
+
+    def test_snapshot_not_modified(self, client, dish):
+        url = reverse("dish-snapshot")
+        etag = client.get(url)["ETag"]
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+        dish.price = Decimal("90.00")
+        dish.save()
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert json.loads(response.content)["dishes"][0]["price"] == "90.00"
+
+    def test_snapshot_etag_is_matched_as_a_whole(self, client, dish):
+        url = reverse("dish-snapshot")
+        etag = client.get(url)["ETag"]
+
+        listed = client.get(url, headers={"If-None-Match": f'"other", W/{etag}'})
+        assert listed.status_code == 304
+        # Заголовок, лишь содержащий ETag как подстроку, не совпадает
+        garbled = client.get(url, headers={"If-None-Match": f'"x{etag}"'})
+        assert garbled.status_code == 200
+
+
+@pytest.mark.django_db
+class TestMenuChanges:
+    def test_changes_since_version(self, client, dish):
+        since = MenuState.current()
+        other = Dish.objects.create(name="Суп", price=Decimal("50.00"))
+        deleted_id = dish.id
+        dish.delete()
+
+        response = client.get(reverse("dish-changes"), {"since": since})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["version"] == MenuState.current()
+        assert [d["id"] for d in data["changed"]] == [other.id]
+        assert data["deleted"] == [deleted_id]
+
+    def test_changes_requires_since(self, client):
+        response = client.get(reverse("dish-changes"))
+        assert response.status_code == 400
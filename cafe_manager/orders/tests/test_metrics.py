@@ -0,0 +1,95 @@
+import pytest
+from datetime import timedelta
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from orders import metrics
+from orders.models import Order
+
+
+@pytest.mark.django_db
+class TestMetrics:
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.Histogram("test_seconds", "Тест", buckets=(1, 5))
+        metrics.REGISTRY.remove(histogram)
+        child = histogram.labels()
+        for value in (0.5, 1, 3, 10):
+            child.observe(value)
+
+        lines = histogram.collect()
+        assert 'test_seconds_bucket{le="1"} 2' in lines
+        assert 'test_seconds_bucket{le="5"} 3' in lines
+        assert 'test_seconds_bucket{le="+Inf"} 4' in lines
+        assert "test_seconds_sum 14.5" in lines
+        assert "test_seconds_count 4" in lines
+
+    def test_base_metric_is_abstract(self):
+        registered = len(metrics.REGISTRY)
+        with pytest.raises(TypeError):
+            metrics._Metric("test_total", "Тест")
+        assert len(metrics.REGISTRY) == registered
+
+    def test_order_create_and_status_transitions(
+        self, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            order = Order.objects.create(table_number=1)
+        Order.objects.filter(pk=order.pk).update(
+            created_at=timezone.now() - timedelta(minutes=10)
+        )
+        assert metrics.ORDERS_CREATED.labels().value == 1
+
+        order = Order.objects.get(pk=order.pk)
+        with django_capture_on_commit_callbacks(execute=True):
+            order.table_number = 2
+            order.save()
+            order.status = "ready"
+            order.save()
+            order.save()
+
+        transitions = metrics.ORDER_STATUS_TRANSITIONS
+        assert transitions.labels("pending", "ready").value == 1
+        pending = metrics.ORDER_STATUS_DURATION.labels("pending")
+        assert pending.count == 1
+        assert 600 <= pending.sum < 660
+        assert metrics.ORDERS_CREATED.labels().value == 1
+
+    def test_rolled_back_changes_are_not_counted(
+        self, order, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            with pytest.raises(RuntimeError), transaction.atomic():
+                Order.objects.create(table_number=2)
+                order.status = "paid"
+                order.save()
+                raise RuntimeError
+
+        assert metrics.ORDERS_CREATED.labels().value == 0
+        assert metrics.ORDER_STATUS_TRANSITIONS.labels("pending", "paid").value == 0
+
+    def test_metrics_endpoint(self, client, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            order = Order.objects.create(table_number=1)
+            client.post(
+                reverse("order-update-status", args=[order.id]),
+                {"status": "paid"},
+                content_type="application/json",
+            )
+        response = client.get(reverse("metrics"))
+
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+        body = response.content.decode()
+        assert "cafe_orders_created_total 1" in body
+        assert (
+            'cafe_order_status_transitions_total{from_status="pending",'
+            'to_status="paid"} 1' in body
+        )
+        assert (
+            'cafe_http_request_duration_seconds_count{view="order-update-status",'
+            'method="POST"} 1' in body
+        )
+
+    def test_metrics_endpoint_can_be_disabled(self, client, settings):
+        settings.ORDERS_METRICS_ENABLED = False
+        assert client.get(reverse("metrics")).status_code == 404
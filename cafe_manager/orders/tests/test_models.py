@@ -8,18 +8,16 @@ class TestOrderModel:
     def test_update_total_price(self, order_with_items):
         assert order_with_items.total_price == Decimal("200.00")
 
-        OrderItem.objects.create(
-            order=order_with_items, dish=Dish.objects.first(), quantity=1
-        )
+        soup = Dish.objects.create(name="Суп", price=Decimal("100.00"))
+        OrderItem.objects.create(order=order_with_items, dish=soup, quantity=1)
         order_with_items.update_total_price()
         assert order_with_items.total_price == Decimal("300.00")
 
     def test_get_total_items(self, order_with_items):
         assert order_with_items.get_total_items() == 1
 
-        OrderItem.objects.create(
-            order=order_with_items, dish=Dish.objects.first(), quantity=1
-        )
+        soup = Dish.objects.create(name="Суп", price=Decimal("100.00"))
+        OrderItem.objects.create(order=order_with_items, dish=soup, quantity=1)
         assert order_with_items.get_total_items() == 2
 
 
@@ -36,3 +34,24 @@ class TestOrderItem:
         order_with_items.items.all().delete()
         order_with_items.refresh_from_db()
         assert order_with_items.total_price == Decimal("0.00")
+
+    def test_dish_snapshot_survives_menu_changes(self, order_with_items, dish):
+        dish.name = "Новое название"
+        dish.price = Decimal("150.00")
+        dish.save()
+
+        item = order_with_items.items.get()
+        assert item.dish_name == "Тестовое блюдо"
+        assert item.unit_price == Decimal("100.00")
+
+        item.quantity = 3
+        item.save()
+        assert item.price == Decimal("300.00")
+
+    def test_changing_dish_refreshes_snapshot(self, order_with_items):
+        other = Dish.objects.create(name="Другое блюдо", price=Decimal("50.00"))
+        item = order_with_items.items.get()
+        item.dish = other
+        item.save()
+        assert item.dish_name == "Другое блюдо"
+        assert item.price == Decimal("100.00")
@@ -0,0 +1,79 @@
+import pytest
+from django.urls import reverse
+from orders.models import Order
+
+
+def create_orders(count):
+    return [Order.objects.create(table_number=n % 100 + 1) for n in range(count)]
+
+
+@pytest.mark.django_db
+class TestOrderPagination:
+    def test_page_number_mode_is_default(self, client):
+        create_orders(3)
+        data = client.get(reverse("order-list"), {"page_size": 2}).json()
+
+        assert data["count"] == 3
+        assert len(data["results"]) == 2
+
+    def test_page_size_is_capped(self, client, settings):
+        settings.ORDERS_MAX_PAGE_SIZE = 2
+        create_orders(3)
+        data = client.get(
+            reverse("order-list"), {"pagination": "cursor", "page_size": 50}
+        ).json()
+
+        assert len(data["results"]) == 2
+
+    def test_cursor_pages_do_not_shift_on_insert(self, client):
+        orders = create_orders(5)
+        first = client.get(
+            reverse("order-list"), {"pagination": "cursor", "page_size": 2}
+        ).json()
+        assert "count" not in first
+
+        Order.objects.create(table_number=9)
+        second = client.get(first["next"]).json()
+
+        seen = [order["id"] for order in first["results"] + second["results"]]
+        assert seen == [order.id for order in reversed(orders)][:4]
+
+    def test_resume_returns_only_new_orders(self, client):
+        create_orders(2)
+        data = client.get(
+            reverse("order-list"),
+            {"pagination": "cursor", "ordering": "id", "page_size": 10},
+        ).json()
+        assert data["next"] is None
+
+        new = Order.objects.create(table_number=5)
+        resumed = client.get(data["resume"]).json()
+        assert [order["id"] for order in resumed["results"]] == [new.id]
+
+        again = client.get(resumed["resume"]).json()
+        assert again["results"] == []
+        assert again["resume"] == resumed["resume"]
+
+    def test_created_at_ordering(self, client):
+        orders = create_orders(3)
+        data = client.get(
+            reverse("order-list"), {"pagination": "cursor", "ordering": "created_at"}
+        ).json()
+
+        assert [order["id"] for order in data["results"]] == [o.id for o in orders]
+
+    def test_exact_count_below_threshold(self, client):
+        create_orders(2)
+        data = client.get(reverse("order-list")).json()
+
+        assert data["count"] == 2
+        assert data["count_approximate"] is False
+
+    def test_estimated_count_is_flagged(self, client, monkeypatch):
+        monkeypatch.setattr(
+            "orders.pagination.estimated_count", lambda queryset: (250_000, True)
+        )
+        data = client.get(reverse("dish-list")).json()
+
+        assert data["count"] == 250_000
+        assert data["count_approximate"] is True
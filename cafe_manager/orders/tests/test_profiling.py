@@ -0,0 +1,89 @@
+import time
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.urls import reverse
+from orders.api_views import OrderViewSet
+from orders.profiling import (
+    PROFILE_FILE_SUFFIX,
+    SamplingProfiler,
+    read_collapsed,
+    should_profile,
+)
+
+
+def busy_wait(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+@pytest.mark.django_db
+class TestSamplingProfiler:
+    def test_collects_collapsed_stacks(self, tmp_path):
+        with SamplingProfiler("bench", interval=0.0005) as profiler:
+            busy_wait(0.05)
+
+        path = profiler.dump(tmp_path)
+        samples = read_collapsed(path)
+        assert sum(samples.values()) > 0
+        assert all(stack.startswith("bench;") for stack in samples)
+        assert any("busy_wait" in stack for stack in samples)
+
+    def test_aggregate_profiles_command(self, tmp_path, capsys):
+        (tmp_path / f"OrderListView-1-1{PROFILE_FILE_SUFFIX}").write_text("a;b 2\n")
+        (tmp_path / f"OrderListView-2-1{PROFILE_FILE_SUFFIX}").write_text(
+            "a;b 3\na 1\n"
+        )
+        (tmp_path / f"DishViewSet-3-1{PROFILE_FILE_SUFFIX}").write_text("c 7\n")
+
+        call_command("aggregate_profiles", dir=tmp_path, view="OrderListView")
+        assert capsys.readouterr().out == "a 1\na;b 5\n"
+
+
+@pytest.mark.django_db
+class TestProfiledViews:
+    def test_disabled_profiling_writes_nothing(self, client, settings, tmp_path):
+        settings.ORDERS_PROFILING_DIR = tmp_path
+        response = client.get(reverse("order_list"), headers={"X-Profile": "1"})
+        assert response.status_code == 200
+        assert list(tmp_path.iterdir()) == []
+
+    def test_anonymous_header_is_ignored(self, client, settings, tmp_path):
+        settings.ORDERS_PROFILING_ENABLED = True
+        settings.ORDERS_PROFILING_SECRET = "s3cret"
+        settings.ORDERS_PROFILING_DIR = tmp_path
+        for value in ("1", "wrong"):
+            response = client.get(reverse("order-list"), headers={"X-Profile": value})
+            assert response.status_code == 200
+        assert list(tmp_path.iterdir()) == []
+
+    def test_staff_may_use_header(self, rf, settings, admin_user):
+        settings.ORDERS_PROFILING_ENABLED = True
+        request = rf.get("/", headers={"X-Profile": "1"})
+
+        request.user = admin_user
+        assert should_profile(request)
+        request.user = AnonymousUser()
+        assert not should_profile(request)
+
+    def test_header_enables_profiling(self, client, settings, tmp_path, monkeypatch):
+        settings.ORDERS_PROFILING_ENABLED = True
+        settings.ORDERS_PROFILING_SECRET = "s3cret"
+        settings.ORDERS_PROFILING_DIR = tmp_path
+        settings.ORDERS_PROFILING_INTERVAL = 0.0005
+        # Запрос должен длиться дольше интервала, иначе выборок может не быть
+        original_list = OrderViewSet.list
+
+        def slow_list(self, request, *args, **kwargs):
+            busy_wait(0.05)
+            return original_list(self, request, *args, **kwargs)
+
+        monkeypatch.setattr(OrderViewSet, "list", slow_list)
+        response = client.get(reverse("order-list"), headers={"X-Profile": "s3cret"})
+
+        assert response.status_code == 200
+        dumps = list(tmp_path.iterdir())
+        assert dumps
+        assert all(path.name.startswith("OrderViewSet-") for path in dumps)
+        assert any("slow_list" in stack for stack in read_collapsed(dumps[0]))
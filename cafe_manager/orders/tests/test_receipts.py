@@ -0,0 +1,124 @@
+import pytest
+from decimal import Decimal
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from orders import receipts
+from orders.items import add_order_items
+from orders.models import Dish, Order
+
+
+@pytest.fixture
+def eager(settings):
+    settings.ORDERS_RECEIPTS_EAGER = True
+
+
+def rendered(fmt="txt"):
+    return receipts.RECEIPTS.labels(fmt, "rendered").value
+
+
+@pytest.mark.django_db
+class TestReceipts:
+    def test_order_text_receipt(self, client, eager, order_with_items):
+        response = client.get(
+            reverse("order_receipt", args=[order_with_items.id, "txt"])
+        )
+
+        text = response.content.decode()
+        assert response.status_code == 200
+        assert response["Content-Type"] == "text/plain; charset=utf-8"
+        assert f"Заказ {order_with_items.id}" in text
+        assert "Тестовое блюдо" in text
+        assert text.splitlines()[-1].endswith("200.00")
+
+    def test_order_pdf_is_rendered_in_process_pool(self, client, order_with_items):
+        try:
+            response = client.get(
+                reverse("order_receipt", args=[order_with_items.id, "pdf"])
+            )
+        finally:
+            receipts.shutdown_pool()
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/pdf"
+        assert response.content.startswith(b"%PDF")
+
+    def test_receipt_is_cached_until_order_changes(
+        self, client, eager, order_with_items, dish
+    ):
+        url = reverse("order_receipt", args=[order_with_items.id, "txt"])
+        first = client.get(url).content
+        assert client.get(url).content == first
+        assert rendered() == 1
+
+        add_order_items(order_with_items, [(dish, 1)])
+        assert client.get(url).content != first
+        assert rendered() == 2
+
+    def test_table_receipt_covers_unpaid_orders(self, client, eager, dish):
+        soup = Dish.objects.create(name="Суп", price=Decimal("50.00"))
+        for status, entries in (
+            ("pending", [(dish, 1)]),
+            ("ready", [(dish, 1), (soup, 2)]),
+            ("paid", [(soup, 5)]),
+        ):
+            add_order_items(
+                Order.objects.create(table_number=4, status=status), entries
+            )
+
+        text = client.get(reverse("table_receipt", args=[4, "txt"])).content.decode()
+        assert "2 × 100.00" in text
+        assert "2 × 50.00" in text
+        assert text.splitlines()[-1].endswith("300.00")
+        assert client.get(reverse("table_receipt", args=[5, "txt"])).status_code == 404
+
+    def test_full_pool_answers_503(self, client, settings, order_with_items):
+        settings.ORDERS_RECEIPTS_QUEUE_TIMEOUT = 0
+        _, slots = receipts.get_pool()
+        taken = 0
+        while slots.acquire(blocking=False):
+            taken += 1
+        try:
+            response = client.get(
+                reverse("order_receipt", args=[order_with_items.id, "txt"])
+            )
+        finally:
+            for _ in range(taken):
+                slots.release()
+            receipts.shutdown_pool()
+
+        assert response.status_code == 503
+        assert "Retry-After" in response
+
+    def test_slow_render_answers_503(self, client, settings, order_with_items):
+        # Запуск процесса пула через spawn дольше нулевого ожидания
+        settings.ORDERS_RECEIPTS_RENDER_TIMEOUT = 0
+        try:
+            response = client.get(
+                reverse("order_receipt", args=[order_with_items.id, "pdf"])
+            )
+        finally:
+            receipts.shutdown_pool()
+
+        assert response.status_code == 503
+        assert "Retry-After" in response
+
+    def test_unknown_format_is_404(self, client, order_with_items):
+        url = reverse("order_receipt", args=[order_with_items.id, "docx"])
+        assert client.get(url).status_code == 404
+
+    def test_batch_renders_shift(self, tmp_path, order_with_items, dish):
+        other = Order.objects.create(table_number=2)
+        add_order_items(other, [(dish, 1)])
+
+        call_command(
+            "render_receipts", "--format=pdf", "--workers=2", f"--output={tmp_path}"
+        )
+
+        shift = tmp_path / timezone.localdate().isoformat() / "branch-1"
+        files = sorted(shift.iterdir())
+        assert [path.name for path in files] == [
+            f"order-{order_with_items.id}.pdf",
+            f"order-{other.id}.pdf",
+        ]
+        assert all(path.read_bytes().startswith(b"%PDF") for path in files)
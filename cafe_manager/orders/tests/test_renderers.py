@@ -0,0 +1,56 @@
+import json
+import pytest
+from decimal import Decimal
+from django.urls import reverse
+from orders.models import Dish, Order, OrderItem
+from orders.renderers import COLUMNAR_MEDIA_TYPE, decode_columnar, encode_columnar
+
+
+@pytest.mark.django_db
+class TestColumnarRenderer:
+    def test_roundtrip_keeps_dish_snapshots_apart(self):
+        data = [
+            {"id": 1, "dish": {"id": 5, "name": "Суп", "price": "100.00"}},
+            {"id": 2, "dish": {"id": 5, "name": "Суп", "price": "100.00"}},
+            {"id": 3, "dish": {"id": 5, "name": "Суп", "price": "120.00"}},
+        ]
+        document = encode_columnar(data)
+
+        assert document["data"] == {
+            "columns": ["id", "dish"],
+            "rows": [[1, 0], [2, 0], [3, 1]],
+        }
+        assert len(document["dictionaries"]["dish"]["rows"]) == 2
+        assert decode_columnar(document) == data
+
+    def test_order_list_negotiates_columnar(self, client, order_with_items, dish):
+        other = Order.objects.create(table_number=2)
+        OrderItem.objects.create(order=other, dish=dish, quantity=1)
+        url = reverse("order-list")
+
+        plain = client.get(url).json()
+        response = client.get(url, HTTP_ACCEPT=COLUMNAR_MEDIA_TYPE)
+
+        assert response["Content-Type"] == COLUMNAR_MEDIA_TYPE
+        document = json.loads(response.content)
+        assert len(document["dictionaries"]["dish"]["rows"]) == 1
+        assert decode_columnar(document) == plain
+        assert len(response.content) < len(json.dumps(plain).encode())
+
+    def test_dish_list_and_format_override(self, client, dish):
+        Dish.objects.create(name="Суп", price=Decimal("250.00"))
+        response = client.get(reverse("dish-list"), {"format": "columnar"})
+
+        results = json.loads(response.content)["data"]["results"]
+        assert results["columns"] == ["id", "name", "price"]
+        assert len(results["rows"]) == 2
+
+    def test_parser_accepts_columnar_body(self, client):
+        response = client.post(
+            reverse("order-list"),
+            json.dumps({"dictionaries": {}, "data": {"table_number": 4}}),
+            content_type=COLUMNAR_MEDIA_TYPE,
+        )
+
+        assert response.status_code == 201
+        assert Order.objects.get().table_number == 4
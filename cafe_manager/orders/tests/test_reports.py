@@ -0,0 +1,94 @@
+import pytest
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+from django.utils import timezone
+from orders.items import add_order_items
+from orders.models import DailyReport, Dish, Order
+
+
+@pytest.fixture
+def yesterday():
+    return timezone.localdate() - timedelta(days=1)
+
+
+@pytest.fixture
+def closed_orders(yesterday, dish):
+    soup = Dish.objects.create(name="Суп", price=Decimal("50.00"))
+    noon = timezone.make_aware(datetime.combine(yesterday, time(12)))
+    for table, status, entries in (
+        (1, "paid", [(dish, 2)]),
+        (1, "paid", [(soup, 1)]),
+        (2, "pending", [(dish, 1)]),
+    ):
+        order = Order.objects.create(table_number=table, status=status)
+        add_order_items(order, entries)
+        Order.objects.filter(pk=order.pk).update(created_at=noon)
+    # Заказ сегодняшнего дня в отчет не попадает
+    add_order_items(Order.objects.create(table_number=3, status="paid"), [(soup, 4)])
+
+
+@pytest.mark.django_db
+class TestCloseDay:
+    def test_report_totals(self, client, closed_orders, yesterday):
+        call_command("close_day")
+
+        response = client.get(reverse("dailyreport-detail", args=[yesterday]))
+        report = response.json()
+        assert response.status_code == 200
+        assert report["day"] == yesterday.isoformat()
+        assert report["orders"] == 3
+        assert report["paid_orders"] == 2
+        assert report["revenue"] == "250.00"
+        assert report["average_ticket"] == "125.00"
+        assert report["by_status"] == [
+            {"status": "paid", "orders": 2, "amount": "250.00"},
+            {"status": "pending", "orders": 1, "amount": "100.00"},
+        ]
+        assert report["by_table"] == [
+            {"table_number": 1, "orders": 2, "revenue": "250.00"},
+            {"table_number": 2, "orders": 1, "revenue": "0.00"},
+        ]
+        assert [(row["name"], row["quantity"]) for row in report["by_dish"]] == [
+            ("Тестовое блюдо", 2),
+            ("Суп", 1),
+        ]
+
+    def test_closed_day_is_immutable(self, closed_orders, yesterday):
+        call_command("close_day", f"--date={yesterday}")
+        stored = DailyReport.objects.get().data
+
+        Order.objects.update(status="paid")
+        call_command("close_day", f"--date={yesterday}")
+
+        assert DailyReport.objects.get().data == stored
+        with pytest.raises(ValueError):
+            DailyReport.objects.get().save()
+
+    def test_unfinished_day_is_rejected(self):
+        with pytest.raises(CommandError):
+            call_command("close_day", f"--date={timezone.localdate()}")
+        assert not DailyReport.objects.exists()
+
+    def test_revenue_page_shows_stored_report(self, client, closed_orders, yesterday):
+        call_command("close_day")
+        url = reverse("revenue")
+
+        response = client.get(url, {"day": yesterday.isoformat()})
+        assert response.status_code == 200
+        assert response.context["report"]["revenue"] == "250.00"
+        assert list(response.context["report_days"]) == [yesterday]
+
+        assert client.get(url, {"day": "2001-01-01"}).status_code == 404
+        assert client.get(url, {"day": "вчера"}).status_code == 404
+
+    def test_api_lists_closed_days(self, client, closed_orders, yesterday):
+        call_command("close_day")
+
+        response = client.get(reverse("dailyreport-list"))
+        assert [row["day"] for row in response.json()["results"]] == [
+            yesterday.isoformat()
+        ]
+        missing = client.get(reverse("dailyreport-detail", args=["2001-02-30"]))
+        assert missing.status_code == 404
@@ -0,0 +1,58 @@
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.urls import reverse
+from django.utils import timezone
+from orders.models import Dish, Order, OrderItem
+from orders.search import parse_query
+
+
+@pytest.fixture
+def tiramisu():
+    return Dish.objects.create(name="Тирамису", price=Decimal("300.00"))
+
+
+@pytest.mark.django_db
+class TestOrderSearch:
+    def test_parse_query(self):
+        query = parse_query("table 7 with tiramisu today")
+        assert query.table_number == 7
+        assert query.terms == ["tiramisu"]
+        assert query.created_from <= timezone.now() < query.created_to
+
+    def test_short_terms_are_ignored(self):
+        query = parse_query("стол 7 ок чай")
+        assert query.table_number == 7
+        assert query.terms == ["чай"]
+
+    def test_search_text_follows_items(self, order_with_items, tiramisu):
+        assert order_with_items.search_text == "тестовое блюдо"
+
+        item = OrderItem.objects.create(
+            order=order_with_items, dish=tiramisu, quantity=1
+        )
+        order_with_items.refresh_from_db()
+        assert order_with_items.search_text == "тестовое блюдо | тирамису"
+
+        item.delete()
+        order_with_items.refresh_from_db()
+        assert order_with_items.search_text == "тестовое блюдо"
+
+    def test_list_view_and_api_search(self, client, dish, tiramisu):
+        match = Order.objects.create(table_number=7)
+        OrderItem.objects.create(order=match, dish=tiramisu, quantity=1)
+        other_table = Order.objects.create(table_number=8)
+        OrderItem.objects.create(order=other_table, dish=tiramisu, quantity=1)
+        other_dish = Order.objects.create(table_number=7)
+        OrderItem.objects.create(order=other_dish, dish=dish, quantity=1)
+        yesterday = Order.objects.create(table_number=7)
+        OrderItem.objects.create(order=yesterday, dish=tiramisu, quantity=1)
+        Order.objects.filter(pk=yesterday.pk).update(
+            created_at=timezone.now() - timedelta(days=1)
+        )
+
+        response = client.get(reverse("order_list"), {"q": "стол 7 тирамису сегодня"})
+        assert [order.id for order in response.context["orders"]] == [match.id]
+
+        response = client.get(reverse("order-list"), {"q": "стол 7 тирамису сегодня"})
+        assert [order["id"] for order in response.json()["results"]] == [match.id]
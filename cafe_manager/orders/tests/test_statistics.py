@@ -0,0 +1,67 @@
+import pytest
+from datetime import timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from orders.models import Order
+from orders.statistics import parse_window
+
+
+def create_order_at(created_at, status="pending", total="100.00"):
+    order = Order.objects.create(table_number=1)
+    Order.objects.filter(pk=order.pk).update(
+        created_at=created_at, status=status, total_price=total
+    )
+    return order
+
+
+@pytest.mark.django_db
+class TestStatistics:
+    def test_all_time_totals(self, client, order):
+        create_order_at(timezone.now(), status="paid", total="250.00")
+
+        with CaptureQueriesContext(connection) as queries:
+            data = client.get(reverse("order-statistics")).json()
+
+        assert len(queries) == 1
+        assert data["total_orders"] == 2
+        assert data["total_revenue"] == 250.0
+        assert data["orders_by_status"] == [
+            {"status": "paid", "count": 1},
+            {"status": "pending", "count": 1},
+        ]
+
+    def test_parse_window_aligns_to_buckets(self):
+        window = parse_window("2026-01-01T10:30:00", "2026-01-01T12:10:00", "hour")
+
+        assert window.start.hour == 10 and window.start.minute == 0
+        assert window.end.hour == 13
+        assert len(window.bucket_starts()) == 3
+        with pytest.raises(ValueError):
+            parse_window(None, None, "week")
+
+    def test_hourly_buckets_cache_closed_hours(self, client):
+        now = timezone.now()
+        create_order_at(now - timedelta(hours=2), status="paid", total="100.00")
+        create_order_at(now - timedelta(hours=2))
+        create_order_at(now)
+        url = reverse("order-statistics")
+        params = {"from": (now - timedelta(hours=3)).isoformat(), "bucket": "hour"}
+
+        data = client.get(url, params).json()
+        assert data["total_orders"] == 3
+        assert data["total_revenue"] == 100.0
+        counts = [bucket["orders"] for bucket in data["buckets"]]
+        assert counts == [0, 2, 0, 1]
+        assert data["buckets"][1]["by_status"] == {"paid": 1, "pending": 1}
+
+        # Закрытые часы берутся из кэша, текущий пересчитывается
+        create_order_at(now - timedelta(hours=2))
+        create_order_at(now)
+        data = client.get(url, params).json()
+        assert [bucket["orders"] for bucket in data["buckets"]] == [0, 2, 0, 2]
+
+    def test_invalid_window(self, client):
+        response = client.get(reverse("order-statistics"), {"from": "вчера"})
+        assert response.status_code == 400
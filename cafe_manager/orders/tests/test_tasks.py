@@ -0,0 +1,144 @@
+import pytest
+from datetime import timedelta
+from django.core.management import call_command
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from orders import tasks
+from orders.models import Order, OutboxJob
+from orders.tasks import (
+    TASK_INVALIDATE_STATISTICS,
+    TASK_ORDER_CHANGED,
+    enqueue,
+    notify_order_changed,
+    order_changed,
+    process_pending,
+    run_job,
+)
+
+
+@pytest.fixture(autouse=True)
+def eager_tasks(settings):
+    settings.ORDERS_TASKS_EAGER = True
+    settings.ORDERS_TASKS_MAX_ATTEMPTS = 2
+
+
+@pytest.fixture
+def received_events():
+    events = []
+
+    def receiver(sender, order_id, event, **kwargs):
+        events.append((order_id, event))
+
+    order_changed.connect(receiver)
+    yield events
+    order_changed.disconnect(receiver)
+
+
+@pytest.fixture
+def failing_task(monkeypatch):
+    def failing() -> None:
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(tasks._registry, "test_failing", failing)
+
+
+@pytest.mark.django_db
+class TestOutbox:
+    def test_job_runs_after_commit(
+        self, order, received_events, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            enqueue(TASK_ORDER_CHANGED, order_id=order.id, event="created")
+            assert received_events == []
+
+        assert received_events == [(order.id, "created")]
+        assert not OutboxJob.objects.exists()
+
+    def test_failed_job_is_retried_then_marked_failed(self, failing_task):
+        job = OutboxJob.objects.create(name="test_failing")
+
+        assert run_job(job.id) is not None
+        job.refresh_from_db()
+        assert job.status == OutboxJob.STATUS_PENDING
+        assert job.attempts == 1
+        assert job.last_error == "boom"
+
+        OutboxJob.objects.filter(pk=job.id).update(available_at=job.created_at)
+        assert process_pending() == 1
+        job.refresh_from_db()
+        assert job.status == OutboxJob.STATUS_FAILED
+        assert job.attempts == 2
+
+    def test_no_job_without_listeners(self, client, order):
+        assert notify_order_changed(order, "updated") == []
+        client.post(
+            reverse("order-list"), {"table_number": 3}, content_type="application/json"
+        )
+        assert not OutboxJob.objects.exists()
+
+    def test_unknown_task_is_rejected(self):
+        with pytest.raises(LookupError):
+            enqueue("missing")
+
+    def test_process_outbox_command(self, order, received_events):
+        OutboxJob.objects.create(
+            name=TASK_ORDER_CHANGED, payload={"order_id": order.id, "event": "updated"}
+        )
+        call_command("process_outbox")
+        assert received_events == [(order.id, "updated")]
+
+    def test_create_order_api_enqueues_event(
+        self, client, received_events, django_capture_on_commit_callbacks
+    ):
+        url = reverse("order-list")
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(
+                url, {"table_number": 3}, content_type="application/json"
+            )
+        assert response.status_code == 201
+        assert received_events == [(response.json()["id"], "created")]
+
+    def test_jobs_are_bound_to_order_database(self, order, monkeypatch):
+        Order.objects.filter(pk=order.pk).update(
+            created_at=timezone.now() - timedelta(hours=2)
+        )
+        order.refresh_from_db()
+        commits = []
+        monkeypatch.setattr(
+            transaction, "on_commit", lambda func, using: commits.append(using)
+        )
+
+        [job] = notify_order_changed(order, "updated")
+        assert job.name == TASK_INVALIDATE_STATISTICS
+        assert job._state.db == order._state.db
+        assert commits == [order._state.db]
+
+    def test_order_change_resets_closed_statistics(
+        self, client, order_with_items, django_capture_on_commit_callbacks
+    ):
+        order = order_with_items
+        Order.objects.filter(pk=order.pk).update(
+            created_at=timezone.now() - timedelta(hours=2)
+        )
+        url = reverse("order-statistics")
+        params = {
+            "from": (timezone.now() - timedelta(hours=3)).isoformat(),
+            "bucket": "hour",
+        }
+        assert client.get(url, params).json()["total_revenue"] == 0
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(
+                reverse("order-update-status", args=[order.id]),
+                {"status": "paid"},
+                content_type="application/json",
+            )
+        assert response.status_code == 200
+        # Закрытая корзина сброшена задачей и пересчитана, не дожидаясь TTL
+        assert client.get(url, params).json()["total_revenue"] == 200.0
+        assert not OutboxJob.objects.exists()
+
+    def test_new_order_skips_statistics_job(self, order):
+        assert notify_order_changed(order, "created") == []
+        assert not OutboxJob.objects.exists()
@@ -1,6 +1,11 @@
 import pytest
 from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from orders.fragments import CSRF_PLACEHOLDER
+from orders.items import add_order_items
 from orders.models import Order
 
 
@@ -11,6 +16,37 @@ class TestOrderViews:
         response = client.get(url)
         assert response.status_code == 200
 
+    def test_order_list_rows_get_request_csrf_token(self, client, order_with_items):
+        url = reverse("order_list")
+        client.get(url)
+        response = client.get(url)
+        content = response.content.decode()
+        assert content.count('name="csrfmiddlewaretoken"') == 2
+        assert CSRF_PLACEHOLDER not in content
+        assert "csrftoken" in response.cookies
+
+    def test_order_list_row_cache_follows_updated_at(self, client, order_with_items):
+        url = reverse("order_list")
+        assert "status-pending" in client.get(url).content.decode()
+
+        order_with_items.status = "ready"
+        order_with_items.save()
+        assert "status-ready" in client.get(url).content.decode()
+
+    def test_order_list_items_are_prefetched(self, client, order_with_items, dish):
+        def count_queries():
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                client.get(reverse("order_list"))
+            return len(queries)
+
+        single = count_queries()
+        for table_number in (2, 3):
+            add_order_items(
+                Order.objects.create(table_number=table_number), [(dish, 1)]
+            )
+        assert count_queries() == single
+
     def test_create_order(self, client, dish):
         url = reverse("add_order")
         data = {
@@ -41,6 +77,15 @@ class TestOrderViews:
         response = client.post(url)
         assert response.status_code == 302
         assert not Order.objects.filter(id=order_with_items.id).exists()
+        assert Order.all_objects.get(id=order_with_items.id).deleted_at is not None
+
+    def test_paid_order_is_not_deleted(self, client, order_with_items):
+        order_with_items.status = "paid"
+        order_with_items.save()
+
+        response = client.post(reverse("delete_order", args=[order_with_items.id]))
+        assert response.status_code == 302
+        assert Order.objects.filter(id=order_with_items.id).exists()
 
 
 @pytest.mark.django_db
@@ -56,6 +101,13 @@ class TestOrderAPI:
         assert response.status_code == 201
         assert Order.objects.count() == 1
 
+    def test_delete_order_api_is_soft(self, client, order_with_items):
+        url = reverse("order-detail", args=[order_with_items.id])
+        response = client.delete(url)
+        assert response.status_code == 204
+        assert client.get(url).status_code == 404
+        assert order_with_items.items.count() == 1
+
     def test_update_status_api(self, client, order_with_items):
         url = reverse("order-update-status", args=[order_with_items.id])
         response = client.post(
@@ -63,8 +115,24 @@ class TestOrderAPI:
         )
         assert response.status_code == 200
 
+    def test_order_detail_serves_items_without_dish_join(
+        self, client, order_with_items, dish
+    ):
+        url = reverse("order-detail", args=[order_with_items.id])
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+
+        assert response.json()["items"][0]["dish"] == {
+            "id": dish.id,
+            "name": dish.name,
+            "price": "100.00",
+        }
+        assert not any("orders_dish" in query["sql"] for query in queries)
+
     def test_add_items_api(self, client, order, dish):
         url = reverse("order-add-items", args=[order.id])
         data = [{"dish": dish.id, "quantity": 3}]
         response = client.post(url, data, content_type="application/json")
-        assert response.status_code == 400
+        assert response.status_code == 200
+        order.refresh_from_db()
+        assert order.total_price == Decimal("300.00")
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .api_views import OrderViewSet, DishViewSet
+from .api_views import OrderViewSet, DishViewSet, DailyReportViewSet
 from .views import (
     OrderListView,
     OrderCreateView,
@@ -8,11 +8,14 @@ from .views import (
     DeleteOrderView,
     RevenueView,
     EditOrderView,
+    MetricsView,
+    ReceiptView,
 )
 
 router = DefaultRouter()
 router.register("orders", OrderViewSet, basename="order")
 router.register("dishes", DishViewSet)
+router.register("reports", DailyReportViewSet)
 
 urlpatterns = [
     path("api/", include(router.urls)),
@@ -22,4 +25,15 @@ urlpatterns = [
     path("delete_order/<int:pk>/", DeleteOrderView.as_view(), name="delete_order"),
     path("revenue/", RevenueView.as_view(), name="revenue"),
     path("edit/<int:pk>/", EditOrderView.as_view(), name="edit_order"),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
+    path(
+        "receipts/order/<int:pk>.<str:fmt>",
+        ReceiptView.as_view(),
+        name="order_receipt",
+    ),
+    path(
+        "receipts/table/<int:table_number>.<str:fmt>",
+        ReceiptView.as_view(),
+        name="table_receipt",
+    ),
 ]
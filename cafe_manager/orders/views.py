@@ -1,5 +1,8 @@
+from datetime import date
+from functools import partial
+from django.conf import settings
 from django.contrib import messages
-from django.db.models import Sum, QuerySet
+from django.db.models import Sum, QuerySet, prefetch_related_objects
 from django.urls import reverse_lazy
 from django.views.generic import (
     ListView,
@@ -7,14 +10,27 @@ from django.views.generic import (
     CreateView,
     UpdateView,
     DeleteView,
+    View,
 )
-from typing import Any
-from django.http import HttpResponse, HttpRequest
-from django.db.transaction import atomic
+from typing import Any, Optional
+from django.http import Http404, HttpResponse, HttpRequest, HttpResponseRedirect
 from django.forms import BaseForm, ModelForm
 
+from .branches import (
+    BranchScopedMixin,
+    atomic_in_request_branch,
+    get_request_branch,
+)
 from .forms import OrderForm, OrderItemFormSet
-from .models import Order, OrderItem
+from . import metrics
+from .fragments import DEFAULT_ROW_CACHE_TIMEOUT, inject_csrf_token, uncached_rows
+from .items import add_order_items, save_item_formset
+from .models import DailyReport, Order, OrderItem
+from .profiling import ProfiledViewMixin
+from .receipts import ReceiptsBusyError, get_order_receipt, get_table_receipt
+from .reports import load_report
+from .search import search_orders
+from .tasks import EVENT_CREATED, EVENT_DELETED, EVENT_UPDATED, notify_order_changed
 
 STATUS_PAID: str = "paid"
 STATUS_READY: str = "ready"
@@ -29,14 +45,19 @@ MSG_ORDER_DELETED: str = "Заказ #{} удален"
 MSG_ERROR_DELETING: str = "Ошибка при удалении заказа #{}: {}"
 
 
-class OrderListView(ListView):
+class OrderListView(ProfiledViewMixin, BranchScopedMixin, ListView):
     """
     Представление для отображения списка заказов с возможностью фильтрации и сортировки.
 
     Поддерживает:
+    - Поиск по запросу вида «стол 7 тирамису сегодня» (параметр q)
     - Фильтрацию по номеру столика
     - Фильтрацию по статусу
     - Сортировку по статусу (asc/desc)
+
+    Показываются только заказы филиала запроса (см. orders.branches).
+    Строки заказов кэшируются фрагментами по ``id`` и ``updated_at``;
+    CSRF-токен подставляется в них после рендеринга.
     """
 
     model = Order
@@ -52,10 +73,14 @@ class OrderListView(ListView):
         """
         queryset = super().get_queryset()
 
+        query = self.request.GET.get("q")
         table_number = self.request.GET.get("table_number")
         status = self.request.GET.get("status")
         sort_status = self.request.GET.get("sort_status", SORT_ASC)
 
+        if query:
+            queryset = search_orders(queryset, query)
+
         if table_number:
             queryset = queryset.filter(table_number=table_number)
 
@@ -68,20 +93,35 @@ class OrderListView(ListView):
 
     def get_context_data(self, **kwargs) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
+        # Позиции нужны только строкам, которых нет в кэше фрагментов: они
+        # загружаются одним запросом, а не запросом на каждый заказ
+        prefetch_related_objects(uncached_rows(context["orders"]), "items")
+        context["current_query"] = self.request.GET.get("q", "")
         context["current_table"] = self.request.GET.get("table_number", "")
         context["current_status"] = self.request.GET.get("status", "")
         context["sort_status"] = self.request.GET.get("sort_status", "asc")
+        context["row_cache_timeout"] = getattr(
+            settings, "ORDERS_ROW_CACHE_TIMEOUT", DEFAULT_ROW_CACHE_TIMEOUT
+        )
         return context
 
+    def render_to_response(
+        self, context: dict[str, Any], **response_kwargs: Any
+    ) -> HttpResponse:
+        response = super().render_to_response(context, **response_kwargs)
+        response.add_post_render_callback(partial(inject_csrf_token, self.request))
+        return response
+
 
-class OrderCreateView(CreateView):
+class OrderCreateView(ProfiledViewMixin, CreateView):
     """
     Представление для создания нового заказа.
 
     Особенности:
     - Создание заказа с множественными позициями через формсет
     - Валидация наличия хотя бы одной позиции
-    - Атомарное создание заказа (транзакция)
+    - Атомарное создание заказа (транзакция в базе филиала)
+    - Заказ создается в филиале запроса
     """
 
     model = Order
@@ -98,7 +138,7 @@ class OrderCreateView(CreateView):
             context["formset"] = OrderItemFormSet(queryset=OrderItem.objects.none())
         return context
 
-    @atomic
+    @atomic_in_request_branch
     def form_valid(self, form: ModelForm) -> HttpResponse:
         """
         Обрабатывает валидную форму создания заказа.
@@ -120,6 +160,7 @@ class OrderCreateView(CreateView):
                 messages.error(self.request, "Ошибка в позициях заказа")
                 return self.form_invalid(form)
 
+            form.instance.branch_id = get_request_branch(self.request)
             self.object = form.save()
 
             order_items = formset.save(commit=False)
@@ -130,10 +171,11 @@ class OrderCreateView(CreateView):
                 self.object.delete()
                 return self.form_invalid(form)
 
-            for item in order_items:
-                item.order = self.object
-                item.save()
+            add_order_items(
+                self.object, ((item.dish, item.quantity) for item in order_items)
+            )
 
+            notify_order_changed(self.object, EVENT_CREATED)
             messages.success(self.request, MSG_ORDER_CREATED.format(self.object.id))
             return super().form_valid(form)
 
@@ -142,7 +184,7 @@ class OrderCreateView(CreateView):
             return self.form_invalid(form)
 
 
-class UpdateStatusView(UpdateView):
+class UpdateStatusView(ProfiledViewMixin, BranchScopedMixin, UpdateView):
     """
     Представление для обновления статуса заказа.
 
@@ -168,14 +210,22 @@ class UpdateStatusView(UpdateView):
         Returns:
             HttpResponse: Ответ с редиректом
         """
+        # Сохраняется только статус, чтобы не затереть сумму, пересчитанную
+        # параллельно с открытой формой
+        self.object = form.save(commit=False)
+        self.object.save(update_fields=["status", "updated_at"])
+        notify_order_changed(self.object, EVENT_UPDATED)
         messages.success(self.request, f"Статус заказа #{self.object.id} обновлен")
-        return super().form_valid(form)
+        return HttpResponseRedirect(self.get_success_url())
 
 
-class DeleteOrderView(DeleteView):
+class DeleteOrderView(ProfiledViewMixin, BranchScopedMixin, DeleteView):
     """
     Представление для удаления заказа.
 
+    Заказ удаляется мягко (одним UPDATE поля ``deleted_at``); физически
+    его и позиции удаляет команда ``purge_deleted_orders``.
+
     Attributes:
         model: Модель заказа
         success_url: URL для редиректа после успешного удаления
@@ -184,45 +234,55 @@ class DeleteOrderView(DeleteView):
     model = Order
     success_url = reverse_lazy("order_list")
 
-    def delete(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+    def form_valid(self, form: BaseForm) -> HttpResponse:
         """
         Удаление заказа с проверкой возможности удаления.
 
         Args:
-            request: HTTP запрос
-            *args: Позиционные аргументы
-            **kwargs: Именованные аргументы
+            form: Форма подтверждения удаления
 
         Returns:
             HttpResponse: Ответ с редиректом
         """
-        order: Order = self.get_object()
+        order: Order = self.object
         order_id: int = order.id
 
         try:
             if order.status == STATUS_PAID:
-                messages.error(request, f"Нельзя удалить оплаченный заказ #{order_id}")
-                return self.get(request, *args, **kwargs)
+                messages.error(
+                    self.request, f"Нельзя удалить оплаченный заказ #{order_id}"
+                )
+            else:
+                order.soft_delete()
+                notify_order_changed(order, EVENT_DELETED)
+                messages.success(self.request, MSG_ORDER_DELETED.format(order_id))
+        except Exception as e:
+            messages.error(self.request, MSG_ERROR_DELETING.format(order_id, str(e)))
 
-            response: HttpResponse = super().delete(request, *args, **kwargs)
-            messages.success(request, MSG_ORDER_DELETED.format(order_id))
-            return response
+        return HttpResponseRedirect(self.get_success_url())
 
-        except Exception as e:
-            messages.error(request, MSG_ERROR_DELETING.format(order_id, str(e)))
-            return self.get(request, *args, **kwargs)
+    def delete(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        self.object = self.get_object()
+        return self.form_valid(self.get_form())
 
 
-class RevenueView(TemplateView):
+class RevenueView(ProfiledViewMixin, TemplateView):
     """
     Представление для отображения выручки.
 
+    Выручка и Z-отчеты берутся по филиалу запроса. Кроме выручки показывает
+    Z-отчет закрытого дня: ``?day=`` или последний закрытый (см.
+    orders.reports). Отчет читается готовым, без агрегатов по заказам.
+
     Attributes:
         template_name: Шаблон страницы
     """
 
     template_name = "orders/revenue.html"
 
+    # Сколько последних закрытых дней показывать в списке
+    REPORT_DAYS: int = 30
+
     def get_context_data(self, **kwargs) -> dict[str, Any]:
         """
         Получение контекста с данными о выручке.
@@ -232,18 +292,39 @@ class RevenueView(TemplateView):
 
         Returns:
             Dict[str, Any]: Контекст шаблона с данными о выручке
+
+        Raises:
+            Http404: Если ``?day=`` некорректен или день не закрыт
         """
         context: dict[str, Any] = super().get_context_data(**kwargs)
+        branch_id = get_request_branch(self.request)
         context["total_revenue"] = (
-            Order.objects.filter(status=STATUS_PAID).aggregate(
-                total=Sum("total_price")
-            )["total"]
+            Order.objects.for_branch(branch_id)
+            .filter(status=STATUS_PAID)
+            .aggregate(total=Sum("total_price"))["total"]
             or 0
         )
+
+        branch_reports = DailyReport.objects.filter(branch_id=branch_id)
+        reports = branch_reports
+        day = self.request.GET.get("day")
+        if day:
+            try:
+                reports = reports.filter(day=date.fromisoformat(day))
+            except ValueError:
+                raise Http404
+        report = reports.first()
+        if day and report is None:
+            raise Http404
+
+        context["report"] = load_report(report) if report else None
+        context["report_days"] = branch_reports.values_list("day", flat=True)[
+            : self.REPORT_DAYS
+        ]
         return context
 
 
-class EditOrderView(UpdateView):
+class EditOrderView(ProfiledViewMixin, BranchScopedMixin, UpdateView):
     """
     Представление для обновления заказа.
 
@@ -258,21 +339,22 @@ class EditOrderView(UpdateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["formset"] = OrderItemFormSet(
-            queryset=OrderItem.objects.filter(order=self.object)
-        )
+        context["formset"] = OrderItemFormSet(queryset=self.get_items())
         return context
 
-    @atomic
+    def get_items(self) -> QuerySet[OrderItem]:
+        return OrderItem.objects.for_branch(self.object.branch_id).filter(
+            order=self.object
+        )
+
+    @atomic_in_request_branch
     def form_valid(self, form):
         try:
             if self.object.status == STATUS_PAID:
                 messages.error(self.request, "Нельзя редактировать оплаченный заказ")
                 return self.form_invalid(form)
 
-            formset = OrderItemFormSet(
-                self.request.POST, queryset=OrderItem.objects.filter(order=self.object)
-            )
+            formset = OrderItemFormSet(self.request.POST, queryset=self.get_items())
 
             if not formset.is_valid():
                 messages.error(self.request, "Ошибка в позициях заказа")
@@ -282,10 +364,73 @@ class EditOrderView(UpdateView):
                 messages.error(self.request, "Заказ не может быть пустым")
                 return self.render_to_response(self.get_context_data(form=form))
 
-            formset.save()
+            save_item_formset(self.object, formset)
+            # Сохраняется только номер столика: сумма заказа уже
+            # пересчитана позициями, а в self.object она устаревшая
+            self.object = form.save(commit=False)
+            self.object.save(update_fields=["table_number", "updated_at"])
+            notify_order_changed(self.object, EVENT_UPDATED)
             messages.success(self.request, MSG_ORDER_UPDATED.format(self.object.id))
-            return super().form_valid(form)
+            return HttpResponseRedirect(self.get_success_url())
 
         except Exception as e:
             messages.error(self.request, f"Ошибка при обновлении заказа: {str(e)}")
             return self.form_invalid(form)
+
+
+class MetricsView(View):
+    """
+    Метрики заказов и времени ответа в текстовом формате Prometheus.
+
+    Отключается настройкой ``ORDERS_METRICS_ENABLED``.
+    """
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        if not getattr(settings, "ORDERS_METRICS_ENABLED", True):
+            raise Http404
+        return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
+class ReceiptView(ProfiledViewMixin, View):
+    """
+    Счет заказа или столика в тексте или PDF (см. orders.receipts).
+
+    URL задает либо ``pk`` заказа, либо ``table_number`` и формат ``fmt``
+    (txt/pdf). Заказы берутся только из филиала запроса. При переполненном
+    или не успевшем пуле рендеринга отвечает 503.
+    """
+
+    CONTENT_TYPES: dict[str, str] = {
+        "txt": "text/plain; charset=utf-8",
+        "pdf": "application/pdf",
+    }
+
+    def get(
+        self,
+        request: HttpRequest,
+        fmt: str,
+        pk: Optional[int] = None,
+        table_number: Optional[int] = None,
+    ) -> HttpResponse:
+        if fmt not in self.CONTENT_TYPES:
+            raise Http404
+        branch_id = get_request_branch(request)
+        try:
+            if pk is not None:
+                document = get_order_receipt(pk, fmt, branch_id)
+                filename = f"order-{pk}.{fmt}"
+            else:
+                document = get_table_receipt(table_number, fmt, branch_id)
+                filename = f"table-{table_number}.{fmt}"
+        except ReceiptsBusyError:
+            response = HttpResponse(
+                "Счета сейчас формируются, повторите позже", status=503
+            )
+            response["Retry-After"] = "5"
+            return response
+        if document is None:
+            raise Http404
+
+        response = HttpResponse(document, content_type=self.CONTENT_TYPES[fmt])
+        response["Content-Disposition"] = f'inline; filename="{filename}"'
+        return response
@@ -0,0 +1,128 @@
+"""
+Сравнение пропускной способности runserver и gunicorn.
+
+Скрипт по очереди поднимает ``manage.py runserver`` и ``gunicorn -c
+gunicorn.conf.py`` на свободных портах, нагружает список заказов и API и
+печатает запросы в секунду и задержки. Использует базу из настроек, поэтому
+запускайте его на стенде с данными, а не на рабочей базе:
+
+    python scripts/bench_server.py --requests 2000 --concurrency 16
+"""
+
+import argparse
+import http.client
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+PATHS = ("/", "/api/orders/")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(port: int, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Сервер на порту {port} не запустился за {timeout} с")
+
+
+def request_once(port: int, path: str) -> float:
+    started = time.perf_counter()
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        response.read()
+        if response.status >= 500:
+            raise RuntimeError(f"{path}: HTTP {response.status}")
+    finally:
+        conn.close()
+    return time.perf_counter() - started
+
+
+def load(port: int, path: str, requests: int, concurrency: int) -> dict[str, float]:
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        request_once(port, path)
+        started = time.perf_counter()
+        latencies = list(pool.map(lambda _: request_once(port, path), range(requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def run_server(command: list[str], port: int, args: argparse.Namespace) -> dict:
+    env = {**os.environ, "GUNICORN_BIND": f"127.0.0.1:{port}", "GUNICORN_ACCESSLOG": ""}
+    process = subprocess.Popen(
+        command,
+        cwd=PROJECT_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_up(port)
+        return {
+            path: load(port, path, args.requests, args.concurrency) for path in PATHS
+        }
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=60)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    servers = {
+        "runserver": lambda port: [
+            sys.executable,
+            "manage.py",
+            "runserver",
+            "--noreload",
+            f"127.0.0.1:{port}",
+        ],
+        "gunicorn": lambda port: [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "-c",
+            "gunicorn.conf.py",
+        ],
+    }
+
+    print(f"{'server':<10} {'path':<14} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, command in servers.items():
+        port = free_port()
+        for path, result in run_server(command(port), port, args).items():
+            print(
+                f"{name:<10} {path:<14} {result['rps']:9.1f} "
+                f"{result['p50_ms']:9.2f} {result['p99_ms']:9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()